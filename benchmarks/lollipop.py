@@ -0,0 +1,111 @@
+"""Micro-benchmark: per-row lollipop builders vs the vectorized ones.
+
+    python -m benchmarks.lollipop
+
+Prints build time, trace count and serialized figure size for the election
+seats chart and the net migration chart at increasing row counts.
+"""
+import json
+import timeit
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from dash import dcc
+from dash_app.cache import figure_to_json
+from dash_app.charts import net_migration_lollipop
+from dash_app.election_exploration import lollipop_charts_election_result
+
+PARTIES = ["ALP", "LNP", "LP", "NP", "GRN", "XEN", "KAP", "IND"]
+
+
+def legacy_net_migration_lollipop_horizontal(df):
+    df = df.sort_values("year")
+    colors = ["#167d7f" if v >= 0 else "#e63946" for v in df["net_migration"]]
+    fig = go.Figure()
+    for _, row in df.iterrows():
+        fig.add_trace(go.Scatter(
+            x=[row["year"], row["year"]], y=[0, row["net_migration"]],
+            mode="lines", line=dict(color="grey", width=2), showlegend=False,
+        ))
+    fig.add_trace(go.Scatter(
+        x=df["year"], y=df["net_migration"], mode="markers",
+        marker=dict(size=10, color=colors), name="Net Migration", showlegend=False,
+    ))
+    fig.update_layout(title="Australia Net Migration by Year", xaxis_title="Year", yaxis_title="Net Migration",
+                      height=400, margin={"r": 0, "t": 40, "l": 0, "b": 0}, xaxis=dict(dtick=1))
+    return fig
+
+
+def legacy_lollipop_charts_election_result(dataframe):
+    party_colors = {"ALP": "#DE3533", "LNP": "#0047AB", "LP": "#1E90FF", "NP": "#4169E1",
+                    "GRN": "#10C25B", "XEN": "#FF6300", "KAP": "#8B0000", "IND": "teal"}
+    df = dataframe.sort_values("WinCount", ascending=True)
+    fig = go.Figure()
+    for _, row in df.iterrows():
+        color = party_colors.get(row["PartyAb"], "gray")
+        fig.add_trace(go.Scatter(x=[0, row["WinCount"]], y=[row["PartyAb"], row["PartyAb"]], mode="lines",
+                                 line=dict(color=color, width=2), showlegend=False))
+        fig.add_trace(go.Scatter(x=[row["WinCount"]], y=[row["PartyAb"]], mode="markers+text",
+                                 marker=dict(size=12, color=color), text=[str(row["WinCount"])],
+                                 textposition="middle right", textfont=dict(size=11), showlegend=False))
+    fig.add_vline(x=75, line_width=2, line_dash="dash", line_color="grey")
+    fig.add_annotation(x=75, y=1.05, yref="paper", text="75 — Majority required to form government",
+                       showarrow=False, font=dict(size=11, color="grey"), xanchor="left")
+    fig.update_layout(
+        title={"text": "Seats Won by Party<br><sup>Total electorates won by each party in the 2025 election</sup>",
+               "x": 0, "xanchor": "left"},
+        template="simple_white",
+        xaxis={"title": {"text": "Seats Won", "standoff": 20}, "gridcolor": "#f0f0f0", "showgrid": True,
+               "zeroline": False},
+        yaxis={"title": {"text": "Party", "standoff": 10}, "gridcolor": "#f0f0f0", "showgrid": True},
+        margin={"l": 80, "b": 80, "t": 80},
+        height=400,
+    )
+    return dcc.Graph(figure=figure_to_json(fig))
+
+
+def migration_frame(rows):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "year": np.arange(2025 - rows, 2025),
+        "net_migration": rng.integers(-50_000, 550_000, rows),
+    })
+
+
+def seats_frame(rows):
+    rng = np.random.default_rng(0)
+    parties = PARTIES + [f"P{i}" for i in range(max(0, rows - len(PARTIES)))]
+    return pd.DataFrame({"PartyAb": parties[:rows], "WinCount": rng.integers(1, 100, rows)})
+
+
+def measure(build, df, repeat=5):
+    """Best-of-`repeat` time to build and serialize, plus trace count and JSON size."""
+    seconds = min(timeit.repeat(lambda: build(df), number=1, repeat=repeat))
+    figure = build(df)
+    return seconds * 1000, len(figure["data"]), len(json.dumps(figure, separators=(",", ":")))
+
+
+def run(sizes=(8, 45, 200, 1000)):
+    results = []
+    cases = [
+        ("net_migration", migration_frame,
+         lambda df: figure_to_json(legacy_net_migration_lollipop_horizontal(df)),
+         lambda df: figure_to_json(net_migration_lollipop(df, horizontal=True))),
+        ("election_seats", seats_frame,
+         lambda df: legacy_lollipop_charts_election_result(df).figure,
+         lambda df: lollipop_charts_election_result(df).figure),
+    ]
+    for name, make_frame, legacy, vectorized in cases:
+        for rows in sizes:
+            df = make_frame(rows)
+            for variant, build in (("legacy", legacy), ("vectorized", vectorized)):
+                build_ms, traces, payload = measure(build, df)
+                results.append({"chart": name, "rows": rows, "variant": variant,
+                                "build_ms": round(build_ms, 2), "traces": traces, "payload_bytes": payload})
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'chart':<16}{'rows':>6}  {'variant':<11}{'build ms':>10}{'traces':>8}{'payload':>10}")
+    for r in run():
+        print(f"{r['chart']:<16}{r['rows']:>6}  {r['variant']:<11}{r['build_ms']:>10}{r['traces']:>8}{r['payload_bytes']:>10}")
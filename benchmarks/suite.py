@@ -0,0 +1,229 @@
+"""Benchmark suite over synthetic AEC/ABS data at multiples of the 2025 election size.
+
+    python -m benchmarks.suite [--scales 1,10,100] [--output results.json] [--data-dir DIR]
+
+For each scale this generates the inputs with benchmarks.synthetic, then
+measures:
+
+* ingestion - DOP CSVs to the partitioned Parquet dataset
+  (pipelines.election_distribution), the result marts
+  (pipelines.election_results) and the first-preference pyramid.
+* layout - election and immigration layout() on first call (data load
+  included) and from cache, and build_layout() uncached.
+* update_map - per state, building the figure uncached and the
+  pre-encoded figure served from the cache by /_figures/election-map/<state>.
+* payload - bytes of each map figure response and page layout, raw and
+  gzip/brotli encoded by dash_app.compression.
+
+The pages run in a fresh interpreter per scale against the local data
+backend, so caches and imports never carry over between scales. Results
+are written as JSON (by default to benchmarks/results/<commit>.json) so
+runs can be compared across commits. Scale 100 needs about 25 GB of disk.
+"""
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+DEFAULT_SCALES = [1, 10, 100]
+RESULTS_DIR = Path(__file__).parent / "results"
+REPEAT = 5
+
+ROUTER_OUTPUT = ".._pages_content.children..._pages_store.data.."
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def best_ms(fn, repeat=REPEAT):
+    return round(min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000, 2)
+
+
+def directory_bytes(path):
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def prepare(data_dir, scale):
+    """Generate the inputs for `scale` and run the pipelines over them, timing each step."""
+    from benchmarks.synthetic import EVENT_ID, generate
+    from pipelines.election_distribution import ingest
+    from pipelines.election_distribution import scan_dataset
+    from pipelines.election_pyramid import build_pyramid, scan_first_preferences, write_pyramid
+    from pipelines.election_results import compute_marts, write_marts
+
+    counts, generate_s = timed(lambda: generate(data_dir, scale))
+    csv_bytes = directory_bytes(data_dir / "dop")
+    rows, ingest_s = timed(lambda: ingest(data_dir / "dop", data_dir / "dataset"))
+    marts, marts_s = timed(lambda: compute_marts(scan_dataset(data_dir / "dataset", EVENT_ID)))
+    write_marts(marts, data_dir / "marts")
+    files = sorted((data_dir / "first-prefs").glob("*.csv"))
+    pyramid, pyramid_s = timed(lambda: build_pyramid(scan_first_preferences(files)))
+    write_pyramid(pyramid, data_dir / "first_preferences_pyramid.npz")
+    return {
+        "data": dict(counts, csv_bytes=csv_bytes, generate_s=round(generate_s, 3)),
+        "ingest": {
+            "rows": rows,
+            "seconds": round(ingest_s, 3),
+            "rows_per_s": round(rows / ingest_s),
+            "csv_mb_per_s": round(csv_bytes / 1e6 / ingest_s, 1),
+            "dataset_bytes": directory_bytes(data_dir / "dataset"),
+            "marts_s": round(marts_s, 3),
+            "pyramid_s": round(pyramid_s, 3),
+        },
+    }
+
+
+def page_environment(data_dir):
+    return dict(
+        os.environ,
+        DATA_BACKEND="local",
+        LOCAL_DATA_DIR=str(data_dir / "marts"),
+        ELECTION_GEOJSON_PATH=str(data_dir / "cec_districts_map.geojson"),
+        # No simplified levels for synthetic divisions: the pages fall back to the GeoJSON.
+        MAP_LEVELS_DIR=str(data_dir / "levels"),
+        ELECTION_PYRAMID_PATH=str(data_dir / "first_preferences_pyramid.npz"),
+        SNAPSHOT_DIR=str(data_dir / "snapshots"),
+        ELECTION_MAP_MODE="server",
+        PRELOAD_DATA="false",
+    )
+
+
+def router_request(pathname):
+    return {
+        "output": ROUTER_OUTPUT,
+        "outputs": [{"id": "_pages_content", "property": "children"}, {"id": "_pages_store", "property": "data"}],
+        "inputs": [{"id": "_pages_location", "property": "pathname", "value": pathname},
+                   {"id": "_pages_location", "property": "search", "value": ""}],
+        "changedPropIds": ["_pages_location.pathname"],
+        "state": [],
+    }
+
+
+def map_path(state):
+    return f"/_figures/election-map/{state}"
+
+
+def encoded_sizes(request):
+    sizes = {}
+    for encoding in ("identity", "gzip", "br"):
+        sizes[f"{encoding}_bytes"] = len(request({"Accept-Encoding": encoding}).get_data())
+    return sizes
+
+
+def measure_pages():
+    """Run in the page subprocess: layout, update_map and payload measurements."""
+    import_start = time.perf_counter()
+    from dash_app import main
+    from dash_app.cache import encode_figure
+    import_s = time.perf_counter() - import_start
+    client = main.server.test_client()
+    client.get("/_dash-dependencies")  # let Dash finish its first-request setup
+    election = sys.modules["pages.election"]
+    immigration = sys.modules["pages.immigration"]
+
+    _, election_cold_s = timed(election.layout)
+    _, immigration_cold_s = timed(immigration.layout)
+    data = election.load_all_data()
+    layout = {
+        "election_first_ms": round(election_cold_s * 1000, 2),
+        "election_cached_ms": best_ms(election.layout),
+        "election_build_ms": best_ms(lambda: election.build_layout(*data), repeat=3),
+        "immigration_first_ms": round(immigration_cold_s * 1000, 2),
+        "immigration_cached_ms": best_ms(immigration.layout),
+        "immigration_build_ms": best_ms(immigration.build_layout, repeat=3),
+    }
+
+    update_map = {}
+    for state in sorted(data[0]["StateAb"].unique()):
+        path = map_path(state)
+        update_map[state] = {
+            "build_ms": best_ms(lambda: encode_figure(election.build_map_figure(data[0], state)), repeat=3),
+            "cached_ms": best_ms(lambda: client.get(path)),
+            **encoded_sizes(lambda headers: client.get(path, headers=headers)),
+        }
+
+    payload = {
+        path: encoded_sizes(lambda headers: client.post("/_dash-update-component", json=router_request(path), headers=headers))
+        for path in ("/election", "/immigration")
+    }
+    return {"import_s": round(import_s, 3), "layout": layout, "update_map": update_map, "payload": payload}
+
+
+def run_pages(data_dir):
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.suite", "--pages", str(data_dir)],
+        capture_output=True, text=True, env=page_environment(data_dir),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"page benchmarks failed:\n{result.stderr[-3000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(scales=DEFAULT_SCALES, data_root=None):
+    results = []
+    for scale in scales:
+        data_dir = Path(data_root or tempfile.mkdtemp(prefix="australia-bench-")) / f"x{scale}"
+        shutil.rmtree(data_dir, ignore_errors=True)
+        data_dir.mkdir(parents=True)
+        try:
+            scale_result = {"scale": scale, **prepare(data_dir, scale)}
+            scale_result["pages"] = run_pages(data_dir)
+        finally:
+            if data_root is None:
+                shutil.rmtree(data_dir.parent, ignore_errors=True)
+        results.append(scale_result)
+        print_summary(scale_result)
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "scales": results,
+    }
+
+
+def print_summary(result):
+    ingest, layout, maps = result["ingest"], result["pages"]["layout"], result["pages"]["update_map"]
+    print(f"x{result['scale']}: {result['data']['dop_rows']:,} DOP rows, {result['data']['divisions']} divisions", file=sys.stderr)
+    print(f"  ingest   {ingest['seconds']:.1f}s ({ingest['rows_per_s']:,} rows/s, {ingest['csv_mb_per_s']} MB/s), "
+          f"marts {ingest['marts_s']:.1f}s, pyramid {ingest['pyramid_s']:.1f}s", file=sys.stderr)
+    print(f"  layout   election first {layout['election_first_ms']:.0f} ms, build {layout['election_build_ms']:.0f} ms, "
+          f"cached {layout['election_cached_ms']:.2f} ms", file=sys.stderr)
+    for state, m in maps.items():
+        print(f"  map {state:<4} build {m['build_ms']:>8.1f} ms  cached {m['cached_ms']:>6.2f} ms  "
+              f"{m['identity_bytes']:>10,} B  gzip {m['gzip_bytes']:>9,} B  br {m['br_bytes']:>9,} B", file=sys.stderr)
+
+
+def option(argv, name, default=None):
+    return argv[argv.index(name) + 1] if name in argv else default
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    if "--pages" in argv:
+        print(json.dumps(measure_pages()))
+        sys.exit(0)
+    scales = [int(s) for s in option(argv, "--scales", ",".join(map(str, DEFAULT_SCALES))).split(",")]
+    report = run(scales, option(argv, "--data-dir"))
+    output = Path(option(argv, "--output", RESULTS_DIR / f"{report['commit'] or 'results'}.json"))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"wrote {output}", file=sys.stderr)
@@ -0,0 +1,258 @@
+"""Synthetic AEC and ABS-shaped inputs at multiples of the 2025 federal election.
+
+    python -m benchmarks.synthetic <output_dir> [scale]
+
+Scale 1 matches the 2025 House count: 150 divisions of 60 polling places
+and 7 candidates each, about 9,000 polling places and 1.5 million DOP
+rows. Scale N has N times as many divisions. Written under output_dir:
+
+* dop/<STATE>/HouseDopByPPDownload-31496-<STATE>-<DIV>.csv - distribution
+  of preferences in the AEC layout: a banner line, then every field quoted.
+* first-prefs/HouseStateFirstPrefsByPollingPlaceDownload-31496-<STATE>.csv
+* cec_districts_map.geojson - one polygon per division, named like the
+  DivisionNm values.
+* marts/australia.au_population_mart.parquet - an ABS-shaped yearly
+  population table with 43 * N years.
+
+The election marts are not generated here; the benchmark suite builds them
+from the DOP files with the pipelines. Disk use is roughly 250 MB of CSV
+per unit of scale, close to the real 2025 files.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+import numpy as np
+import polars as pl
+
+EVENT_ID = 31496
+PLACES_PER_DIVISION = 60
+VOTERS_PER_PLACE = 1100
+GEOMETRY_VERTICES = 400
+
+# Divisions per state in 2025; 150 in total.
+DIVISIONS_PER_STATE = {"NSW": 46, "VIC": 38, "QLD": 30, "WA": 16, "SA": 10, "TAS": 5, "ACT": 3, "NT": 2}
+
+STATE_NAMES = {"NSW": "New South Wales", "VIC": "Victoria", "QLD": "Queensland", "WA": "Western Australia",
+               "SA": "South Australia", "TAS": "Tasmania", "NT": "Northern Territory",
+               "ACT": "Australian Capital Territory"}
+
+STATE_CENTERS = {"NSW": (-32.0, 147.0), "VIC": (-37.0, 144.5), "QLD": (-22.0, 145.0), "WA": (-26.0, 121.0),
+                 "SA": (-30.0, 136.0), "TAS": (-42.0, 146.5), "NT": (-19.5, 133.0), "ACT": (-35.5, 149.0)}
+
+# (PartyAb, PartyNm, relative first-preference strength); every division runs
+# the first five and two of the rest.
+PARTIES = [
+    ("ALP", "Australian Labor Party", 3.5),
+    ("LP", "Liberal", 2.2),
+    ("GRN", "The Greens", 1.2),
+    ("ON", "Pauline Hanson's One Nation", 0.6),
+    ("IND", "Independent", 0.7),
+    ("NP", "The Nationals", 0.5),
+    ("TOP", "Trumpet of Patriots", 0.3),
+    ("FFP", "Family First", 0.2),
+    ("LCP", "Legalise Cannabis Party", 0.2),
+    ("LBT", "Libertarian", 0.1),
+]
+MAJOR_PARTIES = 5
+CANDIDATES_PER_DIVISION = 7
+
+DOP_COLUMNS = ["StateAb", "DivisionId", "DivisionNm", "PPId", "PPNm", "CountNum", "BallotPosition", "CandidateId",
+               "Surname", "GivenNm", "PartyAb", "PartyNm", "SittingMemberFl", "CalculationType", "CalculationValue"]
+
+
+def divisions(scale):
+    rows = []
+    division_id = 100
+    for state, count in DIVISIONS_PER_STATE.items():
+        for i in range(count * scale):
+            rows.append({"StateAb": state, "DivisionId": division_id, "DivisionNm": f"{state} Division {i + 1}"})
+            division_id += 1
+    return rows
+
+
+def distribution_counts(first_preferences, rng):
+    """Preference and transfer counts at every count, shaped (counts, places, candidates).
+
+    The candidate with the lowest division total is excluded at each count
+    and their votes at every polling place are split between the remaining
+    candidates; the rounding remainder exhausts.
+    """
+    current = first_preferences.copy()
+    remaining = np.ones(current.shape[1], dtype=bool)
+    preference, transfer = [current.copy()], [np.zeros_like(current)]
+    while remaining.sum() > 2:
+        totals = np.where(remaining, current.sum(axis=0), np.iinfo(current.dtype).max)
+        excluded = int(np.argmin(totals))
+        remaining[excluded] = False
+        moved = current[:, excluded]
+        change = np.zeros_like(current)
+        change[:, remaining] = np.floor(moved[:, None] * rng.dirichlet(np.ones(remaining.sum()))).astype(current.dtype)
+        change[:, excluded] = -moved
+        current = current + change
+        preference.append(current.copy())
+        transfer.append(change)
+    return np.stack(preference), np.stack(transfer)
+
+
+def division_frames(division, candidates, rng):
+    """DOP and first-preference rows for one division."""
+    strength = np.array([c["strength"] for c in candidates])
+    places = PLACES_PER_DIVISION
+    first = rng.poisson(VOTERS_PER_PLACE * rng.dirichlet(strength * 8, size=places)).astype(np.int64)
+    preference, transfer = distribution_counts(first, rng)
+    formal = first.sum(axis=1)
+
+    count_num, place, candidate = (a.ravel() for a in np.indices(preference.shape))
+    moved = np.abs(transfer).max(axis=2, keepdims=True)
+    values = {
+        "Preference Count": preference.ravel().astype(np.float64),
+        "Preference Percent": np.round(100 * preference / np.maximum(formal, 1)[None, :, None], 2).ravel(),
+        "Transfer Count": transfer.ravel().astype(np.float64),
+        "Transfer Percent": np.round(100 * transfer / np.maximum(moved, 1), 2).ravel(),
+    }
+    base = pl.DataFrame({
+        "StateAb": division["StateAb"],
+        "DivisionId": division["DivisionId"],
+        "DivisionNm": division["DivisionNm"],
+        "PPId": division["DivisionId"] * 1000 + place,
+        "PPNm": np.char.add(f"{division['DivisionNm']} Booth ", (place + 1).astype(str)),
+        "CountNum": count_num,
+        "candidate": candidate,
+    })
+    candidate_frame = pl.DataFrame(candidates).drop("strength").with_row_index("candidate").with_columns(
+        pl.col("candidate").cast(pl.Int64))
+    base = base.join(candidate_frame, on="candidate", how="left").drop("candidate")
+    dop = pl.concat([
+        base.with_columns(pl.lit(calculation).alias("CalculationType"), pl.Series("CalculationValue", value))
+        for calculation, value in values.items()
+    ]).select(DOP_COLUMNS)
+
+    first_prefs = (
+        base.filter(pl.col("CountNum") == 0)
+        .with_columns(pl.Series("OrdinaryVotes", first.ravel()))
+    )
+    informal = rng.binomial(formal, 0.05)
+    return dop, first_prefs, pl.DataFrame({
+        "StateAb": division["StateAb"], "DivisionId": division["DivisionId"], "DivisionNm": division["DivisionNm"],
+        "PPId": division["DivisionId"] * 1000 + np.arange(places),
+        "PPNm": np.char.add(f"{division['DivisionNm']} Booth ", np.arange(1, places + 1).astype(str)),
+        "OrdinaryVotes": informal,
+    })
+
+
+def division_candidates(division, rng):
+    minors = rng.choice(np.arange(MAJOR_PARTIES, len(PARTIES)), CANDIDATES_PER_DIVISION - MAJOR_PARTIES, replace=False)
+    parties = [PARTIES[i] for i in list(range(MAJOR_PARTIES)) + sorted(minors)]
+    order = rng.permutation(len(parties))
+    return [
+        {
+            "BallotPosition": int(position) + 1,
+            "CandidateId": division["DivisionId"] * 100 + i,
+            "Surname": f"CANDIDATE{i + 1}",
+            "GivenNm": f"{party_ab} {division['DivisionNm']}",
+            "PartyAb": party_ab,
+            "PartyNm": party_nm,
+            "SittingMemberFl": "Y" if i == 0 else "N",
+            "strength": strength * rng.uniform(0.5, 1.5),
+        }
+        for i, ((party_ab, party_nm, strength), position) in enumerate(zip(parties, order))
+    ]
+
+
+def write_aec_csv(df, path, banner, quote):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(f"{banner}\n".encode())
+        df.write_csv(f, quote_style="always" if quote else "necessary")
+
+
+def first_preferences_file(first_prefs, informal):
+    formal = first_prefs.select(
+        "StateAb", pl.col("DivisionId").alias("DivisionID"), "DivisionNm", pl.col("PPId").alias("PollingPlaceID"),
+        pl.col("PPNm").alias("PollingPlace"), pl.col("CandidateId").alias("CandidateID"), "Surname", "GivenNm",
+        "BallotPosition", pl.lit("N").alias("Elected"), pl.lit("N").alias("HistoricElected"), "PartyAb", "PartyNm",
+        "OrdinaryVotes", pl.lit(0.0).alias("Swing"),
+    )
+    informal = informal.select(
+        "StateAb", pl.col("DivisionId").alias("DivisionID"), "DivisionNm", pl.col("PPId").alias("PollingPlaceID"),
+        pl.col("PPNm").alias("PollingPlace"), (pl.col("DivisionId") * 100 + 99).alias("CandidateID"),
+        pl.lit("Informal").alias("Surname"), pl.lit("Informal").alias("GivenNm"), pl.lit(999).alias("BallotPosition"),
+        pl.lit("N").alias("Elected"), pl.lit("N").alias("HistoricElected"), pl.lit(None, pl.String).alias("PartyAb"),
+        pl.lit("Informal").alias("PartyNm"), "OrdinaryVotes", pl.lit(0.0).alias("Swing"),
+    )
+    return pl.concat([formal, informal], how="vertical_relaxed")
+
+
+def division_polygon(center, index, count):
+    """A disc on a grid around the state's centre, so each division has its own footprint."""
+    columns = int(np.ceil(np.sqrt(count)))
+    lat = center[0] + (index // columns - columns / 2) * 0.3
+    lon = center[1] + (index % columns - columns / 2) * 0.3
+    t = np.linspace(0, 2 * np.pi, GEOMETRY_VERTICES)
+    ring = np.round(np.column_stack([lon + 0.14 * np.cos(t), lat + 0.14 * np.sin(t)]), 5)
+    ring[-1] = ring[0]
+    return {"type": "Polygon", "coordinates": [ring.tolist()]}
+
+
+def write_geojson(all_divisions, path):
+    features = []
+    for state in DIVISIONS_PER_STATE:
+        in_state = [d for d in all_divisions if d["StateAb"] == state]
+        for i, division in enumerate(in_state):
+            features.append({
+                "type": "Feature",
+                "properties": {"CED_NAME25": division["DivisionNm"], "STE_NAME21": STATE_NAMES[state]},
+                "geometry": division_polygon(STATE_CENTERS[state], i, len(in_state)),
+            })
+    with open(path, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+
+def population_mart(scale, rng):
+    """Yearly births, deaths, net migration and total population ending in 2024."""
+    years = np.arange(2025 - 43 * scale, 2025)
+    t = years - years[0]
+    births = 250_000 + 1_000 * t / scale + rng.normal(0, 4_000, len(years))
+    deaths = 110_000 + 1_500 * t / scale + rng.normal(0, 3_000, len(years))
+    net_migration = 150_000 + 80_000 * np.sin(t / 5) + rng.normal(0, 30_000, len(years))
+    total = 15_000_000 + np.cumsum(births - deaths + net_migration)
+    return pl.DataFrame({
+        "year": years.astype(np.int64),
+        "births": births.astype(np.int64),
+        "deaths": deaths.astype(np.int64),
+        "net_migration": net_migration.astype(np.int64),
+        "total": total.astype(np.int64),
+    })
+
+
+def generate(output_dir, scale=1, seed=0):
+    """Write every synthetic input for `scale` under `output_dir`; returns row and file counts."""
+    output_dir = Path(output_dir)
+    rng = np.random.default_rng(seed)
+    all_divisions = divisions(scale)
+    dop_rows = dop_files = 0
+    dop_banner = f"{EVENT_ID} Federal Election House of Representatives Distribution of Preferences By Polling Place [synthetic x{scale}]"
+    first_banner = f"{EVENT_ID} Federal Election House of Representatives First Preferences By Candidate By Polling Place [synthetic x{scale}]"
+    for state in DIVISIONS_PER_STATE:
+        state_first_prefs = []
+        for division in (d for d in all_divisions if d["StateAb"] == state):
+            dop, first_prefs, informal = division_frames(division, division_candidates(division, rng), rng)
+            path = output_dir / "dop" / state / f"HouseDopByPPDownload-{EVENT_ID}-{state}-{division['DivisionId']}.csv"
+            write_aec_csv(dop, path, dop_banner, quote=True)
+            dop_rows += dop.height
+            dop_files += 1
+            state_first_prefs.append(first_preferences_file(first_prefs, informal))
+        path = output_dir / "first-prefs" / f"HouseStateFirstPrefsByPollingPlaceDownload-{EVENT_ID}-{state}.csv"
+        write_aec_csv(pl.concat(state_first_prefs), path, first_banner, quote=False)
+    write_geojson(all_divisions, output_dir / "cec_districts_map.geojson")
+    os.makedirs(output_dir / "marts", exist_ok=True)
+    population_mart(scale, rng).write_parquet(output_dir / "marts" / "australia.au_population_mart.parquet")
+    return {"divisions": len(all_divisions), "polling_places": len(all_divisions) * PLACES_PER_DIVISION,
+            "dop_files": dop_files, "dop_rows": dop_rows}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m benchmarks.synthetic <output_dir> [scale]")
+    print(generate(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 1))
@@ -0,0 +1,85 @@
+"""Build simplified, per-state CED boundary files for the election map.
+
+Run from the repository root with the CED boundaries as a shapefile or
+as the division GeoJSON the app falls back to:
+
+    python -m dash_app.build_map_levels [path/to/CED_2025_AUST_GDA2020.shp | path/to/cec_districts_map.geojson]
+
+Only the shapefile's sidecar files are committed, so the container image
+builds the levels from the GeoJSON in Cloud Storage, which CI downloads to
+build/ before `docker build` (see Dockerfile and deploy.yml).
+
+Each level is a coverage simplification of the whole country, so adjacent
+divisions keep sharing exactly the same edges, and is written as one small
+FeatureCollection per state under election_map/levels/z<zoom>/<STATE>.json.
+"""
+import json
+import os
+import sys
+
+ELECTION_MAP_DIR = os.path.join(os.path.dirname(__file__), "election_map")
+MAP_LEVELS_DIR = os.getenv("MAP_LEVELS_DIR", os.path.join(ELECTION_MAP_DIR, "levels"))
+SHAPEFILE_PATH = os.path.join(ELECTION_MAP_DIR, "CED_2025_AUST_GDA2020.shp")
+
+# Simplification tolerance in degrees for each initial map zoom, roughly a
+# quarter of a screen pixel at that zoom.
+MAP_LEVELS = {
+    4: 0.02,
+    5: 0.01,
+    6: 0.005,
+    9: 0.0005,
+}
+
+COORDINATE_DECIMALS = 5
+
+STATE_ABBREVIATIONS = {
+    "New South Wales": "NSW",
+    "Victoria": "VIC",
+    "Queensland": "QLD",
+    "Western Australia": "WA",
+    "South Australia": "SA",
+    "Tasmania": "TAS",
+    "Northern Territory": "NT",
+    "Australian Capital Territory": "ACT",
+}
+
+
+def map_level(zoom):
+    """Most detailed level that is still appropriate for the given zoom."""
+    levels = [level for level in MAP_LEVELS if level <= zoom]
+    return max(levels) if levels else min(MAP_LEVELS)
+
+
+def build(source_path=SHAPEFILE_PATH, output_dir=MAP_LEVELS_DIR):
+    import geopandas as gpd
+    import numpy as np
+    import shapely
+
+    geodf = gpd.read_file(source_path)
+    if geodf.crs is not None and geodf.crs.to_epsg() != 4326:
+        geodf = geodf.to_crs("WGS84")
+    geodf = geodf[~geodf.geometry.is_empty & geodf.geometry.notna()].reset_index(drop=True)
+    geodf["StateAb"] = geodf["STE_NAME21"].map(STATE_ABBREVIATIONS)
+
+    for level, tolerance in MAP_LEVELS.items():
+        simplified = geodf.geometry.simplify_coverage(tolerance)
+        simplified = shapely.transform(simplified.values, lambda coords: np.round(coords, COORDINATE_DECIMALS))
+        level_dir = os.path.join(output_dir, f"z{level}")
+        os.makedirs(level_dir, exist_ok=True)
+        for state, rows in geodf.groupby("StateAb"):
+            features = [
+                {
+                    "type": "Feature",
+                    "properties": {"CED_NAME25": geodf.at[i, "CED_NAME25"]},
+                    "geometry": shapely.geometry.mapping(simplified[i]),
+                }
+                for i in rows.index
+            ]
+            path = os.path.join(level_dir, f"{state}.json")
+            with open(path, "w") as f:
+                json.dump({"type": "FeatureCollection", "features": features}, f, separators=(",", ":"))
+            print(f"z{level} {state}: {len(features)} divisions, {os.path.getsize(path) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    build(*sys.argv[1:2])
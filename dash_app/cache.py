@@ -0,0 +1,225 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+# Every cache registers itself here so dash_app.main can report hit/miss counts.
+CACHES = []
+
+# Figures served as pre-encoded JSON from /_figures/<name>/<key> (see
+# dash_app.main): name -> function of key returning an encode_figure()
+# entry, or None for an unknown key.
+FIGURE_ROUTES = {}
+
+# How long a loaded value is served before its source is checked again.
+DATA_REFRESH_SECONDS = float(os.getenv("DATA_REFRESH_SECONDS", "300"))
+
+logger = logging.getLogger(__name__)
+
+
+def figure_to_json(fig):
+    """Serialize a Plotly figure once into plain JSON types Dash can send as-is."""
+    return json.loads(fig.to_json())
+
+
+def encode_figure(fig):
+    """Serialize a Plotly figure once to JSON bytes, with their content hash for the ETag."""
+    body = fig.to_json().encode("utf-8")
+    return {"body": body, "digest": hashlib.blake2b(body, digest_size=16).hexdigest()}
+
+
+class VersionedCache:
+    """Values built once per data version and shared by every request in a worker.
+
+    The version is any object that is replaced when the underlying data is
+    reloaded, such as the tuple returned by an lru_cache'd loader. Seeing a
+    new version drops every entry built from the previous one.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = {}
+        CACHES.append(self)
+
+    def get(self, version, key, build):
+        with self._lock:
+            if version is not self._version:
+                self._version = version
+                self._entries = {}
+            if key in self._entries:
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = build()
+        with self._lock:
+            if version is self._version:
+                self._entries[key] = value
+        return value
+
+    def warm(self, version, keys, build):
+        """Build any of `keys` that are not cached yet for this version."""
+        for key in keys:
+            with self._lock:
+                cached = version is self._version and key in self._entries
+            if not cached:
+                self.get(version, key, lambda: build(key))
+
+    def clear(self):
+        """Drop every entry, for when something other than the version changes what they were built from."""
+        with self._lock:
+            self._version = None
+            self._entries = {}
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+            "entries": len(self._entries),
+        }
+
+
+class RefreshingCache:
+    """A zero-argument loader's value, served stale while it is refreshed in the background.
+
+    Once the value is older than `ttl` seconds, the next call still returns
+    it at once and starts one background refresh. The refresh calls
+    `version()` (a cheap metadata lookup such as a table's last-modified
+    time) and reloads only when it changed, or always when there is no
+    version. A loader built from other RefreshingCaches lists them in
+    `depends_on` and is rebuilt as soon as any of them has a new value.
+
+    The new value replaces the old one in a single assignment, so a
+    request sees either the old or the new value, never a mix. Only one
+    load runs at a time: a cold call waits for the load already in flight
+    instead of starting its own.
+    """
+
+    def __init__(self, name, load, ttl=DATA_REFRESH_SECONDS, version=None, depends_on=()):
+        self.name = name
+        self.load = load
+        self.ttl = ttl
+        self.version = version
+        self.depends_on = list(depends_on)
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        # Bumped on every new value, so dependants can tell it changed.
+        self.generation = 0
+        self._entry = None
+        self._reset_process_state()
+        CACHES.append(self)
+        functools.update_wrapper(self, load)
+
+    def _reset_process_state(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+
+    def __call__(self):
+        if self._entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return self._maybe_refresh()
+
+    def _maybe_refresh(self):
+        """The current value, loading it if there is none and starting a refresh if one is due."""
+        if self._pid != os.getpid():
+            # A forked worker inherits neither the refresh thread nor the locks' owners.
+            self._reset_process_state()
+        entry = self._entry
+        if entry is None:
+            return self._load_once()
+        dependencies = tuple(dependency.current_generation() for dependency in self.depends_on)
+        expired = self.ttl is not None and time.monotonic() - entry["checked_at"] >= self.ttl
+        if expired or dependencies != entry["dependencies"]:
+            self._start_refresh()
+        return entry["value"]
+
+    def current_generation(self):
+        """Generation of the value a call would return now, starting a refresh if it is due.
+
+        Not counted as a hit or miss: dependants ask on every one of their own calls.
+        """
+        self._maybe_refresh()
+        return self.generation
+
+    def _load_once(self):
+        with self._load_lock:
+            if self._entry is None:
+                self._store(self._fetch())
+        return self._entry["value"]
+
+    def _fetch(self):
+        dependencies = tuple(dependency.current_generation() for dependency in self.depends_on)
+        token = self.version() if self.version else None
+        return {"value": self.load(), "version": token, "dependencies": dependencies, "checked_at": time.monotonic()}
+
+    def _store(self, entry):
+        self._entry = entry
+        self.generation += 1
+
+    def _start_refresh(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name=f"refresh-{self.name}", daemon=True).start()
+
+    def _refresh(self):
+        try:
+            with self._load_lock:
+                entry = self._entry
+                if entry is None:
+                    # Cleared since the refresh started; the next call loads afresh.
+                    return
+                dependencies = tuple(dependency.generation for dependency in self.depends_on)
+                if self.version and dependencies == entry["dependencies"]:
+                    if self.version() == entry["version"]:
+                        self._entry = dict(entry, checked_at=time.monotonic())
+                        return
+                self._store(self._fetch())
+                self.refreshes += 1
+        except Exception:
+            # Keep serving the current value and try again after another ttl.
+            logger.exception("Refreshing %s failed", self.name)
+            if self._entry is not None:
+                self._entry = dict(self._entry, checked_at=time.monotonic())
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def cache_clear(self):
+        with self._load_lock:
+            self._entry = None
+
+    def stats(self):
+        total = self.hits + self.misses
+        entry = self._entry
+        return {
+            "name": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+            "entries": 0 if entry is None else 1,
+            "refreshes": self.refreshes,
+            "generation": self.generation,
+        }
+
+
+def refreshing(name, ttl=DATA_REFRESH_SECONDS, version=None, depends_on=()):
+    """Decorator form of RefreshingCache, used in place of lru_cache(maxsize=1) on the page data loaders."""
+    def decorate(load):
+        return RefreshingCache(name, load, ttl, version, depends_on)
+    return decorate
@@ -0,0 +1,51 @@
+import plotly.graph_objects as go
+
+
+def stem_segments(starts, ends):
+    """Interleave start/end pairs with None gaps so a single line trace draws every stem."""
+    import numpy as np
+    starts = np.asarray(starts, dtype=object)
+    segments = np.empty(len(starts) * 3, dtype=object)
+    segments[0::3] = starts
+    segments[1::3] = np.asarray(ends, dtype=object)
+    segments[2::3] = None
+    return segments
+
+
+def net_migration_lollipop(df, horizontal=True):
+    """Lollipop of net migration by year: one trace for all stems, one for the dots."""
+    import numpy as np
+    df = df.sort_values("year")
+    years = df["year"].to_numpy()
+    values = df["net_migration"].to_numpy()
+    colors = np.where(values >= 0, "#167d7f", "#e63946")
+    zeros = np.zeros(len(df), dtype=values.dtype)
+
+    if horizontal:
+        stems_x, stems_y = stem_segments(years, years), stem_segments(zeros, values)
+        dots_x, dots_y = years, values
+    else:
+        stems_x, stems_y = stem_segments(zeros, values), stem_segments(years, years)
+        dots_x, dots_y = values, years
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=stems_x, y=stems_y,
+        mode="lines", line=dict(color="grey", width=2), showlegend=False,
+    ))
+    fig.add_trace(go.Scatter(
+        x=dots_x, y=dots_y, mode="markers",
+        marker=dict(size=10, color=colors), name="Net Migration", showlegend=False,
+    ))
+    fig.update_layout(
+        title="Australia Net Migration by Year",
+        xaxis_title="Year" if horizontal else "Net Migration",
+        yaxis_title="Net Migration" if horizontal else "Year",
+        height=400 if horizontal else 700,
+        margin={"r": 0, "t": 40, "l": 0, "b": 0},
+    )
+    if horizontal:
+        fig.update_layout(xaxis=dict(dtick=1))
+    else:
+        fig.update_layout(yaxis=dict(dtick=1))
+    return fig
@@ -0,0 +1,137 @@
+"""Compression and ETag validation for the Flask server behind Dash.
+
+Page HTML, /_dash-layout, /_dash-update-component and component bundle
+responses are sent brotli- or gzip-encoded when the client accepts it.
+GET and HEAD responses also get a content-hash ETag, and a request whose
+If-None-Match matches gets an empty 304 instead. Compressed bodies are
+cached by content hash.
+Pre-encoded figures (dash_app.cache.encode_figure) already carry their
+hash, so serving one again is neither re-hashed nor recompressed.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import request
+try:
+    import brotli
+except ModuleNotFoundError:
+    try:
+        import brotlicffi as brotli
+    except ModuleNotFoundError:
+        brotli = None
+try:
+    from dash_app.cache import CACHES
+except ModuleNotFoundError:
+    from cache import CACHES
+
+COMPRESSIBLE_MIMETYPES = {"text/html", "application/json", "application/javascript", "text/javascript", "text/css"}
+# Below this the encoding overhead outweighs the savings.
+MIN_SIZE = 1024
+GZIP_LEVEL = 6
+# Quality 11 is several times slower for a few percent; 5 keeps dynamic responses fast.
+BROTLI_QUALITY = 5
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class CompressedCache:
+    """Compressed bodies keyed by (content hash, encoding), evicted least recently used by size."""
+
+    def __init__(self, name, max_bytes=CACHE_MAX_BYTES):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        CACHES.append(self)
+
+    def get(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        value = build()
+        with self._lock:
+            if key not in self._entries and len(value) <= self.max_bytes:
+                self._entries[key] = value
+                self._size += len(value)
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return value
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+            "entries": len(self._entries),
+            "bytes": self._size,
+        }
+
+
+compressed_bodies = CompressedCache("compressed_responses")
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def choose_encoding(accept_encodings):
+    encodings = ["br", "gzip"] if brotli is not None else ["gzip"]
+    accepted = [e for e in encodings if accept_encodings[e] > 0]
+    return max(accepted, key=lambda e: accept_encodings[e], default=None)
+
+
+def etag_matches(response, digest):
+    """True if If-None-Match names this content in any encoding."""
+    if_none_match = request.if_none_match
+    if if_none_match.star_tag:
+        return True
+    return any(tag.split("-", 1)[0] == digest for tag in if_none_match.as_set())
+
+
+def encoded_response(response, body, digest):
+    """Fill `response` with `body`, whose content hash is `digest`, compressed and ETag-validated."""
+    encoding = choose_encoding(request.accept_encodings) if len(body) >= MIN_SIZE else None
+    response.vary.add("Accept-Encoding")
+    # Only GET and HEAD are validated: a callback POST carries its inputs in
+    # the body, so the same If-None-Match may ask for different content.
+    validated = request.method in ("GET", "HEAD")
+    if validated:
+        # Each encoding is a different representation, so it gets its own ETag.
+        response.set_etag(f"{digest}-{encoding}" if encoding else digest)
+    if validated and etag_matches(response, digest):
+        response.status_code = 304
+        response.set_data(b"")
+        response.headers.pop("Content-Length", None)
+        return response
+    if encoding:
+        response.set_data(compressed_bodies.get((digest, encoding), lambda: compress(body, encoding)))
+        response.headers["Content-Encoding"] = encoding
+    else:
+        response.set_data(body)
+    # compress_response leaves it alone on the way out.
+    response.pre_encoded = True
+    return response
+
+
+def compress_response(response):
+    if (response.status_code != 200 or response.direct_passthrough
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or "Content-Encoding" in response.headers or getattr(response, "pre_encoded", False)):
+        return response
+    body = response.get_data()
+    return encoded_response(response, body, hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+def install(server):
+    server.after_request(compress_response)
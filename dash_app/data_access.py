@@ -0,0 +1,206 @@
+"""Data access for the Dash pages.
+
+Pages call get_backend().read_table(table_id, columns, row_filter) for
+plain column/row selections, or get_backend().query(table_id, sql) for
+anything else, and get an Arrow table back. DATA_BACKEND selects the
+implementation:
+
+* bigquery (default) - streams read_table() selections as Arrow record
+  batches through the BigQuery Storage Read API, runs query() SQL as a
+  BigQuery job, and keeps both in the shared on-disk snapshots from
+  dash_app.snapshot.
+* local - runs the same SQL with Polars against Parquet snapshots of the
+  marts in LOCAL_DATA_DIR, one <table_id>.parquet file per table. Create
+  them from BigQuery with `python -m dash_app.data_access export [dir]`.
+"""
+import os
+import sys
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from dotenv import load_dotenv
+try:
+    from dash_app.snapshot import cached_snapshot, read_snapshot, table_version
+except ModuleNotFoundError:
+    from snapshot import cached_snapshot, read_snapshot, table_version
+
+load_dotenv()
+
+LOCAL_DATA_DIR = os.getenv("LOCAL_DATA_DIR", os.path.join("data", "marts"))
+
+MART_TABLES = [
+    "australia.au_first_count_results_mart",
+    "australia.au_first_preference_results_mart",
+    "australia.au_election_result_summary",
+    "australia.au_population_mart",
+]
+
+
+@lru_cache(maxsize=1)
+def gcp_credentials():
+    """Service-account credentials from GOOGLE_APPLICATION_CREDENTIALS, else the default ones."""
+    from google.oauth2 import service_account
+    credential_file = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    if credential_file and os.path.exists(credential_file):
+        credentials = service_account.Credentials.from_service_account_file(credential_file)
+        return credentials, os.getenv("GOOGLE_PROJECT_ID") or credentials.project_id
+    import google.auth
+    return google.auth.default()
+
+
+class DataBackend(ABC):
+    name = None
+
+    @abstractmethod
+    def query(self, table_id, sql):
+        """Run `sql`, which reads from `table_id`, and return a pyarrow.Table."""
+
+    @abstractmethod
+    def read_table(self, table_id, columns, row_filter=None):
+        """Return only `columns` of the rows matching the SQL predicate `row_filter`, as a pyarrow.Table."""
+
+    @abstractmethod
+    def table_version(self, table_id):
+        """Cheap token that changes whenever `table_id` is rebuilt."""
+
+
+class BigQueryBackend(DataBackend):
+    name = "bigquery"
+
+    def __init__(self):
+        from google.cloud import bigquery
+        credentials, project_id = gcp_credentials()
+        self.credentials = credentials
+        self.client = bigquery.Client(credentials=credentials, project=project_id)
+        self._read_client = None
+
+    @property
+    def read_client(self):
+        if self._read_client is None:
+            from google.cloud import bigquery_storage
+            self._read_client = bigquery_storage.BigQueryReadClient(credentials=self.credentials)
+        return self._read_client
+
+    def query(self, table_id, sql):
+        return read_snapshot(self.client, table_id, sql)
+
+    def read_table(self, table_id, columns, row_filter=None):
+        key = f"columns={','.join(columns)};filter={row_filter or ''}"
+        return cached_snapshot(self.client, table_id, key,
+                               lambda: self.stream_table(table_id, columns, row_filter))
+
+    def table_version(self, table_id):
+        return table_version(self.client, table_id)
+
+    def storage_table_path(self, table_id):
+        parts = table_id.split(".")
+        project, dataset, table = parts if len(parts) == 3 else [self.client.project] + parts
+        return project, f"projects/{project}/datasets/{dataset}/tables/{table}"
+
+    def stream_table(self, table_id, columns, row_filter=None):
+        """Read the selection through the Storage Read API, one Arrow record batch at a time."""
+        import pyarrow as pa
+        from google.cloud.bigquery_storage import types
+        project, table_path = self.storage_table_path(table_id)
+        session = self.read_client.create_read_session(
+            parent=f"projects/{project}",
+            read_session=types.ReadSession(
+                table=table_path,
+                data_format=types.DataFormat.ARROW,
+                read_options=types.ReadSession.TableReadOptions(
+                    selected_fields=list(columns),
+                    row_restriction=row_filter or "",
+                ),
+            ),
+        )
+        schema = pa.ipc.read_schema(pa.py_buffer(session.arrow_schema.serialized_schema))
+        batches = [
+            page.to_arrow()
+            for stream in session.streams
+            for page in self.read_client.read_rows(stream.name).rows(session).pages
+        ]
+        return pa.Table.from_batches(batches, schema=schema).select(list(columns))
+
+
+class LocalParquetBackend(DataBackend):
+    name = "local"
+
+    def __init__(self, data_dir=LOCAL_DATA_DIR):
+        self.data_dir = data_dir
+
+    def table_path(self, table_id):
+        return os.path.join(self.data_dir, f"{table_id}.parquet")
+
+    def query(self, table_id, sql):
+        import polars as pl
+        path = self.table_path(table_id)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No local snapshot for {table_id} at {path}")
+        # Polars SQL has no dataset-qualified names, so register the table
+        # under a flat alias and point the query at it.
+        alias = table_id.replace(".", "__")
+        context = pl.SQLContext({alias: pl.scan_parquet(path)})
+        return context.execute(sql.replace(f"`{table_id}`", alias)).collect().to_arrow()
+
+    def read_table(self, table_id, columns, row_filter=None):
+        import polars as pl
+        frame = pl.scan_parquet(self.table_path(table_id))
+        if row_filter:
+            frame = frame.filter(pl.sql_expr(row_filter))
+        return frame.select(columns).collect().to_arrow()
+
+    def table_version(self, table_id):
+        return str(os.stat(self.table_path(table_id)).st_mtime_ns)
+
+
+def arrow_to_pandas(table):
+    """Convert to pandas keeping string columns in their Arrow buffers instead of Python str objects.
+
+    Arrow buffers are never written after loading, so pages preloaded in
+    the gunicorn master stay shared with every worker; object columns are
+    copied into a worker as soon as it touches their refcounts.
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    def arrow_strings(arrow_type):
+        if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type) or pa.types.is_string_view(arrow_type):
+            return pd.ArrowDtype(arrow_type)
+        return None
+
+    return table.to_pandas(types_mapper=arrow_strings)
+
+
+BACKENDS = {
+    BigQueryBackend.name: BigQueryBackend,
+    LocalParquetBackend.name: LocalParquetBackend,
+}
+
+
+@lru_cache(maxsize=1)
+def get_backend():
+    name = os.getenv("DATA_BACKEND", BigQueryBackend.name).lower()
+    if name not in BACKENDS:
+        raise RuntimeError(f"DATA_BACKEND must be one of {sorted(BACKENDS)}, got {name!r}")
+    return BACKENDS[name]()
+
+
+def source_version(*table_ids):
+    """Version callable for dash_app.cache.refreshing that changes when any of `table_ids` is rebuilt."""
+    return lambda: tuple(get_backend().table_version(table_id) for table_id in table_ids)
+
+
+def export_marts(data_dir=LOCAL_DATA_DIR, tables=MART_TABLES):
+    """Snapshot every mart the pages read from BigQuery into `data_dir` for the local backend."""
+    import pyarrow.parquet as pq
+    backend = BigQueryBackend()
+    os.makedirs(data_dir, exist_ok=True)
+    for table_id in tables:
+        table = backend.query(table_id, f"SELECT * FROM `{table_id}`")
+        pq.write_table(table, os.path.join(data_dir, f"{table_id}.parquet"))
+        print(f"{table_id}: {table.num_rows} rows")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["export"]:
+        sys.exit("usage: python -m dash_app.data_access export [dir]")
+    export_marts(*sys.argv[2:3])
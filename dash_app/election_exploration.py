@@ -1,5 +1,13 @@
 from dash import html, dcc
 import plotly.graph_objects as go
+try:
+    from dash_app.cache import figure_to_json
+    from dash_app.charts import stem_segments
+    from dash_app.elections import election_year
+except ModuleNotFoundError:
+    from cache import figure_to_json
+    from charts import stem_segments
+    from elections import election_year
 
 def exploration():
     return dcc.Markdown("I have been in Australia since 2007 When I immigrated, however I have never fully understood "
@@ -27,7 +35,8 @@ def analysis():
                         "against it. That's an astounding 41 percent of its leading positions lost to vote transfers.")
 
 
-def first_preference_result(dataframe):
+def first_preference_result(dataframe, year=None):
+    year = year or election_year()
     winners = dataframe[dataframe["Victorious"] == "Y"].sort_values("Counts", ascending=False).copy()
     losers = dataframe[dataframe["Victorious"] == "N"].sort_values("Counts", ascending=False).copy()
 
@@ -40,7 +49,7 @@ def first_preference_result(dataframe):
             "layout": {
                 "title": {
                     "text": (
-                        "Preferential Voting Outcomes: The 2025 House of Representatives Election"
+                        f"Preferential Voting Outcomes: The {year} House of Representatives Election"
                         "<br><sup>Number of electorates won and lost by each party "
                         "after leading on first preference count</sup>"
                     ),
@@ -54,7 +63,8 @@ def first_preference_result(dataframe):
         }
     )
 
-def lollipop_charts_election_result(dataframe):
+def lollipop_charts_election_result(dataframe, year=None):
+    year = year or election_year()
     party_colors = {
         "ALP": "#DE3533",
         "LNP": "#0047AB",
@@ -67,25 +77,25 @@ def lollipop_charts_election_result(dataframe):
     }
 
     df = dataframe.sort_values("WinCount", ascending=True)
+    colors = df["PartyAb"].map(party_colors).fillna("gray")
 
     fig = go.Figure()
 
-    # Stems and dots per party for individual colours
-    for _, row in df.iterrows():
-        color = party_colors.get(row["PartyAb"], "gray")
+    # One stem trace and one dot trace per colour, in place of two traces per party
+    for color, group in df.groupby(colors, sort=False):
         fig.add_trace(go.Scatter(
-            x=[0, row["WinCount"]],
-            y=[row["PartyAb"], row["PartyAb"]],
+            x=stem_segments([0] * len(group), group["WinCount"]),
+            y=stem_segments(group["PartyAb"], group["PartyAb"]),
             mode="lines",
             line=dict(color=color, width=2),
             showlegend=False,
         ))
         fig.add_trace(go.Scatter(
-            x=[row["WinCount"]],
-            y=[row["PartyAb"]],
+            x=group["WinCount"],
+            y=group["PartyAb"],
             mode="markers+text",
             marker=dict(size=12, color=color),
-            text=[str(row["WinCount"])],
+            text=group["WinCount"].astype(str),
             textposition="middle right",
             textfont=dict(size=11),
             showlegend=False,
@@ -112,7 +122,7 @@ def lollipop_charts_election_result(dataframe):
         title={
             "text": (
                 "Seats Won by Party"
-                "<br><sup>Total electorates won by each party in the 2025 election</sup>"
+                f"<br><sup>Total electorates won by each party in the {year} election</sup>"
             ),
             "x": 0,
             "xanchor": "left",
@@ -128,9 +138,11 @@ def lollipop_charts_election_result(dataframe):
             "title": {"text": "Party", "standoff": 10},
             "gridcolor": "#f0f0f0",
             "showgrid": True,
+            "categoryorder": "array",
+            "categoryarray": df["PartyAb"].tolist(),
         },
         margin={"l": 80, "b": 80, "t": 80},
         height=400,
     )
 
-    return dcc.Graph(figure=fig)
+    return dcc.Graph(figure=figure_to_json(fig))
@@ -0,0 +1,55 @@
+"""Party preference flow matrices from the arrays built by pipelines.election_flows.
+
+A division's matrix is its slice of the stored sparse entries; a state's
+or the nation's is the sum of its divisions' entries, built once per
+selection and cached. Rows are the party a vote started with, columns the
+finalist party it ended with.
+"""
+import os
+from functools import lru_cache
+
+FLOWS_PATH = os.getenv(
+    "ELECTION_FLOWS_PATH",
+    os.path.join(os.path.dirname(__file__), "election_map", "preference_flows.npz"),
+)
+
+
+def flows_available(path=FLOWS_PATH):
+    return os.path.exists(path)
+
+
+@lru_cache(maxsize=1)
+def load_flows(path=FLOWS_PATH):
+    import numpy as np
+    with np.load(path) as arrays:
+        return {name: arrays[name] for name in arrays.files}
+
+
+def entry_range(flows, state=None, division=None):
+    """[start, stop) of the entries of a division, of every division in a state, or of all of them."""
+    offsets = flows["division_entry_offsets"]
+    if division is not None:
+        return int(offsets[division]), int(offsets[division + 1])
+    if state is not None:
+        divisions = flows["state_division_offsets"]
+        return int(offsets[divisions[state]]), int(offsets[divisions[state + 1]])
+    return 0, len(flows["votes"])
+
+
+@lru_cache(maxsize=None)
+def flow_matrix(state=None, division=None, transferred_only=False):
+    """Votes from each first-preference party (rows) to each finalist party (columns).
+
+    With transferred_only, finalists' own first preferences are left out so
+    only votes that moved on preferences remain.
+    """
+    import numpy as np
+    flows = load_flows()
+    start, stop = entry_range(flows, state, division)
+    keep = slice(start, stop)
+    weights = flows["votes"][keep]
+    if transferred_only:
+        weights = np.where(flows["transferred"][keep], weights, 0)
+    parties = len(flows["parties"])
+    cells = flows["from_party"][keep].astype(np.intp) * parties + flows["to_party"][keep]
+    return np.bincount(cells, weights=weights, minlength=parties * parties).astype(np.int64).reshape(parties, parties)
@@ -0,0 +1,71 @@
+"""Drill-down queries over the first-preference pyramid built by pipelines.election_pyramid.
+
+Nodes are addressed by their row in the pyramid's arrays: a state, a
+division and a polling place index. Every query is an array slice, so the
+cost does not grow with the number of polling places.
+"""
+import os
+from functools import lru_cache
+
+PYRAMID_PATH = os.getenv(
+    "ELECTION_PYRAMID_PATH",
+    os.path.join(os.path.dirname(__file__), "election_map", "first_preferences_pyramid.npz"),
+)
+
+# Array holding the names at each level below the national total.
+LEVEL_NAMES = {"state": "states", "division": "divisions", "place": "polling_places"}
+
+
+def pyramid_available(path=PYRAMID_PATH):
+    return os.path.exists(path)
+
+
+@lru_cache(maxsize=1)
+def load_pyramid(path=PYRAMID_PATH):
+    import numpy as np
+    with np.load(path) as arrays:
+        return {name: arrays[name] for name in arrays.files}
+
+
+def child_range(pyramid, state=None, division=None):
+    """The level below the selected node and its [start, stop) rows there."""
+    if division is not None:
+        offsets = pyramid["division_place_offsets"]
+        return "place", int(offsets[division]), int(offsets[division + 1])
+    if state is not None:
+        offsets = pyramid["state_division_offsets"]
+        return "division", int(offsets[state]), int(offsets[state + 1])
+    return "state", 0, len(pyramid["states"])
+
+
+def child_options(pyramid, state=None, division=None):
+    """Dropdown options for the children of the selected node."""
+    level, start, stop = child_range(pyramid, state, division)
+    names = pyramid[LEVEL_NAMES[level]][start:stop]
+    return [{"label": str(name), "value": start + i} for i, name in enumerate(names)]
+
+
+def drill_down(pyramid, state=None, division=None, place=None):
+    """First preferences at the deepest selected node, and per child when it has children."""
+    if place is not None:
+        return {
+            "name": str(pyramid["polling_places"][place]),
+            "votes": pyramid["place_votes"][place],
+            "informal": int(pyramid["place_informal"][place]),
+            "child_level": None, "children": [], "child_votes": None,
+        }
+    level, start, stop = child_range(pyramid, state, division)
+    if division is not None:
+        name, votes, informal = pyramid["divisions"][division], pyramid["division_votes"][division], pyramid["division_informal"][division]
+    elif state is not None:
+        name, votes, informal = pyramid["states"][state], pyramid["state_votes"][state], pyramid["state_informal"][state]
+    else:
+        name, votes, informal = "Australia", pyramid["national_votes"], pyramid["national_informal"]
+    return {
+        "name": str(name),
+        "votes": votes,
+        "informal": int(informal),
+        "child_level": level,
+        "children": pyramid[LEVEL_NAMES[level]][start:stop],
+        "child_votes": pyramid[f"{level}_votes"][start:stop],
+    }
@@ -0,0 +1,85 @@
+"""Two-party-preferred swing scenarios over the arrays built by pipelines.election_tpp.
+
+A swing is in percentage points of the two-party-preferred vote towards
+Labor. It is added to Labor's share of each vote type in every division,
+clipped to [0, 100], and the division goes to whichever side then has
+more than half. A sweep of any number of swings - one for all divisions,
+one per state, or one per division and vote type - is a single
+broadcast over a (swings, divisions, vote_types) array, quick enough to
+recompute on every slider move. Seats are the notional Labor v Coalition
+count over all divisions, crossbench seats included.
+"""
+import os
+from functools import lru_cache
+
+TPP_PATH = os.getenv(
+    "ELECTION_TPP_PATH",
+    os.path.join(os.path.dirname(__file__), "election_map", "tpp_by_division.npz"),
+)
+
+# As drawn in election_exploration.lollipop_charts_election_result.
+MAJORITY = 75
+SWEEP_RANGE = (-10.0, 10.0)
+SWEEP_POINTS = 2001
+
+
+def tpp_available(path=TPP_PATH):
+    return os.path.exists(path)
+
+
+@lru_cache(maxsize=1)
+def load_tpp(path=TPP_PATH):
+    import numpy as np
+    with np.load(path) as arrays:
+        tpp = {name: arrays[name] for name in arrays.files}
+    tpp["type_votes"] = tpp["alp_votes"] + tpp["coalition_votes"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tpp["type_share"] = np.nan_to_num(100 * tpp["alp_votes"] / tpp["type_votes"])
+    tpp["total_votes"] = tpp["type_votes"].sum(axis=1)
+    return tpp
+
+
+def sweep(low=SWEEP_RANGE[0], high=SWEEP_RANGE[1], points=SWEEP_POINTS):
+    import numpy as np
+    return np.linspace(low, high, points)
+
+
+def division_swings(tpp, swings, state=None):
+    """(swings, divisions) array from uniform swings (swings,) or state swings (swings, states).
+
+    With `state`, uniform swings apply to that state's divisions only.
+    """
+    import numpy as np
+    swings = np.asarray(swings, dtype=float)
+    if swings.ndim == 2:
+        return swings[:, tpp["division_state"]]
+    if state is None:
+        return np.broadcast_to(swings[:, None], (len(swings), len(tpp["divisions"])))
+    return np.where(tpp["division_state"] == state, swings[:, None], 0.0)
+
+
+def alp_share(tpp, swings):
+    """Labor's two-party-preferred percentage per division after each swing.
+
+    swings broadcasts against (swings, divisions, vote_types); a
+    (swings, divisions) array is applied to every vote type.
+    """
+    import numpy as np
+    swings = np.asarray(swings, dtype=float)
+    if swings.ndim == 2:
+        swings = swings[..., None]
+    shares = np.clip(tpp["type_share"] + swings, 0.0, 100.0)
+    return np.einsum("sdv,dv->sd", shares, tpp["type_votes"].astype(float)) / tpp["total_votes"]
+
+
+def seat_counts(tpp, swings):
+    """Labor and Coalition seats after each swing, as two (swings,) int arrays."""
+    alp = (alp_share(tpp, swings) > 50).sum(axis=1)
+    return alp, len(tpp["divisions"]) - alp
+
+
+def majority_swing(tpp, swings, seats):
+    """Smallest swing in a sorted sweep at which `seats` reaches MAJORITY, or None."""
+    import numpy as np
+    reached = np.flatnonzero(seats >= MAJORITY)
+    return float(swings[reached[0]]) if reached.size else None
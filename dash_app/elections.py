@@ -0,0 +1,34 @@
+"""Federal elections known to the app, by AEC event ID.
+
+AEC downloads and the election store are keyed by event ID (the 31496 in
+HouseDopByPPDownload-31496-*.csv); titles use the election year.
+ELECTION_EVENT_ID selects the election the pages show.
+"""
+import os
+
+EVENT_YEARS = {
+    17496: 2013,
+    20499: 2016,
+    24310: 2019,
+    27966: 2022,
+    31496: 2025,
+}
+
+# The result in a sentence, opening the election page's narrative.
+EVENT_OUTCOMES = {
+    31496: "Labor has retained government in the {year} federal election, with Anthony Albanese securing a "
+           "second term as Prime Minister.",
+}
+
+DEFAULT_EVENT_ID = int(os.getenv("ELECTION_EVENT_ID", "31496"))
+
+
+def election_year(event_id=DEFAULT_EVENT_ID):
+    if event_id not in EVENT_YEARS:
+        raise KeyError(f"Unknown AEC event ID {event_id}; add it to EVENT_YEARS")
+    return EVENT_YEARS[event_id]
+
+
+def election_outcome(event_id=DEFAULT_EVENT_ID):
+    year = election_year(event_id)
+    return EVENT_OUTCOMES.get(event_id, "Australians voted in the {year} federal election.").format(year=year)
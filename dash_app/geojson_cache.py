@@ -0,0 +1,245 @@
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+try:
+    from dash_app.build_map_levels import STATE_ABBREVIATIONS
+except ModuleNotFoundError:
+    from build_map_levels import STATE_ABBREVIATIONS
+
+# The division GeoJSON in Cloud Storage is downloaded once per object
+# generation to local disk, shared by every gunicorn worker, and split on
+# the way in into one .npz per state: division names plus every ring's
+# coordinates in one float array, with offsets marking where each feature,
+# polygon and ring starts. A worker keeps only those arrays for the states
+# it draws - a fraction of the memory of the parsed GeoJSON - and expands
+# them into GeoJSON features when a figure is built. It checks the object's
+# metadata (not its contents) to notice a new upload, which is fetched in a
+# background thread while the cached copy keeps serving.
+GEOJSON_CACHE_DIR = os.getenv("GEOJSON_CACHE_DIR", os.path.join(tempfile.gettempdir(), "australia-geojson"))
+REFRESH_SECONDS = int(os.getenv("GEOJSON_REFRESH_SECONDS", "3600"))
+NAME_PROPERTY = "CED_NAME25"
+# Bumped when the per-state files change shape, so old cache directories are not read.
+CACHE_FORMAT = 2
+GEOMETRY_TYPES = [None, "Polygon", "MultiPolygon"]
+
+
+def blob_generation(blob):
+    """Cheap metadata lookup that changes whenever the object is replaced."""
+    blob.reload()
+    if blob.generation is not None:
+        return str(blob.generation)
+    return blob.etag.strip('"')
+
+
+def split_by_state(collection):
+    features_by_state = {}
+    for feature in collection["features"]:
+        state = STATE_ABBREVIATIONS.get(feature["properties"]["STE_NAME21"])
+        features_by_state.setdefault(state, []).append(feature)
+    return features_by_state
+
+
+def pack_features(features):
+    """Flat arrays of features' names and Polygon/MultiPolygon geometry.
+
+    feature_polygons, polygon_rings and ring_points hold each feature's,
+    polygon's and ring's start in the level below, plus the end of the last.
+    """
+    import numpy as np
+    names, types, points = [], [], []
+    feature_polygons, polygon_rings, ring_points = [0], [0], [0]
+    for feature in features:
+        geometry = feature["geometry"]
+        names.append(feature["properties"][NAME_PROPERTY])
+        types.append(GEOMETRY_TYPES.index(geometry and geometry["type"]))
+        polygons = [] if geometry is None else [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+        for polygon in polygons:
+            for ring in polygon:
+                points.extend(ring)
+                ring_points.append(len(points))
+            polygon_rings.append(len(ring_points) - 1)
+        feature_polygons.append(len(polygon_rings) - 1)
+    return {
+        "names": np.array(names, dtype=str),
+        "types": np.array(types, dtype=np.int8),
+        "feature_polygons": np.array(feature_polygons, dtype=np.int32),
+        "polygon_rings": np.array(polygon_rings, dtype=np.int32),
+        "ring_points": np.array(ring_points, dtype=np.int64),
+        "coordinates": np.array(points, dtype=float) if points else np.empty((0, 2)),
+    }
+
+
+def unpack_features(arrays):
+    """GeoJSON features, properties limited to NAME_PROPERTY, from pack_features arrays."""
+    coordinates = arrays["coordinates"].tolist()
+    feature_polygons, polygon_rings, ring_points = (
+        arrays[name].tolist() for name in ("feature_polygons", "polygon_rings", "ring_points"))
+    features = []
+    for i, (name, geometry_type) in enumerate(zip(arrays["names"].tolist(), arrays["types"].tolist())):
+        polygons = [
+            [coordinates[ring_points[r]:ring_points[r + 1]] for r in range(polygon_rings[p], polygon_rings[p + 1])]
+            for p in range(feature_polygons[i], feature_polygons[i + 1])
+        ]
+        geometry_type = GEOMETRY_TYPES[geometry_type]
+        geometry = None if geometry_type is None else {
+            "type": geometry_type, "coordinates": polygons[0] if geometry_type == "Polygon" else polygons}
+        features.append({"type": "Feature", "properties": {NAME_PROPERTY: name}, "geometry": geometry})
+    return features
+
+
+def write_states(source_path, directory):
+    """Split the downloaded GeoJSON at source_path into per-state files and move them into place at once."""
+    import numpy as np
+    with open(source_path) as f:
+        features_by_state = split_by_state(json.load(f))
+    tmp_dir = f"{directory}.{os.getpid()}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    for state, features in features_by_state.items():
+        np.savez(os.path.join(tmp_dir, f"{state}.npz"), **pack_features(features))
+    os.rename(tmp_dir, directory)
+
+
+class GeoJsonBlob:
+    """Per-state features of a GeoJSON object in Cloud Storage, cached on local disk by generation.
+
+    `client_factory` returns a google.cloud.storage.Client (or anything
+    with the same bucket().blob() interface); it is only called when the
+    metadata is checked or the object downloaded.
+    """
+
+    def __init__(self, bucket_name, blob_path, client_factory, cache_dir=GEOJSON_CACHE_DIR,
+                 refresh_seconds=REFRESH_SECONDS):
+        self.bucket_name = bucket_name
+        self.blob_path = blob_path
+        self.client_factory = client_factory
+        self.cache_dir = cache_dir
+        self.refresh_seconds = refresh_seconds
+        self.on_swap = []
+        self._directory = None
+        self._arrays = {}
+        self._checked_at = None
+        self._reset_process_state()
+
+    def _reset_process_state(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    @property
+    def configured(self):
+        return bool(self.bucket_name and self.blob_path)
+
+    @property
+    def loaded(self):
+        """True once features have been read from the cached object in this process or the one it forked from."""
+        return self._directory is not None
+
+    def prefix(self):
+        digest = hashlib.sha1(f"{self.bucket_name}/{self.blob_path}/{CACHE_FORMAT}".encode("utf-8")).hexdigest()[:10]
+        return os.path.join(self.cache_dir, f"{os.path.basename(self.blob_path)}-{digest}")
+
+    def cached_directories(self):
+        return sorted((path for path in glob.glob(f"{self.prefix()}-*") if os.path.isdir(path) and not path.endswith(".tmp")),
+                      key=os.path.getmtime)
+
+    def blob(self):
+        return self.client_factory().bucket(self.bucket_name).blob(self.blob_path)
+
+    def fetch(self, blob, generation):
+        """Directory of per-state files for `generation`, downloading it unless another worker already has."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        prefix = self.prefix()
+        directory = f"{prefix}-{generation}"
+        if not os.path.exists(directory):
+            with open(f"{prefix}.lock", "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    if not os.path.exists(directory):
+                        download_path = f"{directory}.{os.getpid()}.download"
+                        try:
+                            blob.download_to_filename(download_path)
+                            write_states(download_path, directory)
+                        finally:
+                            if os.path.exists(download_path):
+                                os.remove(download_path)
+                        # The previous generation stays for workers that have not swapped yet.
+                        for stale in self.cached_directories()[:-2]:
+                            shutil.rmtree(stale, ignore_errors=True)
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        return directory
+
+    def swap(self, directory):
+        with self._lock:
+            if directory == self._directory:
+                return
+            self._directory = directory
+            self._arrays = {}
+        for callback in self.on_swap:
+            callback()
+
+    def refresh(self):
+        """Check the object's generation and move to it, downloading if it is not on disk yet."""
+        blob = self.blob()
+        self.swap(self.fetch(blob, blob_generation(blob)))
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def ensure_current(self):
+        """Start up on first use in a process, and start a background refresh once the last check is old."""
+        if self._pid != os.getpid():
+            # A forked worker inherits neither the refresh thread nor the lock's owner.
+            self._reset_process_state()
+        with self._lock:
+            now = time.monotonic()
+            due = not self._refreshing and (self._checked_at is None or now - self._checked_at >= self.refresh_seconds)
+            if due:
+                self._checked_at = now
+        if self._directory is None:
+            cached = self.cached_directories()
+            if not cached:
+                # Nothing to serve meanwhile: the first worker downloads in the foreground.
+                self.refresh()
+                return
+            self.swap(cached[-1])
+        if due:
+            with self._lock:
+                if self._refreshing:
+                    return
+                self._refreshing = True
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    def state_arrays(self, state):
+        """pack_features arrays of one state's divisions, read from disk once per generation; None if it has none."""
+        import numpy as np
+        self.ensure_current()
+        with self._lock:
+            directory = self._directory
+            if state in self._arrays:
+                return self._arrays[state]
+        path = os.path.join(directory, f"{state}.npz")
+        arrays = None
+        if os.path.exists(path):
+            with np.load(path) as f:
+                arrays = {name: f[name] for name in f.files}
+        with self._lock:
+            if directory == self._directory:
+                self._arrays[state] = arrays
+        return arrays
+
+    def features(self, state):
+        """GeoJSON features of one state's divisions, properties limited to NAME_PROPERTY."""
+        arrays = self.state_arrays(state)
+        return unpack_features(arrays) if arrays is not None else []
@@ -0,0 +1,33 @@
+"""gunicorn settings for dash_app.main:server.
+
+    gunicorn -c dash_app/gunicorn.conf.py dash_app.main:server
+
+PRELOAD_DATA=true imports the app, and with it all page data, once in the
+master before the workers are forked (see dash_app.main.preload_pages).
+Each worker logs its memory after it has served its first request;
+with DEBUG_ENDPOINTS=1, GET /_memory reports the master and every worker
+at any time.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+timeout = 120
+preload_app = os.getenv("PRELOAD_DATA", "false").lower() == "true"
+
+
+def post_fork(server, worker):
+    worker.requests_served = 0
+
+
+def post_request(worker, req, environ, resp):
+    worker.requests_served += 1
+    if worker.requests_served == 1:
+        try:
+            from dash_app.memory import process_memory
+        except ModuleNotFoundError:
+            from memory import process_memory
+        usage = process_memory(worker.pid)
+        worker.log.info(
+            "worker %s memory after first request (preload_app=%s): rss=%s kB pss=%s kB private_dirty=%s kB",
+            worker.pid, preload_app, usage.get("rss_kb"), usage.get("pss_kb"), usage.get("private_dirty_kb"),
+        )
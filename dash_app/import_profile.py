@@ -0,0 +1,96 @@
+"""Import-time profile of the Dash app, so cold-start regressions are visible.
+
+    python -m dash_app.import_profile [--top N] [--json] [--budget-ms MS]
+
+Imports dash_app.main in a fresh interpreter under `python -X importtime`
+and reports the total, the slowest modules by cumulative import cost, and
+any of the deliberately deferred heavy modules that were pulled in at
+startup anyway. With --budget-ms it exits non-zero when the total import
+time is over budget.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+
+# Only needed once data is loaded or a figure is built; importing any of
+# these at startup adds to Cloud Run cold-start latency.
+DEFERRED_MODULES = [
+    "numpy",
+    "pandas",
+    "polars",
+    "pyarrow",
+    "plotly.express",
+    "statsmodels",
+    "google.cloud.bigquery",
+    "google.cloud.storage",
+]
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile(module="dash_app.main"):
+    """Run the import in a subprocess and return one entry per imported module."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                "module": name,
+                "depth": len(indent) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            })
+    return entries
+
+
+def report(entries, module="dash_app.main", top=25):
+    total_ms = sum(e["cumulative_ms"] for e in entries if e["depth"] == 0)
+    imported = {e["module"] for e in entries}
+    slowest = sorted((e for e in entries if e["depth"] <= 1), key=lambda e: e["cumulative_ms"], reverse=True)
+    return {
+        "module": module,
+        "total_ms": round(total_ms, 1),
+        "modules_imported": len(entries),
+        "deferred_modules_imported": [name for name in DEFERRED_MODULES if name in imported],
+        "slowest": [
+            {"module": e["module"], "cumulative_ms": round(e["cumulative_ms"], 1), "self_ms": round(e["self_ms"], 1)}
+            for e in slowest[:top]
+        ],
+    }
+
+
+def print_report(summary):
+    print(f"import {summary['module']}: {summary['total_ms']:.1f} ms across {summary['modules_imported']} modules")
+    if summary["deferred_modules_imported"]:
+        print(f"deferred modules imported at startup: {', '.join(summary['deferred_modules_imported'])}")
+    print(f"\n{'cumulative ms':>14} {'self ms':>9}  module")
+    for e in summary["slowest"]:
+        print(f"{e['cumulative_ms']:>14.1f} {e['self_ms']:>9.1f}  {e['module']}")
+
+
+def main(argv):
+    top = int(argv[argv.index("--top") + 1]) if "--top" in argv else 25
+    budget_ms = float(argv[argv.index("--budget-ms") + 1]) if "--budget-ms" in argv else None
+    summary = report(profile(), top=top)
+    if "--json" in argv:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary)
+    if budget_ms is not None and summary["total_ms"] > budget_ms:
+        print(f"import time {summary['total_ms']:.1f} ms is over the {budget_ms:.0f} ms budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
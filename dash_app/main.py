@@ -1,6 +1,25 @@
+import gc
 import os
+import sys
 from dash import Dash, dcc, html, page_container, page_registry
 import dash_bootstrap_components as dbc
+from flask import Response, abort, jsonify
+try:
+    from dash_app.cache import CACHES, FIGURE_ROUTES
+except ModuleNotFoundError:
+    from cache import CACHES, FIGURE_ROUTES
+try:
+    from dash_app.data_access import get_backend
+except ModuleNotFoundError:
+    from data_access import get_backend
+try:
+    from dash_app.memory import memory_report
+except ModuleNotFoundError:
+    from memory import memory_report
+try:
+    from dash_app import compression
+except ModuleNotFoundError:
+    import compression
 
 app = Dash(__name__, use_pages=True, pages_folder="pages", suppress_callback_exceptions=True,
            external_stylesheets=[dbc.themes.MINTY])
@@ -117,6 +136,7 @@ app.layout = html.Div([
 ], style={"display": "flex", "flexDirection": "column", "minHeight": "100vh"})
 
 server = app.server
+compression.install(server)
 
 
 @server.after_request
@@ -130,6 +150,55 @@ def set_security_headers(response):
     return response
 
 
+def preload_pages():
+    """Build every page's layout, and with it all of its data, in this process.
+
+    Run in the gunicorn master with PRELOAD_DATA=true so the workers forked
+    from it share the loaded data copy-on-write instead of each fetching its
+    own copy on its first request.
+    """
+    for page in page_registry.values():
+        layout = getattr(sys.modules[page["module"]], "layout", None)
+        if callable(layout):
+            layout()
+    # Keep the backend's clients out of the fork: each worker opens its own
+    # connections on first use. The loaded data stays in the loaders' caches.
+    get_backend.cache_clear()
+    # Move everything loaded so far out of the collector's reach so garbage
+    # collection in a worker does not write to, and so copy, the shared pages.
+    gc.freeze()
+
+
+if os.environ.get("PRELOAD_DATA", "false").lower() == "true":
+    preload_pages()
+
+
+@server.route(f"{app.config.routes_pathname_prefix}_figures/<name>/<key>")
+def figure(name, key):
+    """A cached figure as the JSON bytes it was encoded to once, compressed and ETag-validated."""
+    entry = FIGURE_ROUTES[name](key) if name in FIGURE_ROUTES else None
+    if entry is None:
+        abort(404)
+    response = Response(mimetype="application/json")
+    # Revalidated on every use: a new data version gives the figure a new ETag.
+    response.cache_control.no_cache = True
+    return compression.encoded_response(response, entry["body"], entry["digest"])
+
+
+# Diagnostic routes expose process and cache internals, so they are off
+# unless DEBUG_ENDPOINTS is set.
+DEBUG_ENDPOINTS = os.getenv("DEBUG_ENDPOINTS", "false").lower() in ("1", "true")
+
+if DEBUG_ENDPOINTS:
+    @server.route("/_memory")
+    def memory():
+        return jsonify(memory_report())
+
+    @server.route("/_cache-stats")
+    def cache_stats():
+        return jsonify([cache.stats() for cache in CACHES])
+
+
 if __name__ == '__main__':
     app.run(debug=os.environ.get("DASH_DEBUG", "true").lower() == "true",
             port=int(os.environ.get("PORT", 8050)))
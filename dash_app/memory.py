@@ -0,0 +1,86 @@
+"""Per-process memory of the gunicorn master and its workers, read from /proc.
+
+    python -m dash_app.memory [master_pid]
+
+RSS counts every resident page a process maps, so pages shared
+copy-on-write with the master are counted again in each worker. PSS splits
+each shared page between the processes mapping it, which makes the sum of
+PSS over master and workers the real footprint; compare it with and
+without PRELOAD_DATA. Private dirty pages are the ones a worker no longer
+shares.
+"""
+import os
+import sys
+
+SMAPS_FIELDS = {
+    "Rss": "rss_kb",
+    "Pss": "pss_kb",
+    "Shared_Clean": "shared_clean_kb",
+    "Shared_Dirty": "shared_dirty_kb",
+    "Private_Clean": "private_clean_kb",
+    "Private_Dirty": "private_dirty_kb",
+}
+
+
+def process_memory(pid):
+    """Memory counters in kB for `pid` from smaps_rollup, or just RSS from status on older kernels."""
+    usage = {"pid": pid}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                field, _, value = line.partition(":")
+                if field in SMAPS_FIELDS:
+                    usage[SMAPS_FIELDS[field]] = int(value.split()[0])
+    except FileNotFoundError:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    usage["rss_kb"] = int(line.split()[1])
+    return usage
+
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name is in parentheses and may contain spaces.
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def memory_report(master_pid=None):
+    """Memory of the master (the parent of this worker by default) and each of its workers."""
+    master_pid = master_pid or os.getppid()
+    workers = []
+    for pid in child_pids(master_pid):
+        try:
+            workers.append(process_memory(pid))
+        except OSError:
+            pass  # exited between listing and reading
+    master = process_memory(master_pid)
+    return {
+        "master": master,
+        "workers": workers,
+        "total_pss_kb": sum(p.get("pss_kb", 0) for p in [master] + workers) or None,
+    }
+
+
+def print_report(report):
+    columns = list(SMAPS_FIELDS.values())
+    print(f"{'process':>16} " + " ".join(f"{c[:-3]:>14}" for c in columns))
+    rows = [("master", report["master"])] + [("worker", w) for w in report["workers"]]
+    for role, usage in rows:
+        print(f"{role + ' ' + str(usage['pid']):>16} " + " ".join(f"{usage.get(c, 0):>14,}" for c in columns))
+    if report["total_pss_kb"]:
+        print(f"\ntotal PSS: {report['total_pss_kb'] / 1024:,.1f} MiB")
+
+
+if __name__ == "__main__":
+    print_report(memory_report(int(sys.argv[1]) if len(sys.argv) > 1 else os.getpid()))
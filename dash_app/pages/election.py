@@ -1,48 +1,78 @@
 import dash
-from dash import html, dcc, callback, Output, Input
-import plotly.express as px
+import dash_bootstrap_components as dbc
+from dash import html, dcc, callback, clientside_callback, Output, Input, State
 from dotenv import load_dotenv
 import os
 from functools import lru_cache
-from google.cloud import bigquery, storage
-from google.oauth2 import service_account
 import json
 try:
     from dash_app.election_exploration import exploration, analysis, first_preference_result, lollipop_charts_election_result
 except ModuleNotFoundError:
     from election_exploration import exploration, analysis, first_preference_result, lollipop_charts_election_result
+try:
+    from dash_app.data_access import arrow_to_pandas, gcp_credentials, get_backend, source_version
+except ModuleNotFoundError:
+    from data_access import arrow_to_pandas, gcp_credentials, get_backend, source_version
+try:
+    from dash_app.build_map_levels import MAP_LEVELS_DIR, STATE_ABBREVIATIONS, map_level
+except ModuleNotFoundError:
+    from build_map_levels import MAP_LEVELS_DIR, STATE_ABBREVIATIONS, map_level
+try:
+    from dash_app.cache import FIGURE_ROUTES, VersionedCache, encode_figure, figure_to_json, refreshing
+except ModuleNotFoundError:
+    from cache import FIGURE_ROUTES, VersionedCache, encode_figure, figure_to_json, refreshing
+try:
+    from dash_app.geojson_cache import GeoJsonBlob
+except ModuleNotFoundError:
+    from geojson_cache import GeoJsonBlob
+try:
+    from dash_app.elections import election_outcome, election_year
+except ModuleNotFoundError:
+    from elections import election_outcome, election_year
+try:
+    from dash_app.election_pyramid import child_options, drill_down, load_pyramid, pyramid_available
+except ModuleNotFoundError:
+    from election_pyramid import child_options, drill_down, load_pyramid, pyramid_available
+try:
+    from dash_app.election_flows import flow_matrix, flows_available, load_flows
+except ModuleNotFoundError:
+    from election_flows import flow_matrix, flows_available, load_flows
+try:
+    from dash_app import election_swing
+except ModuleNotFoundError:
+    import election_swing
 
 dash.register_page(__name__, path="/election", name="Election Analysis")
 
 load_dotenv()
 
-credential_file = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-if credential_file and os.path.exists(credential_file):
-    credentials = service_account.Credentials.from_service_account_file(credential_file)
-    project_id = os.getenv("GOOGLE_PROJECT_ID")
-else:
-    import google.auth
-    credentials, project_id = google.auth.default()
+# "server" renders each state's map once per data version and the browser
+# fetches it pre-encoded from /_figures/election-map/<state>; "client"
+# ships every state's winners and geometries once in a dcc.Store and
+# switches states in the browser without a request.
+MAP_MODE = os.getenv("ELECTION_MAP_MODE", "server").lower()
 
-client = bigquery.Client(credentials=credentials, project=project_id)
+# Only the columns the map draws, read straight into Polars from Arrow
+MAP_COLUMNS = ["StateAb", "DivisionNm", "PartyNm", "GivenNm", "Surname", "Victorious"]
 
 
-@lru_cache(maxsize=1)
+@refreshing("election_results", version=source_version("australia.au_first_count_results_mart"))
 def get_election_results():
-    sql = "SELECT * FROM `australia.au_first_count_results_mart` WHERE Victorious = 'Y'"
-    return client.query(sql).result().to_dataframe()
+    import polars as pl
+    table = get_backend().read_table("australia.au_first_count_results_mart", MAP_COLUMNS, "Victorious = 'Y'")
+    return pl.from_arrow(table)
 
 
-@lru_cache(maxsize=1)
+@refreshing("first_preferences", version=source_version("australia.au_first_preference_results_mart"))
 def get_first_preferences():
     sql = "SELECT * FROM `australia.au_first_preference_results_mart`"
-    return client.query(sql).result().to_dataframe()
+    return arrow_to_pandas(get_backend().query("australia.au_first_preference_results_mart", sql))
 
 
-@lru_cache(maxsize=1)
+@refreshing("election_result_summary", version=source_version("australia.au_election_result_summary"))
 def get_election_result_summary():
     sql = "SELECT * FROM `australia.au_election_result_summary`"
-    return client.query(sql).result().to_dataframe()
+    return arrow_to_pandas(get_backend().query("australia.au_election_result_summary", sql))
 
 
 # Normalise party names so colours are consistent across all states
@@ -64,28 +94,81 @@ def normalise_party(name):
     return name
 
 
-def load_geojson():
-    local_path = os.path.join(os.path.dirname(__file__), "..", "election_map", "cec_districts_map.geojson")
-    if os.path.exists(local_path):
-        with open(local_path) as f:
-            return json.load(f)
-    bucket_name = os.getenv("GCS_BUCKET")
-    blob_path = os.getenv("GCS_GEOJSON_PATH")
-    if not bucket_name or not blob_path:
-        raise RuntimeError("GCS_BUCKET and GCS_GEOJSON_PATH environment variables must be set")
-    blob = storage.Client(credentials=credentials, project=project_id).bucket(bucket_name).blob(blob_path)
-    return json.loads(blob.download_as_text())
+GEOJSON_PATH = os.getenv("ELECTION_GEOJSON_PATH",
+                         os.path.join(os.path.dirname(__file__), "..", "election_map", "cec_districts_map.geojson"))
+
+
+def storage_client():
+    from google.cloud import storage
+    credentials, project_id = gcp_credentials()
+    return storage.Client(credentials=credentials, project=project_id)
+
+
+district_geojson = GeoJsonBlob(os.getenv("GCS_BUCKET"), os.getenv("GCS_GEOJSON_PATH"), storage_client)
 
 
 @lru_cache(maxsize=1)
+def load_features_by_state():
+    """Fallback index over the full-resolution local GeoJSON when no map levels are built."""
+    features_by_state = {}
+    with open(GEOJSON_PATH) as f:
+        for feature in json.load(f)["features"]:
+            state = STATE_ABBREVIATIONS.get(feature["properties"]["STE_NAME21"])
+            features_by_state.setdefault(state, []).append(feature)
+    return features_by_state
+
+
+def load_fallback_features(state):
+    """Full-resolution features of one state, from the local GeoJSON or the disk-cached GCS copy."""
+    if os.path.exists(GEOJSON_PATH):
+        return load_features_by_state().get(state, [])
+    if not district_geojson.configured:
+        raise RuntimeError("GCS_BUCKET and GCS_GEOJSON_PATH environment variables must be set")
+    return district_geojson.features(state)
+
+
+@lru_cache(maxsize=None)
+def load_level_features(state, level):
+    """Features of one state from the built map levels, or None if that level is not built."""
+    path = os.path.join(MAP_LEVELS_DIR, f"z{level}", f"{state}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)["features"]
+
+
+def load_state_features(state, level):
+    """Division features for one state at one simplification level, keyed by division name.
+
+    The fallback features are not kept: the figures built from them are,
+    and the GCS copy holds its own compact arrays.
+    """
+    features = load_level_features(state, level)
+    if features is None:
+        features = load_fallback_features(state)
+    return {f["properties"]["CED_NAME25"]: f for f in features}
+
+
+def check_district_geojson():
+    """Notice a new GeoJSON upload on the request path, once the map has drawn from the GCS copy."""
+    if district_geojson.loaded:
+        district_geojson.ensure_current()
+
+
+@refreshing("election_data", ttl=None, depends_on=[get_election_results, get_first_preferences, get_election_result_summary])
 def load_all_data():
-    """Lazy-load all data on first request so gunicorn can start immediately."""
+    """Load all page data on first use, or in the gunicorn master when PRELOAD_DATA is set.
+
+    Rebuilt in the background whenever one of the loaders above picks up a
+    new dbt run; the figure and layout caches keyed on it follow.
+    """
+    import polars as pl
     election_result_df = get_election_results()
     first_preferences = get_first_preferences()
     election_result_summary = get_election_result_summary()
-    election_result_df["PartyNm"] = election_result_df["PartyNm"].apply(normalise_party)
-    geojson_data = load_geojson()
-    return election_result_df, first_preferences, election_result_summary, geojson_data
+    party_names = {name: normalise_party(name) for name in election_result_df["PartyNm"].unique()}
+    election_result_df = election_result_df.with_columns(pl.col("PartyNm").replace(party_names))
+    return election_result_df, first_preferences, election_result_summary
 
 
 # Define party colors (adjust party names to match your data)
@@ -112,12 +195,35 @@ state_centers = {
 }
 
 
+map_figures = VersionedCache("election_map")
+
+
+def warm_map_figures():
+    """Build every state's map figure for the current data so requests only read the cache."""
+    data = load_all_data()
+    states = sorted(data[0]["StateAb"].unique())
+    map_figures.warm(data, states, lambda state: encode_figure(build_map_figure(data[0], state)))
+
+
+page_layouts = VersionedCache("election_layout")
+
+# A new GeoJSON upload changes the fallback geometry without a new data version.
+district_geojson.on_swap += [map_figures.clear, page_layouts.clear]
+
+
 def layout():
-    election_result_df, first_preferences, election_result_summary, _ = load_all_data()
+    check_district_geojson()
+    data = load_all_data()
+    if MAP_MODE != "client":
+        warm_map_figures()
+    return page_layouts.get(data, "layout", lambda: build_layout(*data))
+
+
+def build_layout(election_result_df, first_preferences, election_result_summary):
     states = sorted(election_result_df["StateAb"].unique())
     return html.Div([
-        html.H2(children="Australian Election (2025)"),
-        html.P("Labor has retained government in the 2025 federal election, with Anthony Albanese securing a second term as Prime Minister. But what does the data reveal about how Australians voted? In this analysis, we dig into the results to identify patterns across electorates. Explore the interactive map below to see which party won each seat — select a state from the dropdown to focus on the region that interests you."),
+        html.H2(children=f"Australian Election ({election_year()})"),
+        html.P(f"{election_outcome()} But what does the data reveal about how Australians voted? In this analysis, we dig into the results to identify patterns across electorates. Explore the interactive map below to see which party won each seat — select a state from the dropdown to focus on the region that interests you."),
         html.Label("Select State:"),
         dcc.Dropdown(
             id="state-dropdown",
@@ -126,39 +232,250 @@ def layout():
             clearable=False
         ),
         dcc.Graph(id="election-map", style={'height': '700px'}),
+        dcc.Store(id="election-map-store", data=build_map_store(election_result_df)) if MAP_MODE == "client" else None,
         html.P("Labor's landslide victory is starkly evident in the seat distribution. With 98 seats, the ALP holds a comfortable majority well beyond the 75 needed to govern. The combined Coalition forces — LNP (15), Liberal Party (11) and Nationals (9) — managed only 35 seats, representing a historically weak result for the centre-right. Notably, Independents secured 14 seats, continuing the trend of voters turning away from major parties in favour of local, issue-focused candidates. The Greens, despite their prominence in public discourse, won just one seat, suggesting their support remains geographically concentrated."),
         html.H2(children="How Preferential Voting Shaped the Result"),
         exploration(),
         first_preference_result(first_preferences),
         analysis(),
+        preference_flow_section() if flows_available() else None,
         lollipop_charts_election_result(election_result_summary),
+        swing_section() if election_swing.tpp_available() else None,
+        drill_down_section() if pyramid_available() else None,
         html.P(["Source code: ", html.A("GitHub repository", href="https://github.com/karieng-com-au/australia-analytics")]),
     ])
 
 
-@callback(
-    Output("election-map", "figure"),
-    Input("state-dropdown", "value")
-)
-def update_map(selected_state):
-    election_result_df, _, _, geojson_data = load_all_data()
+def drill_down_section():
+    return html.Div([
+        html.H2(children="Drill Down: First Preferences by Polling Place"),
+        html.P("Narrow the first-preference count from the national total to a state, a division and a single polling place."),
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(id="drill-state", options=child_options(load_pyramid()), placeholder="All states"), md=4),
+            dbc.Col(dcc.Dropdown(id="drill-division", placeholder="All divisions"), md=4),
+            dbc.Col(dcc.Dropdown(id="drill-place", placeholder="All polling places"), md=4),
+        ], className="mb-3"),
+        dcc.Graph(id="drill-votes"),
+        dcc.Graph(id="drill-children"),
+    ])
+
+
+def preference_flow_section():
+    flows = load_flows()
+    return html.Div([
+        html.H3(children="Where Preferences Went"),
+        html.P("For each party's voters whose candidate did not make the final two, the share of their votes that "
+               "ended with each finalist's party after preferences were distributed."),
+        dcc.Dropdown(
+            id="flow-state",
+            options=[{"label": str(state), "value": i} for i, state in enumerate(flows["states"])],
+            placeholder="Australia",
+        ),
+        dcc.Graph(id="preference-flows"),
+    ])
+
+
+def swing_section():
+    tpp = election_swing.load_tpp()
+    low, high = election_swing.SWEEP_RANGE
+    return html.Div([
+        html.H3(children="What If the Two-Party Vote Swings?"),
+        html.P("Move the slider to add a two-party-preferred swing to Labor (negative: to the Coalition) in every "
+               "division, or pick a state to swing only its divisions. Seats are the notional Labor v Coalition "
+               "count in all 150 divisions."),
+        dcc.Dropdown(
+            id="swing-state",
+            options=[{"label": str(state), "value": i} for i, state in enumerate(tpp["states"])],
+            placeholder="All states",
+        ),
+        dcc.Slider(id="tpp-swing", min=low, max=high, step=0.5, value=0,
+                   marks={v: f"{v:+d}" for v in range(int(low), int(high) + 1, 2)},
+                   tooltip={"placement": "bottom", "always_visible": True}),
+        dcc.Graph(id="swing-seats", style={'height': '450px'}),
+    ])
+
+
+def build_swing_seats(tpp, swing, state=None):
+    import plotly.graph_objects as go
+    swings = election_swing.sweep()
+    alp, coalition = election_swing.seat_counts(tpp, election_swing.division_swings(tpp, swings, state))
+    at_alp, at_coalition = election_swing.seat_counts(tpp, election_swing.division_swings(tpp, [swing], state))
+    where = "nationally" if state is None else f"in {tpp['states'][state]}"
+    fig = go.Figure([
+        go.Scatter(x=swings, y=alp, mode="lines", name="Labor", line_color=party_colors["Australian Labor Party"]),
+        go.Scatter(x=swings, y=coalition, mode="lines", name="Coalition",
+                   line_color=party_colors["Liberal Party of Australia"]),
+    ])
+    fig.add_hline(y=election_swing.MAJORITY, line_width=2, line_dash="dash", line_color="grey",
+                  annotation_text=f"{election_swing.MAJORITY} — Majority required to form government",
+                  annotation_position="top left", annotation_font={"size": 11, "color": "grey"})
+    fig.add_vline(x=swing, line_width=1, line_color="black")
+    fig.update_layout(
+        title=f"Seats After a {swing:+.1f} Point Swing to Labor {where}: Labor {at_alp[0]}, Coalition {at_coalition[0]}",
+        xaxis_title="Two-party-preferred swing to Labor (points)", yaxis_title="Seats",
+        template="simple_white", margin={"r": 0, "t": 40, "l": 0, "b": 0},
+        legend={"orientation": "h", "yanchor": "bottom", "y": 1.0, "xanchor": "right", "x": 1},
+    )
+    return fig
+
+
+# Source parties shown in the preference flow chart, by votes transferred.
+FLOW_PARTIES = 8
+
+flow_figures = VersionedCache("preference_flows")
+
+
+def build_preference_flows(flows, matrix, name):
+    import numpy as np
+    import plotly.graph_objects as go
+    # Parties sharing a canonical name (state branches) are merged on both axes.
+    canonical = np.array([normalise_party(str(party)) for party in flows["party_names"]])
+    parties = list(dict.fromkeys(canonical))
+    merge = (canonical[:, None] == np.array(parties)).astype(np.int64)
+    merged = merge.T @ matrix @ merge
+    columns = np.flatnonzero(merged.sum(axis=0))
+    transferred = merged.sum(axis=1)
+    sources = np.argsort(transferred, kind="stable")[::-1][:FLOW_PARTIES]
+    sources = sources[transferred[sources] > 0]
+    shares = merged[sources][:, columns] / transferred[sources, None]
+    labels = [parties[i] for i in sources]
+    fig = go.Figure([
+        go.Bar(x=shares[:, j], y=labels, orientation="h", name=parties[column],
+               marker_color=party_colors.get(parties[column], "gray"),
+               customdata=merged[sources, column], hovertemplate="%{x:.1%} (%{customdata:,} votes)")
+        for j, column in enumerate(columns)
+    ])
+    fig.update_layout(
+        barmode="stack", title=f"Preference Flows to the Final Two - {name}",
+        xaxis={"tickformat": ".0%", "range": [0, 1]}, yaxis={"autorange": "reversed"},
+        height=max(300, 40 * len(labels) + 160),
+        margin={"r": 0, "t": 40, "l": 0, "b": 0},
+        legend={"orientation": "h", "yanchor": "bottom", "y": 1.0, "xanchor": "left", "x": 0},
+    )
+    return fig
+
+
+def drill_down_party_colors(pyramid):
+    return [party_colors.get(normalise_party(name), "gray") for name in pyramid["party_names"]]
+
+
+# Parties shown individually in the per-child breakdown; the rest are summed into "Other".
+DRILL_DOWN_PARTIES = 6
+
+
+def build_drill_down_votes(pyramid, node, top=10):
+    import numpy as np
+    import plotly.graph_objects as go
+    votes = node["votes"]
+    order = np.argsort(votes, kind="stable")[::-1][:top]
+    order = order[votes[order] > 0][::-1]
+    colors = drill_down_party_colors(pyramid)
+    formal = int(votes.sum())
+    fig = go.Figure(go.Bar(
+        x=votes[order], y=pyramid["party_names"][order], orientation="h",
+        marker_color=[colors[i] for i in order],
+        text=[f"{v / formal:.1%}" for v in votes[order]] if formal else None, textposition="outside",
+    ))
+    fig.update_layout(
+        title=f"First Preferences - {node['name']} ({formal:,} formal, {node['informal']:,} informal)",
+        xaxis_title="Votes", height=max(300, 40 * len(order) + 120),
+        margin={"r": 40, "t": 40, "l": 0, "b": 0},
+    )
+    return fig
+
+
+def build_drill_down_children(pyramid, node):
+    import numpy as np
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    if node["child_level"] is None:
+        fig.update_layout(height=120, margin={"r": 0, "t": 40, "l": 0, "b": 0},
+                          title=f"{node['name']} is a single polling place",
+                          xaxis={"visible": False}, yaxis={"visible": False})
+        return fig
+    child_votes = node["child_votes"]
+    totals = child_votes.sum(axis=1)
+    shares = child_votes / np.maximum(totals, 1)[:, None]
+    colors = drill_down_party_colors(pyramid)
+    # Parties are stored in order of national first preferences.
+    for i in range(min(DRILL_DOWN_PARTIES, shares.shape[1])):
+        fig.add_trace(go.Bar(x=shares[:, i], y=node["children"], orientation="h",
+                             name=pyramid["party_names"][i], marker_color=colors[i]))
+    fig.add_trace(go.Bar(x=shares[:, DRILL_DOWN_PARTIES:].sum(axis=1), y=node["children"], orientation="h",
+                         name="Other", marker_color="lightgray"))
+    fig.update_layout(
+        barmode="stack", title=f"First-Preference Share by {node['child_level'].title()} - {node['name']}",
+        xaxis={"tickformat": ".0%", "range": [0, 1]}, yaxis={"autorange": "reversed"},
+        height=max(300, 22 * len(node["children"]) + 140),
+        margin={"r": 0, "t": 40, "l": 0, "b": 0},
+        legend={"orientation": "h", "yanchor": "bottom", "y": 1.0, "xanchor": "left", "x": 0},
+    )
+    return fig
+
+
+def map_layout(selected_state, center):
+    return {
+        "margin": {"r": 0, "t": 40, "l": 0, "b": 0},
+        "title": {"text": f"Australian Federal Election {election_year()} - {selected_state}"},
+        "height": 700,
+        "legend": {"orientation": "h", "yanchor": "top", "y": -0.02, "xanchor": "left", "x": 0,
+                   "title": {"text": "PartyNm"}, "tracegroupgap": 0},
+        "map": {"center": {"lat": center["lat"], "lon": center["lon"]}, "zoom": center["zoom"]},
+    }
+
+
+def build_map_store(election_result_df):
+    """Winners and simplified geometries for every state, encoded column-wise for the client-side map.
+
+    Parties are stored once and referenced by index, and each division's
+    geometry is stored once per state rather than once per party trace as
+    in the server-rendered figure.
+    """
+    import plotly.express as px
+    import polars as pl
+    parties = sorted(election_result_df["PartyNm"].unique())
+    palette = iter(px.colors.qualitative.Plotly * len(parties))
+    colors = [party_colors.get(party) or next(palette) for party in parties]
+    party_index = {party: i for i, party in enumerate(parties)}
+    states = {}
+    for state in sorted(election_result_df["StateAb"].unique()):
+        winners = election_result_df.filter(pl.col("StateAb") == state)
+        center = state_centers.get(state, {"lat": -25.5, "lon": 134.5, "zoom": 4})
+        state_features = load_state_features(state, map_level(center["zoom"]))
+        states[state] = {
+            "division": winners["DivisionNm"].to_list(),
+            "party": [party_index[party] for party in winners["PartyNm"]],
+            "given": winners["GivenNm"].to_list(),
+            "surname": winners["Surname"].to_list(),
+            "features": [
+                {"type": "Feature", "properties": {"CED_NAME25": name}, "geometry": state_features[name]["geometry"]}
+                for name in winners["DivisionNm"].unique(maintain_order=True) if name in state_features
+            ],
+            "layout": map_layout(state, center),
+        }
+    return {"parties": parties, "colors": colors, "states": states}
+
+
+def build_map_figure(election_result_df, selected_state):
+    import plotly.express as px
+    import polars as pl
 
     # Filter election data by state
-    filtered_df = election_result_df[election_result_df["StateAb"] == selected_state]
+    filtered_df = election_result_df.filter(pl.col("StateAb") == selected_state)
+
+    # Get center coordinates for selected state
+    center = state_centers.get(selected_state, {"lat": -25.5, "lon": 134.5, "zoom": 4})
 
-    # Filter GeoJSON to only include divisions in the filtered data
-    division_names = set(filtered_df["DivisionNm"].unique())
+    # Look up the state's divisions at the simplification level for its zoom
+    state_features = load_state_features(selected_state, map_level(center["zoom"]))
     filtered_geojson = {
         "type": "FeatureCollection",
         "features": [
-            f for f in geojson_data["features"]
-            if f["properties"]["CED_NAME25"] in division_names
+            state_features[name] for name in filtered_df["DivisionNm"].unique()
+            if name in state_features
         ]
     }
 
-    # Get center coordinates for selected state
-    center = state_centers.get(selected_state, {"lat": -25.5, "lon": 134.5, "zoom": 4})
-
     fig = px.choropleth_map(
         filtered_df,
         geojson=filtered_geojson,
@@ -173,7 +490,7 @@ def update_map(selected_state):
 
     fig.update_layout(
         margin={"r": 0, "t": 40, "l": 0, "b": 0},
-        title=f"Australian Federal Election 2025 - {selected_state}",
+        title=f"Australian Federal Election {election_year()} - {selected_state}",
         height=700,
         legend=dict(
             orientation="h",
@@ -185,3 +502,123 @@ def update_map(selected_state):
     )
 
     return fig
+
+
+def map_figure(selected_state):
+    """The state's map as encode_figure() bytes, built once per data version; None for an unknown state."""
+    check_district_geojson()
+    data = load_all_data()
+    if selected_state not in state_centers:
+        return None
+    return map_figures.get(data, selected_state, lambda: encode_figure(build_map_figure(data[0], selected_state)))
+
+
+FIGURE_ROUTES["election-map"] = map_figure
+
+
+@callback(
+    Output("drill-division", "options"),
+    Output("drill-division", "value"),
+    Input("drill-state", "value")
+)
+def update_drill_divisions(state):
+    if state is None:
+        return [], None
+    return child_options(load_pyramid(), state=state), None
+
+
+@callback(
+    Output("drill-place", "options"),
+    Output("drill-place", "value"),
+    Input("drill-division", "value")
+)
+def update_drill_places(division):
+    if division is None:
+        return [], None
+    return child_options(load_pyramid(), division=division), None
+
+
+@callback(
+    Output("drill-votes", "figure"),
+    Output("drill-children", "figure"),
+    Input("drill-state", "value"),
+    Input("drill-division", "value"),
+    Input("drill-place", "value")
+)
+def update_drill_down(state, division, place):
+    pyramid = load_pyramid()
+    node = drill_down(pyramid, state, division, place)
+    return (figure_to_json(build_drill_down_votes(pyramid, node)),
+            figure_to_json(build_drill_down_children(pyramid, node)))
+
+
+@callback(
+    Output("preference-flows", "figure"),
+    Input("flow-state", "value")
+)
+def update_preference_flows(state):
+    flows = load_flows()
+    name = "Australia" if state is None else str(flows["states"][state])
+    return flow_figures.get(flows, state, lambda: figure_to_json(
+        build_preference_flows(flows, flow_matrix(state, transferred_only=True), name)))
+
+
+@callback(
+    Output("swing-seats", "figure"),
+    Input("tpp-swing", "value"),
+    Input("swing-state", "value")
+)
+def update_swing_seats(swing, state):
+    # Recomputed on every move: the whole sweep is one array operation.
+    return figure_to_json(build_swing_seats(election_swing.load_tpp(), swing or 0, state))
+
+
+if MAP_MODE == "client":
+    clientside_callback(
+        """
+        function(state, store) {
+            if (!store || !store.states[state]) return window.dash_clientside.no_update;
+            var s = store.states[state];
+            var geojson = {type: "FeatureCollection", features: s.features};
+            // One trace per party, in order of first appearance like plotly express.
+            var rowsByParty = {}, order = [];
+            s.party.forEach(function(p, i) {
+                if (!(p in rowsByParty)) { rowsByParty[p] = []; order.push(p); }
+                rowsByParty[p].push(i);
+            });
+            var traces = order.map(function(p) {
+                var name = store.parties[p], rows = rowsByParty[p];
+                return {
+                    type: "choroplethmap", name: name, legendgroup: name, showlegend: true,
+                    geojson: geojson, featureidkey: "properties.CED_NAME25",
+                    locations: rows.map(function(i) { return s.division[i]; }),
+                    z: rows.map(function() { return 1; }),
+                    colorscale: [[0, store.colors[p]], [1, store.colors[p]]], showscale: false,
+                    customdata: rows.map(function(i) { return [name, s.given[i], s.surname[i]]; }),
+                    hovertemplate: "DivisionNm=%{location}<br>PartyNm=%{customdata[0]}<br>" +
+                                   "GivenNm=%{customdata[1]}<br>Surname=%{customdata[2]}<br>Victorious=Y<extra></extra>"
+                };
+            });
+            // Plotly mutates the layout it is given, so hand it a copy.
+            return {data: traces, layout: JSON.parse(JSON.stringify(s.layout))};
+        }
+        """,
+        Output("election-map", "figure"),
+        Input("state-dropdown", "value"),
+        State("election-map-store", "data"),
+    )
+else:
+    # The figure bytes go out as cached; the browser parses them, not Dash.
+    clientside_callback(
+        """
+        async function(state) {
+            if (!state) return window.dash_clientside.no_update;
+            var config = JSON.parse(document.getElementById("_dash-config").textContent);
+            var response = await fetch(config.requests_pathname_prefix + "_figures/election-map/" + encodeURIComponent(state));
+            if (!response.ok) return window.dash_clientside.no_update;
+            return response.json();
+        }
+        """,
+        Output("election-map", "figure"),
+        Input("state-dropdown", "value"),
+    )
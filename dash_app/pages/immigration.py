@@ -1,30 +1,43 @@
 import dash
 import dash_bootstrap_components as dbc
-from dash import html, dcc
-import plotly.express as px
+from dash import html, dcc, callback, Output, Input
 import plotly.graph_objects as go
-import numpy as np
 from dotenv import load_dotenv
-import os
-from google.cloud import bigquery #, storage
-from google.oauth2 import service_account
-from functools import lru_cache
+try:
+    from dash_app.data_access import get_backend, source_version
+except ModuleNotFoundError:
+    from data_access import get_backend, source_version
+try:
+    from dash_app.cache import VersionedCache, figure_to_json, refreshing
+except ModuleNotFoundError:
+    from cache import VersionedCache, figure_to_json, refreshing
+try:
+    from dash_app import charts
+except ModuleNotFoundError:
+    import charts
+try:
+    from dash_app.trends import STATE_SERIES, population_trends, state_trends
+except ModuleNotFoundError:
+    from trends import STATE_SERIES, population_trends, state_trends
+try:
+    from dash_app import simulation
+except ModuleNotFoundError:
+    import simulation
 
 dash.register_page(__name__, path="/immigration", name="Immigration Analysis")
 
 load_dotenv()
 
-credential_file = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-if credential_file and os.path.exists(credential_file):
-    credentials = service_account.Credentials.from_service_account_file(credential_file)
-    project_id = os.getenv("GOOGLE_PROJECT_ID")
-else:
-    import google.auth
-    credentials, project_id = google.auth.default()
-
-client = bigquery.Client(credentials=credentials, project=project_id)
+page_layouts = VersionedCache("immigration_layout")
+# Simulation summaries by slider value; the slider's step keeps the keys few.
+simulations = VersionedCache("migration_simulations")
+# State forecast figures by state; every state is forecast in one batch (see trends.state_trends).
+state_figures = VersionedCache("state_forecasts")
 
 def layout():
+    return page_layouts.get(get_population_data(), "layout", build_layout)
+
+def build_layout():
     return html.Div([
         html.H2("Australia's Silver Tsunami: The Demographic Case for Immigration"),
         html.P("Immigration remains a contentious political issue in Australia. But what does the data actually say? "
@@ -32,7 +45,7 @@ def layout():
                "not as a political choice, but as an economic necessity."),
 
         html.H3("The Demographic Crossover"),
-        dcc.Graph(figure=scatter_graph(), style={'height': '700px'}),
+        dcc.Graph(figure=figure_to_json(scatter_graph()), style={'height': '700px'}),
         html.P("Since 2012, Australia's birth rate has declined by approximately 1,525 births annually, while deaths "
                "have increased by roughly 3,375 per year. The graph projects a critical inflection point around 2040, "
                "when deaths are forecast to exceed births for the first time in modern Australian history. Beyond this "
@@ -45,13 +58,31 @@ def layout():
                "deaths—is consistent with patterns observed across comparable developed nations."),
 
         html.H3("Net Migration Trends"),
-        dcc.Graph(figure=net_migration_lollipop_horizontal(), style={'height': '400px'}),
+        dcc.Graph(figure=figure_to_json(net_migration_lollipop_horizontal()), style={'height': '400px'}),
         html.P("The government's target of 239,000 net migrants annually appears designed to offset this demographic shift. "
                "The elevated migration figures of 438,000 (2022), 531,000 (2023), and 330,000 (2024) represent a "
                "correction following pandemic-era border closures in 2020-2021, when migration nearly ceased. "
                "These elevated numbers suggest the government is attempting to build demographic resilience ahead of "
                "the projected crossover point."),
 
+        html.H3("What If the Target Changes?"),
+        html.P(f"Each setting below runs {simulation.PATHS:,} simulated futures. Births and deaths follow their trend "
+               "since 2012 with its uncertainty and year-to-year scatter, and net migration varies around the chosen "
+               "target as much as it has historically. Migration moves the population path but not the crossover "
+               "year, which depends on births and deaths alone."),
+        dcc.Slider(id="migration-target", min=0, max=600_000, step=20_000, value=simulation.DEFAULT_TARGET,
+                   marks={v: f"{v // 1000}k" for v in range(0, 600_001, 100_000)},
+                   tooltip={"placement": "bottom", "always_visible": True}),
+        dcc.Graph(id="simulated-population", style={'height': '450px'}),
+        dcc.Graph(id="simulated-crossover", style={'height': '350px'}),
+
+        html.H3("State by State"),
+        html.P("Each state grows by natural increase (births less deaths), overseas migration and people moving "
+               "between states. Their trends since 2012 are projected below with 95% prediction intervals; choose a "
+               "state to see how much of its growth depends on migration."),
+        dcc.Dropdown(id="forecast-state", options=state_options(), value="AUS", clearable=False),
+        dcc.Graph(id="state-forecast", style={'height': '500px'}),
+
         html.H3("Immigration and Birth Rates: Is There a Link?"),
         html.P(["Interestingly, birth rates remained stable—even slightly increasing by approximately 15,000 in "
                 "2021—during the period of lowest immigration. ",
@@ -60,7 +91,7 @@ def layout():
                        "encourage higher birth rates among the established population?")]),
 
         html.H3("Did the Baby Bonus Work?"),
-        dcc.Graph(figure=scatter_graph_no_projection(), style={'height': '600px'}),
+        dcc.Graph(figure=figure_to_json(scatter_graph_no_projection()), style={'height': '600px'}),
         html.P("Australia has experimented with pronatalist policies before. The government introduced a $3,000 lump "
                "sum baby bonus in 2004, which correlated with an increase of 15,000 births in subsequent years. "
                "When the bonus rose to $4,000 in 2006, births increased by nearly 19,000 in 2007. A further increase "
@@ -95,11 +126,25 @@ def layout():
         html.P(["Source code: ", html.A("GitHub repository", href="https://github.com/karieng-com-au/australia-analytics")]),
     ])
 
-@lru_cache(maxsize=1)
+POPULATION_COLUMNS = ["year", "births", "deaths", "net_migration", "total"]
+
+@refreshing("population_data", version=source_version("australia.au_population_mart"))
 def get_population_data():
-    """Single query to fetch all population data."""
-    sql = "SELECT year, births, deaths, net_migration FROM `australia.au_population_mart` ORDER BY year"
-    return client.query(sql).result().to_dataframe()
+    """Single read of the population columns the charts use."""
+    table = get_backend().read_table("australia.au_population_mart", POPULATION_COLUMNS)
+    return table.sort_by("year").to_pandas()
+
+STATE_COLUMNS = ["state", "year", *STATE_SERIES]
+
+@refreshing("state_population_data", version=source_version("australia.au_state_population_mart"))
+def get_state_population_data():
+    """State population and its components of growth by year (see pipelines.population_marts)."""
+    table = get_backend().read_table("australia.au_state_population_mart", STATE_COLUMNS)
+    return table.sort_by([("state", "ascending"), ("year", "ascending")]).to_pandas()
+
+def state_options():
+    states = sorted(get_state_population_data()["state"].unique(), key=lambda state: (state != "AUS", state))
+    return [{"label": "Australia" if state == "AUS" else state, "value": state} for state in states]
 
 def get_births_deaths_data():
     df = get_population_data()
@@ -113,67 +158,45 @@ def get_births_deaths_data_2000():
     df = get_population_data()
     return df.loc[df["year"] >= 2000, ["year", "births", "deaths"]].reset_index(drop=True)
 
+def observed_and_trend(df, series, name, color, trend):
+    """Observed points and their fitted line, as px.scatter(trendline="ols") drew them."""
+    return [
+        go.Scatter(x=df["year"], y=df[series], mode="markers", name=name, marker=dict(color=color)),
+        go.Scatter(x=trend["years"], y=trend["fitted"], mode="lines", name=f"{name} Trend", line=dict(color=color)),
+    ]
+
 def scatter_graph():
+    import numpy as np
     births_n_deaths_df = get_births_deaths_data()
-    fig = px.scatter(births_n_deaths_df, x="year", y="births", trendline="ols", color_discrete_sequence=["#167d7f"])
-    fig.data[0].name = "Births"
-    fig.data[0].showlegend = True
-    fig.data[1].name = "Births Trend"
-    fig.data[1].showlegend = True
-    deaths_trace = px.scatter(births_n_deaths_df, x="year", y="deaths", trendline="ols", color_discrete_sequence=["red"])
-    deaths_trace.data[0].name = "Deaths"
-    deaths_trace.data[0].showlegend = True
-    deaths_trace.data[1].name = "Deaths Trend"
-    deaths_trace.data[1].showlegend = True
-    fig.add_trace(deaths_trace.data[0])
-    fig.add_trace(deaths_trace.data[1])
-
-    # Forecast births and deaths for the next 10 years
-    years = births_n_deaths_df["year"].values
-    max_year = int(years.max())
-    forecast_years = np.arange(max_year + 1, max_year + 25)
-
-    births_coeffs = np.polyfit(years, births_n_deaths_df["births"].values, 1)
-    deaths_coeffs = np.polyfit(years, births_n_deaths_df["deaths"].values, 1)
-
-    births_forecast = np.polyval(births_coeffs, forecast_years)
-    deaths_forecast = np.polyval(deaths_coeffs, forecast_years)
-
-    # Calculate confidence intervals based on residual std error
-    # Uncertainty grows with distance from the historical data
-    births_residuals = births_n_deaths_df["births"].values - np.polyval(births_coeffs, years)
-    deaths_residuals = births_n_deaths_df["deaths"].values - np.polyval(deaths_coeffs, years)
-    births_std = np.std(births_residuals)
-    deaths_std = np.std(deaths_residuals)
-
-    # Expanding uncertainty: 1.96 * std * sqrt(1 + years ahead / n)
-    n = len(years)
-    years_ahead = np.arange(1, len(forecast_years) + 1)
-    births_margin = 1.96 * births_std * np.sqrt(1 + years_ahead / n)
-    deaths_margin = 1.96 * deaths_std * np.sqrt(1 + years_ahead / n)
+    trends = population_trends(get_population_data())
+    births, deaths = trends["births", 2012], trends["deaths", 2012]
+    fig = go.Figure(observed_and_trend(births_n_deaths_df, "births", "Births", "#167d7f", births)
+                    + observed_and_trend(births_n_deaths_df, "deaths", "Deaths", "red", deaths))
 
     # Births forecast with confidence band
+    forecast_years = births["forecast_years"]
     fig.add_trace(go.Scatter(
-        x=forecast_years, y=births_forecast, mode="markers+lines",
+        x=forecast_years, y=births["forecast"], mode="markers+lines",
         name="Births Forecast", marker=dict(color="#167d7f", symbol="diamond"),
         line=dict(dash="dash", color="#167d7f"),
     ))
     fig.add_trace(go.Scatter(
         x=np.concatenate([forecast_years, forecast_years[::-1]]),
-        y=np.concatenate([births_forecast + births_margin, (births_forecast - births_margin)[::-1]]),
+        y=np.concatenate([births["upper"], births["lower"][::-1]]),
         fill="toself", fillcolor="rgba(22,125,127,0.1)", line=dict(color="rgba(0,0,0,0)"),
         name="Births 95% CI", showlegend=True,
     ))
 
     # Deaths forecast with confidence band
+    forecast_years = deaths["forecast_years"]
     fig.add_trace(go.Scatter(
-        x=forecast_years, y=deaths_forecast, mode="markers+lines",
+        x=forecast_years, y=deaths["forecast"], mode="markers+lines",
         name="Deaths Forecast", marker=dict(color="red", symbol="diamond"),
         line=dict(dash="dash", color="red"),
     ))
     fig.add_trace(go.Scatter(
         x=np.concatenate([forecast_years, forecast_years[::-1]]),
-        y=np.concatenate([deaths_forecast + deaths_margin, (deaths_forecast - deaths_margin)[::-1]]),
+        y=np.concatenate([deaths["upper"], deaths["lower"][::-1]]),
         fill="toself", fillcolor="rgba(245,73,39,0.1)", line=dict(color="rgba(0,0,0,0)"),
         name="Deaths 95% CI", showlegend=True,
     ))
@@ -197,18 +220,9 @@ def get_birth_data_by_year(births_n_deaths_df, year):
 
 def scatter_graph_no_projection():
     births_n_deaths_df = get_births_deaths_data_2000()
-    fig = px.scatter(births_n_deaths_df, x="year", y="births", trendline="ols", color_discrete_sequence=["#167d7f"])
-    fig.data[0].name = "Births"
-    fig.data[0].showlegend = True
-    fig.data[1].name = "Births Trend"
-    fig.data[1].showlegend = True
-    deaths_trace = px.scatter(births_n_deaths_df, x="year", y="deaths", trendline="ols", color_discrete_sequence=["red"])
-    deaths_trace.data[0].name = "Deaths"
-    deaths_trace.data[0].showlegend = True
-    deaths_trace.data[1].name = "Deaths Trend"
-    deaths_trace.data[1].showlegend = True
-    fig.add_trace(deaths_trace.data[0])
-    fig.add_trace(deaths_trace.data[1])
+    trends = population_trends(get_population_data())
+    fig = go.Figure(observed_and_trend(births_n_deaths_df, "births", "Births", "#167d7f", trends["births", 2000])
+                    + observed_and_trend(births_n_deaths_df, "deaths", "Deaths", "red", trends["deaths", 2000]))
 
     fig.update_layout(
         margin={"r": 0, "t": 40, "l": 0, "b": 80},
@@ -273,50 +287,106 @@ def scatter_graph_no_projection():
 
 
 def net_migration_lollipop():
-    df = get_net_immigration_data().sort_values("year")
-    colors = ["#167d7f" if v >= 0 else "#e63946" for v in df["net_migration"]]
+    return charts.net_migration_lollipop(get_net_immigration_data(), horizontal=False)
 
+
+def net_migration_lollipop_horizontal():
+    return charts.net_migration_lollipop(get_net_immigration_data(), horizontal=True)
+
+
+def simulated_population(summary):
+    import numpy as np
+    years, quantiles = summary["years"], summary["total_quantiles"]
     fig = go.Figure()
-    for _, row in df.iterrows():
+    for (low, high), opacity in (((0.05, 0.95), 0.15), ((0.25, 0.75), 0.3)):
         fig.add_trace(go.Scatter(
-            x=[0, row["net_migration"]], y=[row["year"], row["year"]],
-            mode="lines", line=dict(color="grey", width=2), showlegend=False,
+            x=np.concatenate([years, years[::-1]]),
+            y=np.concatenate([quantiles[high], quantiles[low][::-1]]) / 1e6,
+            fill="toself", fillcolor=f"rgba(22,125,127,{opacity})", line=dict(color="rgba(0,0,0,0)"),
+            name=f"{high - low:.0%} of paths",
         ))
-    fig.add_trace(go.Scatter(
-        x=df["net_migration"], y=df["year"], mode="markers",
-        marker=dict(size=10, color=colors), name="Net Migration", showlegend=False,
-    ))
+    fig.add_trace(go.Scatter(x=years, y=quantiles[0.5] / 1e6, mode="lines", name="Median",
+                             line=dict(color="#167d7f")))
     fig.update_layout(
-        title="Australia Net Migration by Year",
-        xaxis_title="Net Migration",
-        yaxis_title="Year",
-        height=700,
-        margin={"r": 0, "t": 40, "l": 0, "b": 0},
-        yaxis=dict(dtick=1),
+        margin={"r": 0, "t": 40, "l": 0, "b": 40},
+        title=f"Simulated Population with {summary['target']:,} Net Migrants a Year",
+        yaxis_title="Population (millions)",
     )
     return fig
 
 
-def net_migration_lollipop_horizontal():
-    df = get_net_immigration_data().sort_values("year")
-    colors = ["#167d7f" if v >= 0 else "#e63946" for v in df["net_migration"]]
+def simulated_crossover(summary):
+    never = summary["never_crossed"]
+    fig = go.Figure(go.Bar(x=summary["years"], y=summary["crossover_counts"] / summary["paths"],
+                           marker_color="red", name="Crossover year"))
+    fig.update_layout(
+        margin={"r": 0, "t": 40, "l": 0, "b": 40},
+        title=f"Year Deaths First Exceed Births (median {summary['crossover_median']:.0f}, "
+              f"never in {never:.0%} of paths)" if summary["crossover_median"] else
+              "Deaths Do Not Exceed Births in Any Simulated Path",
+        yaxis_tickformat=".0%",
+    )
+    return fig
+
+
+@callback(
+    Output("simulated-population", "figure"),
+    Output("simulated-crossover", "figure"),
+    Input("migration-target", "value")
+)
+def update_simulation(target):
+    df = get_population_data()
+
+    def build():
+        summary = simulation.simulate(simulation.calibrate(df), target)
+        return figure_to_json(simulated_population(summary)), figure_to_json(simulated_crossover(summary))
+
+    return simulations.get(df, target, build)
 
+
+STATE_COMPONENTS = {
+    "natural_increase": ("Natural Increase", "#167d7f", "rgba(22,125,127,0.1)"),
+    "net_overseas_migration": ("Net Overseas Migration", "#f5a623", "rgba(245,166,35,0.1)"),
+    "net_interstate_migration": ("Net Interstate Migration", "#6a4c93", "rgba(106,76,147,0.1)"),
+}
+
+def state_forecast_graph(df, forecasts, state):
+    """Each component of a state's growth, observed and forecast with its 95% band."""
+    import numpy as np
+    observed = df[(df["state"] == state) & (df["year"] >= 2012)]
     fig = go.Figure()
-    for _, row in df.iterrows():
+    for column, (name, color, fill) in STATE_COMPONENTS.items():
+        forecast = forecasts[column, state]
+        forecast_years = forecast["forecast_years"]
+        fig.add_trace(go.Scatter(x=observed["year"], y=observed[column], mode="markers", name=name,
+                                 marker=dict(color=color)))
+        fig.add_trace(go.Scatter(x=forecast_years, y=forecast["forecast"], mode="lines", name=f"{name} Forecast",
+                                 line=dict(dash="dash", color=color)))
         fig.add_trace(go.Scatter(
-            x=[row["year"], row["year"]], y=[0, row["net_migration"]],
-            mode="lines", line=dict(color="grey", width=2), showlegend=False,
+            x=np.concatenate([forecast_years, forecast_years[::-1]]),
+            y=np.concatenate([forecast["upper"], forecast["lower"][::-1]]),
+            fill="toself", fillcolor=fill, line=dict(color="rgba(0,0,0,0)"),
+            name=f"{name} 95% CI", showlegend=False,
         ))
-    fig.add_trace(go.Scatter(
-        x=df["year"], y=df["net_migration"], mode="markers",
-        marker=dict(size=10, color=colors), name="Net Migration", showlegend=False,
-    ))
+
+    population = forecasts["population", state]
+    label = "Australia" if state == "AUS" else state
+    title = f"{label}: Components of Population Growth"
+    if np.isfinite(population["forecast"][-1]):
+        title += (f" (population {population['forecast'][-1] / 1e6:.1f}M by {population['forecast_years'][-1]}, "
+                  f"95% interval {population['lower'][-1] / 1e6:.1f}-{population['upper'][-1] / 1e6:.1f}M)")
     fig.update_layout(
-        title="Australia Net Migration by Year",
-        xaxis_title="Year",
-        yaxis_title="Net Migration",
-        height=400,
-        margin={"r": 0, "t": 40, "l": 0, "b": 0},
-        xaxis=dict(dtick=1),
+        margin={"r": 0, "t": 40, "l": 0, "b": 80},
+        title=title,
+        legend=dict(orientation="h", yanchor="top", y=-0.10, xanchor="left", x=0.1),
     )
     return fig
+
+
+@callback(
+    Output("state-forecast", "figure"),
+    Input("forecast-state", "value")
+)
+def update_state_forecast(state):
+    df = get_state_population_data()
+    return state_figures.get(df, state, lambda: figure_to_json(state_forecast_graph(df, state_trends(df), state)))
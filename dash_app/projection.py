@@ -0,0 +1,177 @@
+"""Cohort-component population projection by state, sex and single year of age.
+
+    python -m dash_app.projection [--tfr X] [--migration N] [--improvement X] [--horizon N]
+
+The population is one (scenarios, states, sexes, ages) array. Each
+projected year applies the Leslie-matrix recurrence to all of it at once:
+every age group survives into the next (100 and over stays open), births
+are the age-specific fertility rates times the women of each age, and net
+migrants are added by age and sex. The matrix is never built; its
+sub-diagonal is an array shift and its first row a dot product, so a
+50-year projection of every state under many scenarios is a few dozen
+whole-array operations.
+
+Fertility (TFR), mortality improvement and net overseas migration are
+scenario inputs; the age schedules they scale are the parametric ones
+below. The base population is au_state_age_population_mart and the state
+split of migration comes from au_state_population_mart (see
+pipelines.population_marts).
+"""
+import sys
+
+AGES = 101
+SEXES = ["Female", "Male"]
+HORIZON = 50
+
+# ABS Births, Australia 2024.
+DEFAULT_TFR = 1.48
+SEX_RATIO_AT_BIRTH = 1.05
+FERTILITY_AGES = (15, 49)
+FERTILITY_MEAN_AGE = 31.5
+FERTILITY_SD_AGE = 5.5
+
+# Gompertz-Makeham hazard c + A * exp(B * age), plus infant mortality at
+# age 0, with A set for a life expectancy at birth of 85.1 (female) and
+# 81.1 (male), ABS Life tables 2022-2024.
+GOMPERTZ_A = {"Female": 1.047e-5, "Male": 1.567e-5}
+GOMPERTZ_B = 0.1
+MAKEHAM_C = 0.0003
+INFANT_MORTALITY = 0.003
+
+# Net overseas migrants by age: mostly students and young workers.
+MIGRANT_MEAN_AGE = 27
+MIGRANT_SD_AGE = 9
+MIGRATION_SHARE_YEARS = 5
+
+DEFAULT_SCENARIO = {"tfr": DEFAULT_TFR, "mortality_improvement": 0.01, "net_overseas_migration": 239_000}
+
+
+def fertility_schedule():
+    """Share of a woman's lifetime births at each age; times the TFR gives age-specific rates."""
+    import numpy as np
+    ages = np.arange(AGES)
+    first, last = FERTILITY_AGES
+    shape = np.exp(-0.5 * ((ages - FERTILITY_MEAN_AGE) / FERTILITY_SD_AGE) ** 2)
+    shape[(ages < first) | (ages > last)] = 0.0
+    return shape / shape.sum()
+
+
+def mortality_hazard():
+    """Annual mortality hazard by sex and age, shaped (sexes, ages)."""
+    import numpy as np
+    ages = np.arange(AGES)
+    hazard = np.stack([MAKEHAM_C + GOMPERTZ_A[sex] * np.exp(GOMPERTZ_B * ages) for sex in SEXES])
+    hazard[:, 0] += INFANT_MORTALITY
+    return hazard
+
+
+def migrant_profile():
+    """Share of net migrants by sex and age, shaped (sexes, ages) and summing to 1."""
+    import numpy as np
+    ages = np.arange(AGES)
+    shape = np.exp(-0.5 * ((ages - MIGRANT_MEAN_AGE) / MIGRANT_SD_AGE) ** 2)
+    return np.stack([shape, shape]) / (2 * shape.sum())
+
+
+def project(base, asfr, hazard, migrants, improvement=0.0, horizon=HORIZON):
+    """Project `base` (states, sexes, ages) `horizon` years ahead under each scenario.
+
+    asfr (scenarios, states, ages), hazard (scenarios, states, sexes, ages)
+    and migrants (scenarios, states, sexes, ages; net migrants per year)
+    broadcast over their leading axes; hazards fall by `improvement`
+    (scenarios,) a year. Returns (scenarios, horizon + 1, states, sexes,
+    ages), year 0 being the base.
+    """
+    import numpy as np
+    asfr, hazard, migrants = (np.asarray(a, dtype=float) for a in (asfr, hazard, migrants))
+    improvement = np.asarray(improvement, dtype=float).reshape(-1, 1, 1, 1)
+    scenarios = max(len(asfr), len(hazard), len(migrants), len(improvement))
+    population = np.empty((scenarios, horizon + 1, *np.shape(base)))
+    population[:, 0] = base
+    female, male = SEXES.index("Female"), SEXES.index("Male")
+    newborn_sex = np.zeros(len(SEXES))
+    newborn_sex[female], newborn_sex[male] = 1 / (1 + SEX_RATIO_AT_BIRTH), SEX_RATIO_AT_BIRTH / (1 + SEX_RATIO_AT_BIRTH)
+    for year in range(horizon):
+        current, following = population[:, year], population[:, year + 1]
+        survival = np.exp(-hazard * (1 - improvement) ** year)
+        survivors = current * survival
+        following[..., 1:] = survivors[..., :-1]
+        following[..., -1] += survivors[..., -1]
+        births = np.einsum("ksa,ksa->ks", current[:, :, female], np.broadcast_to(asfr, current[:, :, female].shape))
+        # Babies born during the year are exposed to about half a year of infant mortality.
+        following[..., 0] = births[..., None] * newborn_sex * np.sqrt(survival[..., 0])
+        following += migrants
+        np.maximum(following, 0.0, out=following)
+    return population
+
+
+def base_population(age_mart, year=None, states=None):
+    """(states, sexes, ages) array from au_state_age_population_mart rows (pandas) of one year."""
+    import numpy as np
+    year = year or int(age_mart["year"].max())
+    rows = age_mart[age_mart["year"] == year]
+    states = states or sorted(s for s in rows["state"].unique() if s != "AUS")
+    wide = rows.pivot_table(index=["state", "sex"], columns="age", values="population", aggfunc="sum")
+    wide = wide.reindex(index=[(s, sex) for s in states for sex in SEXES], columns=range(AGES), fill_value=0)
+    return states, np.nan_to_num(wide.to_numpy(dtype=float)).reshape(len(states), len(SEXES), AGES)
+
+
+def migration_by_state(state_mart, states, years=MIGRATION_SHARE_YEARS):
+    """Each state's share of net overseas migration and its mean net interstate migration, over recent years."""
+    import numpy as np
+    recent = state_mart[state_mart["state"].isin(states)].dropna(subset=["net_overseas_migration"])
+    recent = recent[recent["year"] > recent["year"].max() - years].groupby("state")
+    overseas = recent["net_overseas_migration"].sum().reindex(states).to_numpy(dtype=float)
+    interstate = recent["net_interstate_migration"].mean().reindex(states).fillna(0).to_numpy(dtype=float)
+    return overseas / overseas.sum(), interstate - interstate.mean()
+
+
+def scenario_inputs(scenarios, overseas_share, interstate):
+    """Stacked asfr, hazard, migrants and improvement arrays for `project`, one row per scenario dict."""
+    import numpy as np
+    scenarios = [dict(DEFAULT_SCENARIO, **scenario) for scenario in scenarios]
+    tfr = np.array([s["tfr"] for s in scenarios])
+    overseas = np.array([s["net_overseas_migration"] for s in scenarios])
+    improvement = np.array([s["mortality_improvement"] for s in scenarios])
+    asfr = tfr[:, None, None] * fertility_schedule()
+    hazard = mortality_hazard()[None, None]
+    migrants = (overseas[:, None] * overseas_share + interstate)[..., None, None] * migrant_profile()
+    return asfr, hazard, migrants, improvement
+
+
+def project_scenarios(age_mart, state_mart, scenarios, horizon=HORIZON, year=None):
+    """Project every state from the marts under each scenario; returns (states, base year, population)."""
+    states, base = base_population(age_mart, year)
+    base_year = year or int(age_mart["year"].max())
+    asfr, hazard, migrants, improvement = scenario_inputs(scenarios, *migration_by_state(state_mart, states))
+    return states, base_year, project(base, asfr, hazard, migrants, improvement, horizon)
+
+
+if __name__ == "__main__":
+    import time
+    try:
+        from dash_app.data_access import get_backend
+    except ModuleNotFoundError:
+        from data_access import get_backend
+
+    def option(name, default):
+        return type(default)(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+    scenario = {
+        "tfr": option("--tfr", DEFAULT_SCENARIO["tfr"]),
+        "net_overseas_migration": option("--migration", DEFAULT_SCENARIO["net_overseas_migration"]),
+        "mortality_improvement": option("--improvement", DEFAULT_SCENARIO["mortality_improvement"]),
+    }
+    horizon = option("--horizon", HORIZON)
+    backend = get_backend()
+    age_mart = backend.read_table("australia.au_state_age_population_mart", ["state", "year", "sex", "age", "population"])
+    state_mart = backend.read_table("australia.au_state_population_mart",
+                                    ["state", "year", "net_overseas_migration", "net_interstate_migration"])
+    start = time.perf_counter()
+    states, base_year, population = project_scenarios(age_mart.to_pandas(), state_mart.to_pandas(), [scenario], horizon)
+    elapsed = time.perf_counter() - start
+    totals = population[0].sum(axis=(2, 3))
+    for i, state in enumerate(states):
+        print(f"{state:>4} {totals[0, i] / 1e6:6.2f}M in {base_year} -> {totals[-1, i] / 1e6:6.2f}M in {base_year + horizon}")
+    print(f"{'All':>4} {totals[0].sum() / 1e6:6.2f}M in {base_year} -> {totals[-1].sum() / 1e6:6.2f}M in "
+          f"{base_year + horizon} ({elapsed * 1000:.0f} ms)")
@@ -0,0 +1,127 @@
+"""Monte Carlo paths of births, deaths and net migration from au_population_mart.
+
+    python -m dash_app.simulation [--target N] [--paths N] [--workers N]
+
+Births and deaths follow their linear trend since TREND_START, with the
+slope drawn from its sampling distribution for each path and the yearly
+residual scatter added on top; net migration varies around the target
+with its historical standard deviation. Each path accumulates total
+population from the last observed year. Every path and year is one array
+operation; large runs are split across a process pool with independent
+random streams. The result is a small summary: the distribution of the
+year deaths first exceed births, and population quantiles by year.
+"""
+import os
+import sys
+
+PATHS = 5000
+HORIZON = 40
+TREND_START = 2012
+DEFAULT_TARGET = 239_000
+SEED = 0
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+# A process pool costs more to start and feed than it saves below this.
+PARALLEL_MIN_PATHS = 50_000
+WORKERS = int(os.getenv("SIMULATION_WORKERS", "0")) or os.cpu_count()
+
+_pool = None
+_pool_workers = None
+
+
+def calibrate(df, start=TREND_START):
+    """Trend and volatility of each series in a population frame with year, births, deaths, net_migration and total."""
+    import numpy as np
+    df = df.sort_values("year")
+    recent = df[df["year"] >= start]
+    years = recent["year"].to_numpy(dtype=float)
+    mean_year = years.mean()
+    params = {"last_year": int(df["year"].max()), "last_total": float(df["total"].iloc[-1]), "mean_year": mean_year}
+    for series in ("births", "deaths"):
+        values = recent[series].to_numpy(dtype=float)
+        slope, level = np.polyfit(years - mean_year, values, 1)
+        residual_std = np.sqrt(((values - level - slope * (years - mean_year)) ** 2).sum() / (len(years) - 2))
+        params[series] = {
+            "level": level,
+            "slope": slope,
+            "slope_se": residual_std / np.sqrt(((years - mean_year) ** 2).sum()),
+            "residual_std": residual_std,
+        }
+    params["migration_std"] = float(df["net_migration"].dropna().std())
+    return params
+
+
+def simulate_paths(params, target, paths, horizon, seed):
+    """Crossover year (NaN when deaths never exceed births) and total population, per path."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    years = params["last_year"] + np.arange(1, horizon + 1)
+
+    def trend_paths(series):
+        p = params[series]
+        slopes = p["slope"] + p["slope_se"] * rng.standard_normal((paths, 1))
+        noise = p["residual_std"] * rng.standard_normal((paths, horizon))
+        return np.maximum(p["level"] + slopes * (years - params["mean_year"]) + noise, 0.0)
+
+    births, deaths = trend_paths("births"), trend_paths("deaths")
+    migration = target + params["migration_std"] * rng.standard_normal((paths, horizon))
+    total = params["last_total"] + np.cumsum(births - deaths + migration, axis=1)
+    crossed = deaths > births
+    crossover = np.where(crossed.any(axis=1), years[crossed.argmax(axis=1)], np.nan)
+    return crossover, total
+
+
+def pool(workers):
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        from concurrent.futures import ProcessPoolExecutor
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool, _pool_workers = ProcessPoolExecutor(max_workers=workers), workers
+    return _pool
+
+
+def simulate(params, target=DEFAULT_TARGET, paths=PATHS, horizon=HORIZON, seed=SEED, workers=WORKERS):
+    """Run `paths` paths, in parallel chunks when there are enough, and summarise them."""
+    import numpy as np
+    if workers <= 1 or paths < PARALLEL_MIN_PATHS:
+        crossover, total = simulate_paths(params, target, paths, horizon, seed)
+    else:
+        sizes = np.diff(np.linspace(0, paths, workers + 1).astype(int))
+        seeds = np.random.SeedSequence(seed).spawn(workers)
+        chunks = list(pool(workers).map(simulate_paths, [params] * workers, [target] * workers, sizes,
+                                        [horizon] * workers, seeds))
+        crossover = np.concatenate([c for c, _ in chunks])
+        total = np.concatenate([t for _, t in chunks])
+
+    years = params["last_year"] + np.arange(1, horizon + 1)
+    crossed = crossover[~np.isnan(crossover)]
+    return {
+        "target": target,
+        "paths": paths,
+        "years": years,
+        "total_quantiles": dict(zip(QUANTILES, np.quantile(total, QUANTILES, axis=0))),
+        "crossover_counts": np.bincount((crossed - years[0]).astype(int), minlength=horizon),
+        "never_crossed": float(np.isnan(crossover).mean()),
+        "crossover_median": float(np.median(crossed)) if crossed.size else None,
+    }
+
+
+if __name__ == "__main__":
+    import time
+    try:
+        from dash_app.data_access import get_backend
+    except ModuleNotFoundError:
+        from data_access import get_backend
+
+    def option(name, default):
+        return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+    table = get_backend().read_table("australia.au_population_mart", ["year", "births", "deaths", "net_migration", "total"])
+    params = calibrate(table.to_pandas())
+    start = time.perf_counter()
+    summary = simulate(params, option("--target", DEFAULT_TARGET), option("--paths", PATHS), workers=option("--workers", WORKERS))
+    elapsed = time.perf_counter() - start
+    median = summary["total_quantiles"][0.5]
+    print(f"{summary['paths']:,} paths in {elapsed:.2f}s: deaths exceed births by {summary['crossover_median']} (median), "
+          f"never in {summary['never_crossed']:.0%} of paths; population {median[-1] / 1e6:.1f}M in {summary['years'][-1]}")
@@ -0,0 +1,72 @@
+import fcntl
+import glob
+import hashlib
+import os
+import tempfile
+
+# Mart query results are written once to an Arrow IPC file on local disk and
+# memory-mapped by every gunicorn worker, so only the first worker after a dbt
+# run pays for the BigQuery round trip and the pages share one copy in the OS
+# page cache. Files are keyed by the source table's last-modified time.
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "australia-snapshots"))
+
+
+def table_version(client, table_id):
+    """Cheap metadata lookup that changes whenever the table is rebuilt."""
+    table = client.get_table(table_id)
+    if table.modified is not None:
+        return str(int(table.modified.timestamp() * 1000))
+    return table.etag.strip('"')
+
+
+def snapshot_prefix(table_id, key):
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(SNAPSHOT_DIR, f"{table_id.replace('.', '__')}-{digest}")
+
+
+def write_snapshot(table, path):
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def remove_stale_snapshots(prefix, current_path):
+    for path in glob.glob(f"{prefix}-*.arrow"):
+        if path != current_path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def cached_snapshot(client, table_id, key, fetch):
+    """Return the Arrow table produced by `fetch()` for `key`, memory-mapped from disk.
+
+    `fetch` only runs when no snapshot exists for the current version of
+    `table_id`; concurrent workers wait on a file lock instead of issuing
+    duplicate reads.
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    prefix = snapshot_prefix(table_id, key)
+    path = f"{prefix}-{table_version(client, table_id)}.arrow"
+    if not os.path.exists(path):
+        with open(f"{prefix}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if not os.path.exists(path):
+                    write_snapshot(fetch(), path)
+                    remove_stale_snapshots(prefix, path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    return ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def read_snapshot(client, table_id, sql):
+    """Return the result of `sql` as a memory-mapped Arrow table."""
+    return cached_snapshot(client, table_id, sql, lambda: client.query(sql).result().to_arrow())
@@ -0,0 +1,86 @@
+"""Linear trends and forecasts of the population series, shared by the Dash pages and main.py.
+
+Every (series, start year) pair the charts need is fitted in one batched
+least-squares solve, and the result is cached per data version, so a
+render no longer refits the same births/deaths lines for each chart.
+The state series are forecast the same way, every state in one batch.
+"""
+try:
+    from dash_app.cache import VersionedCache
+except ModuleNotFoundError:
+    from cache import VersionedCache
+try:
+    from dash_app.forecasting import bootstrap_forecast, panel_forecast
+except ModuleNotFoundError:
+    from forecasting import bootstrap_forecast, panel_forecast
+
+TREND_SERIES = ["births", "deaths"]
+# First year of each fitting window: the projection chart fits from 2012,
+# the baby bonus chart from 2000.
+TREND_STARTS = [2012, 2000]
+FORECAST_YEARS = 24
+STATE_SERIES = ["population", "natural_increase", "net_overseas_migration", "net_interstate_migration"]
+
+population_trends_cache = VersionedCache("population_trends")
+state_trends_cache = VersionedCache("state_trends")
+
+
+def fit_trends(years, series, starts, horizon=FORECAST_YEARS):
+    """Fit value = slope * year + intercept for every series over every window at once.
+
+    `series` maps a name to values aligned with `years`; the window for a
+    start year is every year from it on with a value present. Returns a
+    dict keyed by (name, start) holding the coefficients, the fitted line
+    over the window, and a `horizon`-year forecast with its 95%
+    residual-bootstrap prediction interval (see dash_app.forecasting).
+    """
+    import numpy as np
+    years = np.asarray(years, dtype=float)
+    names = list(series)
+    values = np.stack([np.asarray(series[name], dtype=float) for name in names])      # (S, N)
+    starts = np.asarray(starts)
+    windows = years >= starts[:, None]                                                # (W, N)
+    fits = bootstrap_forecast(years, np.broadcast_to(values[:, None, :], (len(names), *windows.shape)),
+                              mask=windows, horizon=horizon)
+
+    trends = {}
+    for i, name in enumerate(names):
+        for j, start in enumerate(starts.tolist()):
+            window = fits["valid"][i, j]
+            trends[name, start] = {
+                "slope": float(fits["slope"][i, j]),
+                "intercept": float(fits["intercept"][i, j]),
+                "n": int(fits["n"][i, j]),
+                "residual_std": float(fits["residual_std"][i, j]),
+                "years": years[window].astype(int),
+                "fitted": fits["fitted"][i, j][window],
+                "forecast_years": fits["forecast_years"][i, j],
+                "forecast": fits["forecast"][i, j],
+                "lower": fits["lower"][i, j],
+                "upper": fits["upper"][i, j],
+            }
+    return trends
+
+
+def population_trends(df, series=TREND_SERIES, starts=TREND_STARTS, horizon=FORECAST_YEARS):
+    """Trends of `series` in a population frame (pandas or polars), fitted once per frame.
+
+    The frame itself is the data version: pass the object returned by a
+    cached loader and repeated calls share one fit.
+    """
+    key = (tuple(series), tuple(starts), horizon)
+    return population_trends_cache.get(
+        df, key, lambda: fit_trends(df["year"], {name: df[name] for name in series}, starts, horizon)
+    )
+
+
+def state_trends(df, series=STATE_SERIES, start=TREND_STARTS[0], horizon=FORECAST_YEARS):
+    """Forecasts of `series` for every state of a state population frame (pandas), from `start` on.
+
+    Keyed by (series, state) as panel_forecast returns them, and fitted
+    once per frame like population_trends.
+    """
+    key = (tuple(series), start, horizon)
+    return state_trends_cache.get(
+        df, key, lambda: panel_forecast(df[df["year"] >= start], "state", list(series), horizon=horizon)
+    )
@@ -1,12 +1,9 @@
 import polars as pl
-from google.cloud import bigquery
-from dotenv import load_dotenv
-from google.oauth2 import service_account
 import streamlit as st
-import statsmodels.api as sm
-import os
 import seaborn as sns
 import matplotlib.pyplot as plt
+from dash_app.data_access import get_backend
+from dash_app.trends import population_trends
 
 st.set_page_config(
     page_title="Australia Population",
@@ -14,24 +11,10 @@ st.set_page_config(
     initial_sidebar_state="expanded",
     )
 
+@st.cache_resource
 def get_data():
-    print("Loading environment variables...")
-    load_dotenv()
-    print(os.getenv("GOOGLE_APPLICATION_CREDENTIALS"))
-    credentials = service_account.Credentials.from_service_account_file(os.getenv("GOOGLE_APPLICATION_CREDENTIALS"))
-
-    client = bigquery.Client(
-        credentials=credentials,
-        project=credentials.project_id
-    )
-
-    query = """
-    SELECT * FROM `toke-analytics.australia.au_population_mart`
-    """
-    query_job = client.query(query)
-    arrow_table = query_job.to_arrow()
-    df = pl.from_arrow(arrow_table)
-    return df
+    table = get_backend().read_table("australia.au_population_mart", ["year", "births", "deaths", "total"])
+    return pl.from_arrow(table.sort_by("year"))
 
 df = get_data()
 
@@ -57,27 +40,20 @@ def plot_1():
         y="quantity",
         hue="type",
         palette="muted",
-        ci=None,
+        fit_reg=False,
         height=4,
         aspect=1.6,
         scatter_kws={"s": 100, "alpha": 1},
     )
-    births_df = unpivoted_df.filter(
-        pl.col("type") == "births"
-    )
-    deaths_df = unpivoted_df.filter(
-        pl.col("type") == "deaths"
-    )
-
-    birth_model = sm.OLS(births_df["quantity"].to_numpy(), sm.add_constant(births_df["year"].to_numpy())).fit()
-    birth_slope = birth_model.params[1]
-    birth_intercept = birth_model.params[0]
-
-    death_model = sm.OLS(deaths_df["quantity"].to_numpy(), sm.add_constant(deaths_df["year"].to_numpy())).fit()
-    death_slope = death_model.params[1]
-    death_intercept = death_model.params[0]
+    trends = population_trends(df)
+    birth_trend, death_trend = trends["births", 2012], trends["deaths", 2012]
+    birth_slope, birth_intercept = birth_trend["slope"], birth_trend["intercept"]
+    death_slope, death_intercept = death_trend["slope"], death_trend["intercept"]
 
+    colors = dict(zip(["births", "deaths"], sns.color_palette("muted")))
     for ax in g.axes.flat:
+        for series, trend in (("births", birth_trend), ("deaths", death_trend)):
+            ax.plot(trend["years"], trend["fitted"], color=colors[series])
         equation = f"y = {birth_slope:.2f}year + {birth_intercept:.2f}"
         ax.text(0.05, 0.85, equation, transform=ax.transAxes, fontsize=10, verticalalignment='top',
                 bbox=dict(boxstyle="round,pad=0.5", fc="white", alpha=0.7)
@@ -0,0 +1,196 @@
+"""Convert ABS time series workbooks to tidy Parquet, skipping unchanged files.
+
+    python -m pipelines.abs_workbooks [raw_dir] [output_dir] [--workers N]
+
+Every Data* sheet of an ABS time series workbook (3101.0, 6432.0, ...) has
+a ten-row header above the observations: the series description, then
+Unit, Series Type, Data Type, Frequency, Collection Month, Series Start,
+Series End, No. Obs and Series ID. Each sheet is melted into one row per
+series per date:
+
+    Workbook, Sheet, SeriesId, Description, Unit, SeriesType, DataType,
+    Frequency, Date, Value
+
+and each workbook is written to <output_dir>/<stem>-<sha256 prefix>.parquet.
+manifest.json records the hash each Parquet file was built from, so a
+re-run only parses workbooks whose content changed; they are parsed in a
+process pool with fastexcel.
+
+Workbooks without Data* sheets in this layout are not converted; the
+manifest records them as skipped. Besides the Census and Data Explorer
+extracts, that includes data cubes such as 33010DC03.xlsx (births,
+population and fertility by Local Government Area): each of its
+"Table N" sheets has LGA rows under a two-row year and measure header,
+with no series IDs. Cube layouts differ from one release to the next and
+no mart reads them, so they are left to be read directly.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import polars as pl
+
+RAW_DIR = Path("raw_data")
+OUTPUT_DIR = Path(os.getenv("ABS_PARQUET_DIR", "data/abs"))
+MANIFEST = "manifest.json"
+HASH_LENGTH = 16
+
+HEADER_ROWS = 10
+# Header labels in column 0 of a Data* sheet and the column each becomes.
+HEADER_COLUMNS = {
+    "Unit": "Unit",
+    "Series Type": "SeriesType",
+    "Data Type": "DataType",
+    "Frequency": "Frequency",
+    "Series ID": "SeriesId",
+}
+
+SCHEMA = {
+    "Workbook": pl.String,
+    "Sheet": pl.String,
+    "SeriesId": pl.String,
+    "Description": pl.String,
+    "Unit": pl.String,
+    "SeriesType": pl.String,
+    "DataType": pl.String,
+    "Frequency": pl.String,
+    "Date": pl.Date,
+    "Value": pl.Float64,
+}
+
+
+def content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def series_header(header):
+    """One row per series column: its description and the labelled header rows."""
+    labels = header[header.columns[0]].to_list()
+    columns = header.columns[1:]
+    series = {"Column": columns, "Description": [header[0, c] for c in columns]}
+    for label, name in HEADER_COLUMNS.items():
+        row = labels.index(label)
+        series[name] = [header[row, c] for c in columns]
+    return pl.DataFrame(series).filter(pl.col("SeriesId").is_not_null())
+
+
+def tidy_sheet(reader, workbook, sheet):
+    header = reader.load_sheet(sheet, header_row=None, n_rows=HEADER_ROWS, dtypes="string").to_polars()
+    series = series_header(header)
+    observations = reader.load_sheet(sheet, header_row=None, skip_rows=HEADER_ROWS).to_polars()
+    date = observations.columns[0]
+    return (
+        observations
+        .select(pl.col(date).cast(pl.Date).alias("Date"),
+                *(pl.col(c).cast(pl.Float64) for c in series["Column"]))
+        .unpivot(index="Date", variable_name="Column", value_name="Value")
+        .drop_nulls("Value")
+        .join(series, on="Column")
+        .select(pl.lit(workbook).alias("Workbook"), pl.lit(sheet).alias("Sheet"), *list(SCHEMA)[2:])
+        .cast(SCHEMA)
+    )
+
+
+def is_time_series_sheet(reader, sheet):
+    if not sheet.startswith("Data"):
+        return False
+    first_column = reader.load_sheet(sheet, header_row=None, n_rows=HEADER_ROWS, use_columns=[0], dtypes="string")
+    return first_column.to_polars().to_series().to_list()[HEADER_ROWS - 1] == "Series ID"
+
+
+def convert(path, output_path):
+    """Parse one workbook and write its tidy table; runs in a worker process."""
+    import fastexcel
+
+    reader = fastexcel.read_excel(path)
+    sheets = [s for s in reader.sheet_names if is_time_series_sheet(reader, s)]
+    if not sheets:
+        return None
+    table = pl.concat([tidy_sheet(reader, Path(path).name, s) for s in sheets])
+    tmp_path = output_path.with_name(f"{output_path.stem}.tmp-{os.getpid()}.parquet")
+    table.write_parquet(tmp_path)
+    os.replace(tmp_path, output_path)
+    return {"rows": table.height, "series": table["SeriesId"].n_unique(), "sheets": sheets}
+
+
+def read_manifest(output_dir):
+    path = Path(output_dir) / MANIFEST
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def write_manifest(output_dir, manifest):
+    path = Path(output_dir) / MANIFEST
+    tmp_path = path.with_name(f"{MANIFEST}.tmp-{os.getpid()}")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp_path, path)
+
+
+def is_current(entry, digest, output_dir):
+    if entry is None or entry["sha256"] != digest:
+        return False
+    return entry["parquet"] is None or (Path(output_dir) / entry["parquet"]).exists()
+
+
+def convert_all(raw_dir=RAW_DIR, output_dir=OUTPUT_DIR, workers=None):
+    """Convert every changed workbook under raw_dir; returns (converted, unchanged) names."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(output_dir)
+    workbooks = {p.name: (p, content_hash(p)) for p in sorted(Path(raw_dir).glob("*.xlsx"))}
+    changed = {name: (path, digest) for name, (path, digest) in workbooks.items()
+               if not is_current(manifest.get(name), digest, output_dir)}
+
+    if changed:
+        # Spawned, not forked: a fork of a process whose polars thread pool has run can deadlock.
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {
+                name: pool.submit(convert, path, output_dir / f"{path.stem}-{digest[:HASH_LENGTH]}.parquet")
+                for name, (path, digest) in changed.items()
+            }
+            for name, future in futures.items():
+                path, digest = changed[name]
+                result = future.result()
+                previous = manifest.get(name, {}).get("parquet")
+                parquet = f"{path.stem}-{digest[:HASH_LENGTH]}.parquet" if result else None
+                if previous and previous != parquet:
+                    (output_dir / previous).unlink(missing_ok=True)
+                manifest[name] = {"sha256": digest, "parquet": parquet, **(result or {"skipped": "no time series sheets"})}
+
+    for name in set(manifest) - set(workbooks):
+        if manifest[name]["parquet"]:
+            (output_dir / manifest[name]["parquet"]).unlink(missing_ok=True)
+        del manifest[name]
+    write_manifest(output_dir, manifest)
+    return sorted(changed), sorted(set(workbooks) - set(changed))
+
+
+def scan_workbooks(output_dir=OUTPUT_DIR):
+    """Lazy frame over the current Parquet file of every converted workbook."""
+    manifest = read_manifest(output_dir)
+    files = [Path(output_dir) / entry["parquet"] for entry in manifest.values() if entry["parquet"]]
+    return pl.scan_parquet(files) if files else pl.LazyFrame(schema=SCHEMA)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    workers = None
+    if "--workers" in argv:
+        i = argv.index("--workers")
+        workers = int(argv[i + 1])
+        del argv[i:i + 2]
+    raw_dir = Path(argv[0]) if argv else RAW_DIR
+    output_dir = Path(argv[1]) if len(argv) > 1 else OUTPUT_DIR
+    converted, unchanged = convert_all(raw_dir, output_dir, workers)
+    manifest = read_manifest(output_dir)
+    for name in converted:
+        entry = manifest[name]
+        print(f"{name}: " + (f"{entry['rows']:,} rows, {entry['series']} series -> {entry['parquet']}"
+                             if entry["parquet"] else entry["skipped"]))
+    print(f"{len(converted)} converted, {len(unchanged)} unchanged")
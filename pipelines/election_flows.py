@@ -0,0 +1,123 @@
+"""Pre-aggregate two-candidate-preferred flows into per-division party flow matrices.
+
+    python -m pipelines.election_flows [output_path]
+
+Reads the AEC HouseTcpFlowByPPDownload-*.csv files (one per division,
+one row per polling place, source candidate and finalist) and writes one
+.npz of plain typed arrays:
+
+* parties, party_names - party abbreviation and most common name, ordered
+  by the votes they hold after the count.
+* states, divisions - names; divisions are sorted by state, and
+  state_division_offsets gives each state's [start, end) range.
+* from_party, to_party, votes, transferred - the non-zero entries of every
+  division's flow matrix (sparse, COO): votes that started as a first
+  preference for from_party and ended with the to_party finalist.
+  transferred is False for a finalist's own first preferences.
+  division_entry_offsets gives each division's [start, end) range.
+
+State and national matrices are sums of their divisions' entries (see
+dash_app.election_flows), not another pass over the raw rows.
+"""
+import os
+import sys
+from pathlib import Path
+import numpy as np
+import polars as pl
+
+RAW_DIR = Path("raw_data/election-preferences/two-candidates-preferred-flow-by-polling-place")
+FILE_PATTERN = "**/HouseTcpFlowByPPDownload-*.csv"
+OUTPUT_PATH = Path(os.getenv("ELECTION_FLOWS_PATH", "dash_app/election_map/preference_flows.npz"))
+
+# Rows with FromCandidateId 0 hold the finalist's own first preferences.
+OWN_FIRST_PREFERENCES = 0
+# Candidates with no party have a blank abbreviation.
+UNAFFILIATED = "NAFD"
+
+
+def scan_flows(files):
+    """Lazy frame of (division, from party, to party) votes with the banner line skipped."""
+    flows = pl.scan_csv(files, skip_rows=1, infer_schema=False)
+    own = pl.col("FromCandidateId").cast(pl.Int32) == OWN_FIRST_PREFERENCES
+    from_party = pl.when(own).then("ToCandidatePartyAb").otherwise("FromCandidatePartyAb")
+    from_name = pl.when(own).then("ToCandidatePartyNm").otherwise("FromCandidatePartyNm")
+    return flows.select(
+        "StateAb",
+        pl.col("DivisionId").cast(pl.Int32),
+        "DivisionNm",
+        pl.when(from_party == "").then(pl.lit(UNAFFILIATED)).otherwise(from_party).alias("FromPartyAb"),
+        from_name.alias("FromPartyNm"),
+        pl.col("ToCandidatePartyAb").alias("ToPartyAb"),
+        pl.col("ToCandidatePartyNm").alias("ToPartyNm"),
+        (~own).alias("Transferred"),
+        pl.col("TransferCount").cast(pl.Int32).alias("Votes"),
+    )
+
+
+def offsets(parent_of_child, parent_count):
+    """Start of each parent's contiguous run of children, plus the end of the last run."""
+    return np.searchsorted(parent_of_child, np.arange(parent_count + 1)).astype(np.int32)
+
+
+def build_flows(flows):
+    entries = (
+        flows.group_by("StateAb", "DivisionId", "DivisionNm", "FromPartyAb", "ToPartyAb", "Transferred")
+        .agg(pl.col("Votes").sum())
+        .filter(pl.col("Votes") > 0)
+        .collect()
+    )
+    names = pl.concat([
+        flows.select(pl.col("FromPartyAb").alias("PartyAb"), pl.col("FromPartyNm").alias("PartyNm")),
+        flows.select(pl.col("ToPartyAb").alias("PartyAb"), pl.col("ToPartyNm").alias("PartyNm")),
+    ]).collect()
+    held = entries.group_by("ToPartyAb").agg(pl.col("Votes").sum()).rename({"ToPartyAb": "PartyAb"})
+    parties = (
+        names.group_by("PartyAb")
+        .agg(pl.col("PartyNm").filter(pl.col("PartyNm") != "").mode().sort().first())
+        .join(held, on="PartyAb", how="left")
+        .with_columns(pl.col("Votes").fill_null(0), pl.col("PartyNm").fill_null(pl.col("PartyAb")))
+        .sort(["Votes", "PartyAb"], descending=[True, False])
+    )
+    party_index = {party: i for i, party in enumerate(parties["PartyAb"])}
+
+    divisions = entries.select("StateAb", "DivisionId", "DivisionNm").unique().sort("StateAb", "DivisionNm")
+    states = divisions["StateAb"].unique(maintain_order=True).to_list()
+    division_index = {division: i for i, division in enumerate(divisions["DivisionId"])}
+    entries = (
+        entries.with_columns(pl.col("DivisionId").replace_strict(division_index).alias("division"),
+                             pl.col("FromPartyAb").replace_strict(party_index).alias("from"),
+                             pl.col("ToPartyAb").replace_strict(party_index).alias("to"))
+        .sort("division", "from", "to", "Transferred")
+    )
+    division_state = divisions["StateAb"].replace_strict({s: i for i, s in enumerate(states)}).to_numpy()
+    return {
+        "parties": np.array(parties["PartyAb"].to_list(), dtype=str),
+        "party_names": np.array(parties["PartyNm"].to_list(), dtype=str),
+        "states": np.array(states, dtype=str),
+        "divisions": np.array(divisions["DivisionNm"].to_list(), dtype=str),
+        "state_division_offsets": offsets(division_state, len(states)),
+        "division_entry_offsets": offsets(entries["division"].to_numpy(), divisions.height),
+        "from_party": entries["from"].to_numpy().astype(np.int16),
+        "to_party": entries["to"].to_numpy().astype(np.int16),
+        "votes": entries["Votes"].to_numpy().astype(np.int32),
+        "transferred": entries["Transferred"].to_numpy(),
+    }
+
+
+def write_flows(flows, output_path=OUTPUT_PATH):
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f"{output_path.stem}.tmp-{os.getpid()}.npz")
+    np.savez_compressed(tmp_path, **flows)
+    os.replace(tmp_path, output_path)
+
+
+if __name__ == "__main__":
+    files = sorted(RAW_DIR.glob(FILE_PATTERN))
+    if not files:
+        sys.exit(f"No {FILE_PATTERN} files under {RAW_DIR}")
+    flows = build_flows(scan_flows(files))
+    output_path = Path(sys.argv[1]) if len(sys.argv) > 1 else OUTPUT_PATH
+    write_flows(flows, output_path)
+    print(f"{len(flows['divisions'])} divisions, {len(flows['parties'])} parties, {len(flows['votes']):,} flow entries "
+          f"-> {output_path} ({output_path.stat().st_size / 1024:.0f} KiB)")
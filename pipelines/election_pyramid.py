@@ -0,0 +1,127 @@
+"""Pre-aggregate first preferences into a national/state/division/polling-place pyramid.
+
+    python -m pipelines.election_pyramid [output_path]
+
+Reads the AEC HouseStateFirstPrefsByPollingPlaceDownload-*.csv files and
+writes one .npz of plain typed arrays:
+
+* parties, party_names - party abbreviation and most common name, ordered
+  by national first preferences.
+* states, divisions, polling_places - names at each level. Rows are sorted
+  so every parent's children are contiguous, and
+  state_division_offsets / division_place_offsets give each parent's
+  [start, end) range in the level below.
+* national_votes, state_votes, division_votes, place_votes - formal first
+  preferences per party (int32, one column per party).
+* *_informal - informal votes per node.
+
+A drill-down step is then a slice of these arrays (see
+dash_app.election_pyramid) rather than a group-by over the raw rows.
+"""
+import os
+import sys
+from pathlib import Path
+import numpy as np
+import polars as pl
+
+RAW_DIR = Path("raw_data/election-preferences")
+FILE_PATTERN = "HouseStateFirstPrefsByPollingPlaceDownload-*.csv"
+OUTPUT_PATH = Path(os.getenv("ELECTION_PYRAMID_PATH", "dash_app/election_map/first_preferences_pyramid.npz"))
+
+SCHEMA = {
+    "StateAb": pl.String,
+    "DivisionID": pl.Int32,
+    "DivisionNm": pl.String,
+    "PollingPlaceID": pl.Int32,
+    "PollingPlace": pl.String,
+    "PartyAb": pl.String,
+    "PartyNm": pl.String,
+    "OrdinaryVotes": pl.Int32,
+}
+
+
+def scan_first_preferences(files):
+    """Lazy frame over the first-preference files with the banner line skipped."""
+    return (
+        pl.scan_csv(files, skip_rows=1, infer_schema=False)
+        .select(pl.col(name).cast(dtype) for name, dtype in SCHEMA.items())
+    )
+
+
+def offsets(parent_of_child, parent_count):
+    """Start of each parent's contiguous run of children, plus the end of the last run."""
+    return np.searchsorted(parent_of_child, np.arange(parent_count + 1)).astype(np.int32)
+
+
+def build_pyramid(first_preferences):
+    rows = first_preferences.collect()
+    formal = rows.filter(pl.col("PartyAb").is_not_null())
+    parties = (
+        formal.group_by("PartyAb")
+        # Candidates without a party name (PartyAb NAFD) are shown by abbreviation.
+        .agg(pl.col("OrdinaryVotes").sum(), pl.col("PartyNm").fill_null(pl.col("PartyAb")).mode().sort().first())
+        .sort(["OrdinaryVotes", "PartyAb"], descending=[True, False])
+    )
+    party_index = {party: i for i, party in enumerate(parties["PartyAb"])}
+
+    places = (
+        rows.select("StateAb", "DivisionID", "DivisionNm", "PollingPlaceID", "PollingPlace")
+        .unique("PollingPlaceID")
+        .sort(["StateAb", "DivisionNm", "PollingPlace", "PollingPlaceID"])
+        .with_row_index("place")
+    )
+    divisions = places.group_by("DivisionID", maintain_order=True).first()
+    states = divisions["StateAb"].unique(maintain_order=True).to_list()
+    division_index = {division: i for i, division in enumerate(divisions["DivisionID"])}
+    place_division = places["DivisionID"].replace_strict(division_index).to_numpy()
+    division_state = divisions["StateAb"].replace_strict({s: i for i, s in enumerate(states)}).to_numpy()
+
+    votes = formal.join(places.select("PollingPlaceID", "place"), on="PollingPlaceID")
+    place_votes = np.zeros((places.height, parties.height), dtype=np.int32)
+    np.add.at(place_votes, (votes["place"].to_numpy(), votes["PartyAb"].replace_strict(party_index).to_numpy()),
+              votes["OrdinaryVotes"].to_numpy())
+    informal = rows.filter(pl.col("PartyAb").is_null()).join(places.select("PollingPlaceID", "place"), on="PollingPlaceID")
+    place_informal = np.zeros(places.height, dtype=np.int32)
+    np.add.at(place_informal, informal["place"].to_numpy(), informal["OrdinaryVotes"].to_numpy())
+
+    division_place_offsets = offsets(place_division, divisions.height)
+    state_division_offsets = offsets(division_state, len(states))
+    division_votes = np.add.reduceat(place_votes, division_place_offsets[:-1], axis=0)
+    division_informal = np.add.reduceat(place_informal, division_place_offsets[:-1])
+    return {
+        "parties": np.array(parties["PartyAb"].to_list(), dtype=str),
+        "party_names": np.array(parties["PartyNm"].to_list(), dtype=str),
+        "states": np.array(states, dtype=str),
+        "divisions": np.array(divisions["DivisionNm"].to_list(), dtype=str),
+        "polling_places": np.array(places["PollingPlace"].to_list(), dtype=str),
+        "state_division_offsets": state_division_offsets,
+        "division_place_offsets": division_place_offsets,
+        "national_votes": place_votes.sum(axis=0, dtype=np.int64),
+        "state_votes": np.add.reduceat(division_votes, state_division_offsets[:-1], axis=0),
+        "division_votes": division_votes,
+        "place_votes": place_votes,
+        "national_informal": place_informal.sum(dtype=np.int64),
+        "state_informal": np.add.reduceat(division_informal, state_division_offsets[:-1]),
+        "division_informal": division_informal,
+        "place_informal": place_informal,
+    }
+
+
+def write_pyramid(pyramid, output_path=OUTPUT_PATH):
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f"{output_path.stem}.tmp-{os.getpid()}.npz")
+    np.savez_compressed(tmp_path, **pyramid)
+    os.replace(tmp_path, output_path)
+
+
+if __name__ == "__main__":
+    files = sorted(RAW_DIR.glob(FILE_PATTERN))
+    if not files:
+        sys.exit(f"No {FILE_PATTERN} files under {RAW_DIR}")
+    pyramid = build_pyramid(scan_first_preferences(files))
+    output_path = Path(sys.argv[1]) if len(sys.argv) > 1 else OUTPUT_PATH
+    write_pyramid(pyramid, output_path)
+    print(f"{len(pyramid['states'])} states, {len(pyramid['divisions'])} divisions, "
+          f"{len(pyramid['polling_places'])} polling places, {len(pyramid['parties'])} parties "
+          f"-> {output_path} ({output_path.stat().st_size / 1024:.0f} KiB)")
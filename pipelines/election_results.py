@@ -0,0 +1,214 @@
+"""Compute the election result marts from the partitioned DOP dataset with Polars.
+
+    python -m pipelines.election_results [dataset_dir] [output_dir] [--event ID] [--check]
+
+This reproduces au_election_results_mart, au_election_final_results_mart,
+au_first_count_results_mart, au_election_result_summary and
+au_first_preference_results_mart. The distribution-of-preferences rows are
+read once and reduced in a single group_by to one row per polling place,
+count and candidate; every mart is derived from that much smaller frame.
+Only the partitions of one election are read: --event, or
+ELECTION_EVENT_ID (2025 by default). The outputs are written as
+australia.<mart>.parquet so the local data backend (DATA_BACKEND=local)
+serves them to the pages. --check compares them against the BigQuery marts.
+"""
+import os
+import sys
+from pathlib import Path
+import polars as pl
+from dash_app.elections import DEFAULT_EVENT_ID
+from pipelines.election_distribution import OUTPUT_DIR as DATASET_DIR, scan_dataset
+
+MARTS_DIR = Path(os.getenv("LOCAL_DATA_DIR", os.path.join("data", "marts")))
+
+COUNT_TYPES = ["Preference Count", "Transfer Count"]
+DIVISION = ["StateAb", "DivisionId", "DivisionNm"]
+POLLING_PLACE = DIVISION + ["PPId", "PPNm"]
+CANDIDATE = ["CandidateId", "Surname", "GivenNm", "PartyAb", "PartyNm"]
+CANDIDATE_ATTRIBUTES = ["BallotPosition", "Surname", "GivenNm", "PartyAb", "PartyNm", "SittingMemberFl"]
+
+# Sort keys matching each mart's ORDER BY, used for writing and --check.
+MART_KEYS = {
+    "au_election_results_mart": POLLING_PLACE + ["FirstRoundRanking", "LastRoundRanking", "CandidateId"],
+    "au_election_final_results_mart": DIVISION + ["FinalRanking"],
+    "au_first_count_results_mart": ["StateAb", "DivisionNm", "FirstRoundRanking"],
+    "au_election_result_summary": ["PartyAb"],
+    "au_first_preference_results_mart": ["PartyAb", "Victorious"],
+}
+
+
+def count_totals(distribution):
+    """The single pass over the DOP rows: totals per polling place, count and candidate.
+
+    SumCalculationValue adds the Preference and Transfer Count rows like the
+    mart SQL does; RowCount keeps how many DOP rows were summed so SQL RANK()
+    semantics can be reproduced without the rows themselves.
+    """
+    value = pl.col("CalculationValue")
+    return (
+        distribution
+        .filter(pl.col("CalculationType").is_in(COUNT_TYPES))
+        .group_by(POLLING_PLACE + ["CountNum", "CandidateId"])
+        .agg(
+            pl.col(CANDIDATE_ATTRIBUTES).first(),
+            value.sum().alias("SumCalculationValue"),
+            value.filter(pl.col("CalculationType") == "Preference Count").sum().alias("PreferenceCount"),
+            pl.len().alias("RowCount"),
+        )
+        .with_columns(
+            pl.col(pl.Categorical, pl.Enum).cast(pl.String),
+            pl.col("CountNum").max().over(POLLING_PLACE).alias("MaxCountNum"),
+        )
+        .collect(engine="streaming")
+    )
+
+
+def sql_rank(df, keys, value, name):
+    """RANK() OVER (PARTITION BY keys ORDER BY value DESC) over the original DOP rows.
+
+    Each row of `df` stands for RowCount tied source rows, so a row's rank is
+    one more than the number of source rows with a strictly greater value.
+    """
+    return (
+        df.sort(keys + [value], descending=[False] * len(keys) + [True])
+        .with_columns((pl.col("RowCount").cum_sum().over(keys) - pl.col("RowCount")).alias("_above"))
+        .with_columns((pl.col("_above").min().over(keys + [value]) + 1).cast(pl.Int64).alias(name))
+        .drop("_above")
+    )
+
+
+def row_number(df, keys, value, name):
+    """ROW_NUMBER() OVER (PARTITION BY keys ORDER BY value DESC), ties broken by CandidateId."""
+    return (
+        df.sort(keys + [value, "CandidateId"], descending=[False] * len(keys) + [True, False])
+        .with_columns((pl.int_range(pl.len()).over(keys) + 1).cast(pl.Int64).alias(name))
+    )
+
+
+def election_results_mart(totals):
+    group = POLLING_PLACE + ["CountNum"]
+    first_round = sql_rank(totals.filter(pl.col("CountNum") == 0), group, "SumCalculationValue", "FirstRoundRanking")
+    last_round = sql_rank(totals.filter(pl.col("CountNum") == pl.col("MaxCountNum")), group,
+                          "SumCalculationValue", "LastRoundRanking")
+    join_keys = POLLING_PLACE + ["BallotPosition"] + CANDIDATE
+    return (
+        first_round.select(join_keys + ["FirstRoundRanking", pl.col("SumCalculationValue").alias("FirstRoundTotalValue")])
+        .join(last_round.select(join_keys + ["LastRoundRanking", pl.col("SumCalculationValue").alias("LastRoundTotalValue")]),
+              on=join_keys)
+        .sort(MART_KEYS["au_election_results_mart"])
+    )
+
+
+def election_final_results_mart(results):
+    final = row_number(
+        results.filter(pl.col("LastRoundTotalValue") > 0)
+        .group_by(DIVISION + CANDIDATE)
+        .agg(pl.col("LastRoundTotalValue").sum().alias("NumberOfVotes")),
+        DIVISION, "NumberOfVotes", "FinalRanking",
+    )
+    return (
+        final.with_columns(
+            pl.col("NumberOfVotes").sum().over("DivisionId").alias("DistrictTotalVotes"),
+            pl.when(pl.col("FinalRanking") == 1).then(pl.lit("Y")).otherwise(pl.lit("N")).alias("Victorious"),
+        )
+        .select(DIVISION + CANDIDATE + ["NumberOfVotes", "DistrictTotalVotes", "FinalRanking", "Victorious"])
+        .sort(MART_KEYS["au_election_final_results_mart"])
+    )
+
+
+def first_count_results_mart(totals, final_results):
+    first_count = row_number(
+        totals.filter(pl.col("CountNum") == 0)
+        .group_by(DIVISION + ["CountNum", "CandidateId"])
+        .agg(pl.col("PreferenceCount").sum().alias("FirstCountTotalVotes")),
+        DIVISION + ["CountNum"], "FirstCountTotalVotes", "FirstRoundRanking",
+    )
+    candidates = totals.select(CANDIDATE + ["SittingMemberFl"]).unique("CandidateId")
+    return (
+        first_count
+        .join(final_results.select("StateAb", "DivisionId", "CandidateId", "NumberOfVotes", "DistrictTotalVotes",
+                                   "FinalRanking", "Victorious"),
+              on=["CandidateId", "StateAb", "DivisionId"], how="left")
+        .join(candidates, on="CandidateId", how="left")
+        .select(DIVISION + ["CountNum"] + CANDIDATE + ["SittingMemberFl", "FirstCountTotalVotes", "FirstRoundRanking",
+                                                      "NumberOfVotes", "DistrictTotalVotes", "FinalRanking", "Victorious"])
+        .sort(MART_KEYS["au_first_count_results_mart"])
+    )
+
+
+def election_result_summary(first_count_results):
+    return (
+        first_count_results.filter(pl.col("Victorious") == "Y")
+        .group_by("PartyAb").agg(pl.len().cast(pl.Int64).alias("WinCount"))
+        .sort(["WinCount", "PartyAb"], descending=[True, False])
+    )
+
+
+def first_preference_results_mart(first_count_results):
+    return (
+        first_count_results.filter(pl.col("FirstRoundRanking") == 1)
+        .group_by("PartyAb", "Victorious").agg(pl.col("Victorious").count().cast(pl.Int64).alias("Counts"))
+        .sort(["PartyAb", "Victorious"], descending=[False, True], nulls_last=True)
+    )
+
+
+def compute_marts(distribution):
+    """All result marts from a lazy frame over the DOP rows (see scan_dataset)."""
+    totals = count_totals(distribution)
+    results = election_results_mart(totals)
+    final_results = election_final_results_mart(results)
+    first_count_results = first_count_results_mart(totals, final_results)
+    return {
+        "au_election_results_mart": results,
+        "au_election_final_results_mart": final_results,
+        "au_first_count_results_mart": first_count_results,
+        "au_election_result_summary": election_result_summary(first_count_results),
+        "au_first_preference_results_mart": first_preference_results_mart(first_count_results),
+    }
+
+
+def write_marts(marts, output_dir=MARTS_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    for name, df in marts.items():
+        df.write_parquet(Path(output_dir) / f"australia.{name}.parquet")
+        print(f"{name}: {df.height:,} rows")
+
+
+def compare_marts(marts, reference):
+    """Names of marts whose rows differ from `reference` (name -> DataFrame), ignoring dtypes and row order."""
+    from polars.testing import assert_frame_equal
+    mismatched = []
+    for name, df in marts.items():
+        expected = reference[name].select(df.columns)
+        expected = expected.with_columns(pl.col(c).cast(df.schema[c]) for c in df.columns)
+        try:
+            assert_frame_equal(df.sort(df.columns), expected.sort(df.columns), check_dtypes=False)
+        except AssertionError as e:
+            print(f"{name}: {e}")
+            mismatched.append(name)
+    return mismatched
+
+
+def check_against_bigquery(marts):
+    from dash_app.data_access import BigQueryBackend
+    backend = BigQueryBackend()
+    reference = {
+        name: pl.from_arrow(backend.query(f"australia.{name}", f"SELECT * FROM `australia.{name}`"))
+        for name in marts
+    }
+    return compare_marts(marts, reference)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    event_id = DEFAULT_EVENT_ID
+    if "--event" in argv:
+        i = argv.index("--event")
+        event_id = int(argv[i + 1])
+        del argv[i:i + 2]
+    args = [a for a in argv if a != "--check"]
+    dataset_dir = Path(args[0]) if args else DATASET_DIR
+    marts = compute_marts(scan_dataset(dataset_dir, event_id))
+    write_marts(marts, Path(args[1]) if len(args) > 1 else MARTS_DIR)
+    if "--check" in sys.argv and check_against_bigquery(marts):
+        sys.exit(1)
@@ -0,0 +1,191 @@
+"""Multi-election result store partitioned by AEC event ID.
+
+    python -m pipelines.election_store build [dataset_dir] [store_dir]
+    python -m pipelines.election_store swing FROM_EVENT TO_EVENT [PartyAb] [store_dir]
+    python -m pipelines.election_store changes FROM_EVENT TO_EVENT [store_dir]
+
+`build` derives one row per candidate per division for every election in
+the DOP dataset (see pipelines.election_distribution) and writes:
+
+* results/EventId=<id>/*.parquet - DivisionKey, CandidateKey, PartyKey,
+  FirstPreferences, FinalVotes and Elected, all small integers.
+* index/divisions.parquet, index/parties.parquet, index/candidates.parquet
+  - the dictionaries those keys point into, shared by every election.
+  Keys already assigned keep their values when another election is added.
+
+Queries scan results lazily with an EventId filter, so only the
+partitions of the elections asked about are read, and names are joined on
+from the index after aggregating.
+"""
+import sys
+from pathlib import Path
+import polars as pl
+from pipelines.election_distribution import OUTPUT_DIR as DATASET_DIR, scan_dataset
+from pipelines.election_results import compute_marts
+
+STORE_DIR = Path("data/election/store")
+
+# Natural key of each dictionary and the attributes stored with it; the
+# latest election's attributes win when a key appears in several.
+INDEXES = {
+    "divisions": ("DivisionKey", pl.UInt16, ["DivisionId"], ["DivisionNm", "StateAb"]),
+    "parties": ("PartyKey", pl.UInt16, ["PartyAb"], ["PartyNm"]),
+    "candidates": ("CandidateKey", pl.UInt32, ["EventId", "CandidateId"], ["Surname", "GivenNm"]),
+}
+
+
+def event_ids(dataset_dir=DATASET_DIR):
+    return sorted(int(p.name.split("=", 1)[1]) for p in Path(dataset_dir).glob("EventId=*"))
+
+
+def event_results(dataset_dir, event_id):
+    """Per-candidate division results for one election, from its DOP partitions only."""
+    marts = compute_marts(scan_dataset(dataset_dir, event_id))
+    return (
+        marts["au_first_count_results_mart"]
+        .select(
+            pl.lit(event_id, pl.Int32).alias("EventId"),
+            pl.col("DivisionId").cast(pl.Int32), "DivisionNm", "StateAb",
+            pl.col("CandidateId").cast(pl.Int32), "Surname", "GivenNm",
+            pl.col("PartyAb").fill_null("IND"),
+            pl.col("PartyNm").fill_null(pl.coalesce("PartyAb", pl.lit("Independent"))),
+            pl.col("FirstCountTotalVotes").cast(pl.Int32).alias("FirstPreferences"),
+            pl.col("NumberOfVotes").cast(pl.Int32).alias("FinalVotes"),
+            (pl.col("Victorious") == "Y").alias("Elected"),
+        )
+    )
+
+
+def read_index(store_dir, name):
+    path = Path(store_dir) / "index" / f"{name}.parquet"
+    key, dtype, natural, attributes = INDEXES[name]
+    if path.exists():
+        return pl.read_parquet(path)
+    return pl.DataFrame(schema={key: dtype, **{c: pl.Int32 if c.endswith("Id") else pl.String
+                                               for c in natural + attributes}})
+
+
+def update_index(index, name, rows):
+    """Append keys for natural keys not seen before and refresh attributes from `rows`."""
+    key, dtype, natural, attributes = INDEXES[name]
+    latest = rows.select(natural + attributes).unique(natural, keep="last")
+    new = latest.join(index, on=natural, how="anti").sort(natural)
+    start = index[key].max() + 1 if index.height else 0
+    new = new.with_columns((pl.int_range(pl.len()) + start).cast(dtype).alias(key))
+    existing = index.join(latest, on=natural, how="left", suffix="_new").select(
+        key, *natural, *(pl.coalesce(f"{c}_new", c).alias(c) for c in attributes)
+    )
+    return pl.concat([existing, new.select(existing.columns)]).sort(key)
+
+
+def encode(results, indexes):
+    """Replace names with dictionary keys; the result partition holds integers only."""
+    for name, (key, _, natural, _) in INDEXES.items():
+        results = results.join(indexes[name].select(key, *natural), on=natural, how="left")
+    return results.select(
+        "EventId", "DivisionKey", "CandidateKey", "PartyKey", "FirstPreferences", "FinalVotes", "Elected",
+    ).sort("DivisionKey", "CandidateKey")
+
+
+def build(dataset_dir=DATASET_DIR, store_dir=STORE_DIR, events=None):
+    store_dir = Path(store_dir)
+    events = events or event_ids(dataset_dir)
+    if not events:
+        raise FileNotFoundError(f"No EventId=* partitions under {dataset_dir}")
+    indexes = {name: read_index(store_dir, name) for name in INDEXES}
+    for event_id in events:
+        results = event_results(dataset_dir, event_id)
+        indexes = {name: update_index(index, name, results) for name, index in indexes.items()}
+        partition = store_dir / "results" / f"EventId={event_id}"
+        partition.mkdir(parents=True, exist_ok=True)
+        encode(results, indexes).drop("EventId").write_parquet(partition / "results.parquet")
+        print(f"{event_id}: {results.height:,} candidate results")
+    (store_dir / "index").mkdir(parents=True, exist_ok=True)
+    for name, index in indexes.items():
+        index.write_parquet(store_dir / "index" / f"{name}.parquet")
+
+
+def scan_results(store_dir=STORE_DIR, events=None):
+    """Lazy results; filtering on EventId skips the other elections' partitions."""
+    results = pl.scan_parquet(Path(store_dir) / "results" / "**" / "*.parquet", hive_partitioning=True)
+    if events is not None:
+        results = results.filter(pl.col("EventId").is_in(list(events)))
+    return results
+
+
+def scan_index(name, store_dir=STORE_DIR):
+    return pl.scan_parquet(Path(store_dir) / "index" / f"{name}.parquet")
+
+
+def party_key(party_ab, store_dir=STORE_DIR):
+    keys = scan_index("parties", store_dir).filter(pl.col("PartyAb") == party_ab).select("PartyKey").collect()
+    if keys.is_empty():
+        raise KeyError(f"Party {party_ab!r} is not in the store")
+    return keys.item()
+
+
+def division_swings(from_event, to_event, party_ab=None, store_dir=STORE_DIR):
+    """Change in each party's first-preference share per division, in percentage points.
+
+    Only divisions contested in both elections are compared; a party that did
+    not stand in one of them counts as 0% there.
+    """
+    shares = (
+        scan_results(store_dir, [from_event, to_event])
+        .with_columns((100 * pl.col("FirstPreferences") / pl.col("FirstPreferences").sum().over("EventId", "DivisionKey"))
+                      .alias("Share"))
+        .group_by("EventId", "DivisionKey", "PartyKey").agg(pl.col("Share").sum())
+    )
+    if party_ab is not None:
+        shares = shares.filter(pl.col("PartyKey") == party_key(party_ab, store_dir))
+    divisions_in_both = (
+        scan_results(store_dir, [from_event, to_event])
+        .group_by("DivisionKey").agg(pl.col("EventId").n_unique().alias("Events"))
+        .filter(pl.col("Events") == 2).select("DivisionKey")
+    )
+    before = shares.filter(pl.col("EventId") == from_event).select("DivisionKey", "PartyKey", pl.col("Share").alias("From"))
+    after = shares.filter(pl.col("EventId") == to_event).select("DivisionKey", "PartyKey", pl.col("Share").alias("To"))
+    return (
+        before.join(after, on=["DivisionKey", "PartyKey"], how="full", coalesce=True)
+        .join(divisions_in_both, on="DivisionKey")
+        .with_columns(pl.col("From").fill_null(0.0), pl.col("To").fill_null(0.0))
+        .with_columns((pl.col("To") - pl.col("From")).alias("Swing"))
+        .join(scan_index("divisions", store_dir), on="DivisionKey")
+        .join(scan_index("parties", store_dir), on="PartyKey")
+        .select("StateAb", "DivisionNm", "PartyAb", "From", "To", "Swing")
+        .sort("StateAb", "DivisionNm", "PartyAb")
+        .collect()
+    )
+
+
+def seat_changes(from_event, to_event, store_dir=STORE_DIR):
+    """Divisions whose winning party differs between the two elections."""
+    winners = scan_results(store_dir, [from_event, to_event]).filter(pl.col("Elected"))
+    before = winners.filter(pl.col("EventId") == from_event).select("DivisionKey", pl.col("PartyKey").alias("FromKey"))
+    after = winners.filter(pl.col("EventId") == to_event).select("DivisionKey", pl.col("PartyKey").alias("ToKey"))
+    parties = scan_index("parties", store_dir).select("PartyKey", "PartyAb")
+    return (
+        before.join(after, on="DivisionKey")
+        .filter(pl.col("FromKey") != pl.col("ToKey"))
+        .join(parties.rename({"PartyKey": "FromKey", "PartyAb": "From"}), on="FromKey")
+        .join(parties.rename({"PartyKey": "ToKey", "PartyAb": "To"}), on="ToKey")
+        .join(scan_index("divisions", store_dir), on="DivisionKey")
+        .select("StateAb", "DivisionNm", "From", "To")
+        .sort("StateAb", "DivisionNm")
+        .collect()
+    )
+
+
+if __name__ == "__main__":
+    command, args = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else (None, [])
+    if command == "build":
+        build(Path(args[0]) if args else DATASET_DIR, Path(args[1]) if len(args) > 1 else STORE_DIR)
+    elif command == "swing" and len(args) >= 2:
+        party = args[2] if len(args) > 2 else None
+        with pl.Config(tbl_rows=-1):
+            print(division_swings(int(args[0]), int(args[1]), party, Path(args[3]) if len(args) > 3 else STORE_DIR))
+    elif command == "changes" and len(args) >= 2:
+        with pl.Config(tbl_rows=-1):
+            print(seat_changes(int(args[0]), int(args[1]), Path(args[2]) if len(args) > 2 else STORE_DIR))
+    else:
+        sys.exit(__doc__.split("\n\n")[1])
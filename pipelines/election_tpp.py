@@ -0,0 +1,75 @@
+"""Pre-aggregate two-party-preferred (Labor v Coalition) votes by division and vote type.
+
+    python -m pipelines.election_tpp [output_path]
+
+Reads HouseTppByDivisionByVoteTypeDownload-*.csv (one row per division,
+Labor and Coalition votes for each vote type) and checks its totals
+against HouseTppByDivisionDownload-*.csv. Writes one .npz of plain typed
+arrays:
+
+* states, divisions - names; divisions are sorted by state and
+  division_state gives each division's state index.
+* vote_types - Ordinary, Absent, Provisional, DeclarationPrePoll, Postal.
+* alp_votes, coalition_votes - (divisions, vote_types) int32.
+* swing - the published TPP swing to Labor per division, in points.
+
+Swing scenarios over these arrays are in dash_app.election_swing.
+"""
+import os
+import sys
+from pathlib import Path
+import numpy as np
+import polars as pl
+
+RAW_DIR = Path("raw_data/election-preferences")
+DIVISION_PATTERN = "HouseTppByDivisionDownload-*.csv"
+VOTE_TYPE_PATTERN = "HouseTppByDivisionByVoteTypeDownload-*.csv"
+OUTPUT_PATH = Path(os.getenv("ELECTION_TPP_PATH", "dash_app/election_map/tpp_by_division.npz"))
+
+VOTE_TYPES = ["Ordinary", "Absent", "Provisional", "DeclarationPrePoll", "Postal"]
+ALP = "Australian Labor Party"
+COALITION = "Liberal/National Coalition"
+
+
+def build_tpp(division_file, vote_type_file):
+    divisions = pl.read_csv(division_file, skip_rows=1).select("DivisionID", "TotalVotes", "Swing")
+    by_type = (
+        pl.read_csv(vote_type_file, skip_rows=1)
+        .join(divisions, on="DivisionID", suffix="Division")
+        .sort("StateAb", "DivisionNm")
+    )
+    alp_votes = by_type.select(f"{ALP} {t}Votes" for t in VOTE_TYPES).to_numpy().astype(np.int32)
+    coalition_votes = by_type.select(f"{COALITION} {t}Votes" for t in VOTE_TYPES).to_numpy().astype(np.int32)
+    totals = alp_votes.sum(axis=1, dtype=np.int64) + coalition_votes.sum(axis=1, dtype=np.int64)
+    mismatched = by_type.filter(totals != by_type["TotalVotesDivision"].to_numpy())["DivisionNm"].to_list()
+    if mismatched:
+        raise ValueError(f"Vote type totals differ from the division totals in {', '.join(mismatched)}")
+
+    states = by_type["StateAb"].unique(maintain_order=True).to_list()
+    return {
+        "states": np.array(states, dtype=str),
+        "divisions": np.array(by_type["DivisionNm"].to_list(), dtype=str),
+        "division_state": by_type["StateAb"].replace_strict({s: i for i, s in enumerate(states)}).to_numpy().astype(np.int8),
+        "vote_types": np.array(VOTE_TYPES, dtype=str),
+        "alp_votes": alp_votes,
+        "coalition_votes": coalition_votes,
+        "swing": by_type["Swing"].to_numpy().astype(np.float32),
+    }
+
+
+def write_tpp(tpp, output_path=OUTPUT_PATH):
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f"{output_path.stem}.tmp-{os.getpid()}.npz")
+    np.savez_compressed(tmp_path, **tpp)
+    os.replace(tmp_path, output_path)
+
+
+if __name__ == "__main__":
+    division_files, vote_type_files = sorted(RAW_DIR.glob(DIVISION_PATTERN)), sorted(RAW_DIR.glob(VOTE_TYPE_PATTERN))
+    if not division_files or not vote_type_files:
+        sys.exit(f"No {DIVISION_PATTERN} and {VOTE_TYPE_PATTERN} files under {RAW_DIR}")
+    tpp = build_tpp(division_files[-1], vote_type_files[-1])
+    output_path = Path(sys.argv[1]) if len(sys.argv) > 1 else OUTPUT_PATH
+    write_tpp(tpp, output_path)
+    print(f"{len(tpp['divisions'])} divisions, {len(tpp['vote_types'])} vote types -> {output_path}")
@@ -0,0 +1,131 @@
+"""Build the state population marts from the ABS workbooks converted by pipelines.abs_workbooks.
+
+    python -m pipelines.population_marts [abs_dir] [output_dir]
+
+Two marts are written, as australia.<mart>.parquet for the local data
+backend.
+
+au_state_population_mart has one row per state (and AUS) per calendar
+year: population is the December quarter ERP from table 4 (310104),
+natural_increase, net_overseas_migration and net_interstate_migration are
+the sums of that year's quarters from table 2 (310102); years without all
+four quarters are left out. Table 2 has no state births or deaths, so
+natural increase stands in for them at state level.
+
+au_state_age_population_mart is the June ERP by state (and AUS), sex and
+single year of age from tables 51-59, age 100 standing for 100 and over.
+"""
+import os
+import sys
+from pathlib import Path
+import polars as pl
+from pipelines.abs_workbooks import OUTPUT_DIR as ABS_DIR, scan_workbooks
+
+MARTS_DIR = Path(os.getenv("LOCAL_DATA_DIR", os.path.join("data", "marts")))
+MART = "au_state_population_mart"
+AGE_MART = "au_state_age_population_mart"
+
+STATES = {
+    "Australia": "AUS",
+    "New South Wales": "NSW",
+    "Victoria": "VIC",
+    "Queensland": "QLD",
+    "South Australia": "SA",
+    "Western Australia": "WA",
+    "Tasmania": "TAS",
+    "Northern Territory": "NT",
+    "Australian Capital Territory": "ACT",
+}
+
+# Tables 51-59 give ERP by sex and single year of age, one state per workbook.
+AGE_WORKBOOKS = {
+    "3101051.xlsx": "NSW",
+    "3101052.xlsx": "VIC",
+    "3101053.xlsx": "QLD",
+    "3101054.xlsx": "SA",
+    "3101055.xlsx": "WA",
+    "3101056.xlsx": "TAS",
+    "3101057.xlsx": "NT",
+    "3101058.xlsx": "ACT",
+    "3101059.xlsx": "AUS",
+}
+
+# Leading parts of the series description -> mart column.
+FLOWS = {
+    "Natural Increase": "natural_increase",
+    "Net Overseas Migration": "net_overseas_migration",
+    "Net Interstate Migration": "net_interstate_migration",
+}
+POPULATION = "Estimated Resident Population ;  Persons"
+
+
+def region(description):
+    return description.str.strip_chars(" ;").str.split(";").list.last().str.strip_chars()
+
+
+def state_population_mart(series):
+    """The mart from the tidy ABS series (see pipelines.abs_workbooks.SCHEMA)."""
+    series = (
+        series.filter(pl.col("SeriesType") == "Original")
+        # Table 1 repeats the national series of table 2 rounded to thousands;
+        # keep the series counted in persons.
+        .sort(pl.col("Unit") == "000")
+        .unique(["Description", "Date"], keep="first", maintain_order=True)
+        .with_columns(region(pl.col("Description")).replace_strict(STATES, default=None).alias("state"),
+                      pl.col("Date").dt.year().alias("year"))
+        .filter(pl.col("state").is_not_null())
+    )
+    population = (
+        series.filter(pl.col("Description").str.starts_with(POPULATION) & (pl.col("Date").dt.month() == 12))
+        .select("state", "year", pl.col("Value").cast(pl.Int64).alias("population"))
+    )
+    flows = (
+        series.with_columns(pl.col("Description").str.split(";").list.first().str.strip_chars().alias("measure"))
+        .filter(pl.col("measure").is_in(list(FLOWS)))
+        .group_by("state", "year", "measure")
+        .agg(pl.col("Value").sum(), pl.len().alias("quarters"))
+        .filter(pl.col("quarters") == 4)
+        .collect()
+        .pivot("measure", index=["state", "year"], values="Value")
+        .rename(FLOWS, strict=False)
+        .lazy()
+    )
+    return (
+        population.join(flows, on=["state", "year"], how="full", coalesce=True)
+        .select("state", "year", "population", *(pl.col(c).cast(pl.Int64) for c in FLOWS.values()))
+        .sort("state", "year")
+        .collect()
+    )
+
+
+def state_age_population_mart(series):
+    """ERP by state, sex and age from the tidy ABS series of tables 51-59."""
+    parts = pl.col("Description").str.split(";").list.eval(pl.element().str.strip_chars())
+    return (
+        series.filter(pl.col("Workbook").is_in(list(AGE_WORKBOOKS)))
+        .with_columns(parts.list.get(1).alias("sex"), parts.list.get(2).alias("age"))
+        .filter(pl.col("sex").is_in(["Male", "Female"]))
+        .select(
+            pl.col("Workbook").replace_strict(AGE_WORKBOOKS).alias("state"),
+            pl.col("Date").dt.year().alias("year"),
+            "sex",
+            pl.col("age").str.extract(r"^(\d+)").cast(pl.Int16).alias("age"),
+            pl.col("Value").cast(pl.Int64).alias("population"),
+        )
+        .sort("state", "year", "sex", "age")
+        .collect()
+    )
+
+
+def write_mart(mart, name=MART, output_dir=MARTS_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    mart.write_parquet(Path(output_dir) / f"australia.{name}.parquet")
+    print(f"{name}: {mart.height:,} rows")
+
+
+if __name__ == "__main__":
+    abs_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else ABS_DIR
+    output_dir = Path(sys.argv[2]) if len(sys.argv) > 2 else MARTS_DIR
+    series = scan_workbooks(abs_dir)
+    write_mart(state_population_mart(series), MART, output_dir)
+    write_mart(state_age_population_mart(series), AGE_MART, output_dir)
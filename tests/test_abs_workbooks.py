@@ -0,0 +1,158 @@
+import json
+import zipfile
+from datetime import date
+from xml.sax.saxutils import escape
+import fastexcel
+import polars as pl
+from pipelines.abs_workbooks import SCHEMA, convert_all, scan_workbooks, series_header, tidy_sheet
+
+LABELS = [None, "Unit", "Series Type", "Data Type", "Frequency", "Collection Month", "Series Start", "Series End",
+          "No. Obs", "Series ID"]
+DATES = [date(2024, 3, 1), date(2024, 6, 1), date(2024, 9, 1)]
+
+
+def data_sheet(births, deaths):
+    """A Data1 sheet in the ABS time series layout, with a blank spacer column between the two series."""
+    header = [
+        ["Births ;  New South Wales ;", "Unit Persons", None, "Deaths ;  New South Wales ;"],
+        ["Number", None, None, "Number"],
+        ["Original", None, None, "Original"],
+        ["FLOW", None, None, "FLOW"],
+        ["Quarter", None, None, "Quarter"],
+        ["3", None, None, "3"],
+        ["Mar-2024", None, None, "Mar-2024"],
+        ["Sep-2024", None, None, "Sep-2024"],
+        ["3", None, None, "3"],
+        ["A2133251W", None, None, "A2133252X"],
+    ]
+    rows = [[label, header[i][0], header[i][2], header[i][3]] for i, label in enumerate(LABELS)]
+    rows[0][2] = None
+    return rows + [[d, b, None, x] for d, b, x in zip(DATES, births, deaths)]
+
+
+def cell(ref, value):
+    if value is None:
+        return ""
+    if isinstance(value, date):
+        return f'<c r="{ref}" s="1"><v>{(value - date(1899, 12, 30)).days}</v></c>'
+    if isinstance(value, str):
+        return f'<c r="{ref}" t="inlineStr"><is><t>{escape(value)}</t></is></c>'
+    return f'<c r="{ref}"><v>{value}</v></c>'
+
+
+def write_workbook(path, sheets):
+    """A minimal .xlsx written with zipfile: inline strings, numbers, and dates in a date-formatted style."""
+    def worksheet(rows):
+        xml_rows = "".join(
+            f'<row r="{r}">' + "".join(cell(f"{chr(65 + c)}{r}", v) for c, v in enumerate(row)) + "</row>"
+            for r, row in enumerate(rows, 1))
+        return ('<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                f"<sheetData>{xml_rows}</sheetData></worksheet>")
+
+    main = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    relationships = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+    package = "http://schemas.openxmlformats.org/package/2006/relationships"
+    names = list(sheets)
+    with zipfile.ZipFile(path, "w") as xlsx:
+        xlsx.writestr("[Content_Types].xml", (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + "".join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                      'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                      for i in range(1, len(names) + 1))
+            + "</Types>"))
+        xlsx.writestr("_rels/.rels", (
+            f'<Relationships xmlns="{package}">'
+            f'<Relationship Id="rId1" Type="{relationships}/officeDocument" Target="xl/workbook.xml"/>'
+            "</Relationships>"))
+        xlsx.writestr("xl/workbook.xml", (
+            f'<workbook xmlns="{main}" xmlns:r="{relationships}"><sheets>'
+            + "".join(f'<sheet name="{escape(name)}" sheetId="{i}" r:id="rId{i}"/>' for i, name in enumerate(names, 1))
+            + "</sheets></workbook>"))
+        xlsx.writestr("xl/_rels/workbook.xml.rels", (
+            f'<Relationships xmlns="{package}">'
+            + "".join(f'<Relationship Id="rId{i}" Type="{relationships}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                      for i in range(1, len(names) + 1))
+            + f'<Relationship Id="rId{len(names) + 1}" Type="{relationships}/styles" Target="styles.xml"/>'
+            "</Relationships>"))
+        xlsx.writestr("xl/styles.xml", (
+            f'<styleSheet xmlns="{main}">'
+            '<fonts count="1"><font/></fonts><fills count="1"><fill/></fills><borders count="1"><border/></borders>'
+            '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+            '<cellXfs count="2"><xf numFmtId="0"/><xf numFmtId="14" applyNumberFormat="1"/></cellXfs>'
+            "</styleSheet>"))
+        for i, name in enumerate(names, 1):
+            xlsx.writestr(f"xl/worksheets/sheet{i}.xml", worksheet(sheets[name]))
+
+
+def test_series_header_maps_the_labelled_rows():
+    header = pl.DataFrame([[row[c] for row in data_sheet([1], [2])[:10]] for c in range(4)],
+                          schema=["label", "a", "spacer", "b"], orient="col")
+    series = series_header(header)
+    assert series["Column"].to_list() == ["a", "b"]
+    assert series["Description"].to_list() == ["Births ;  New South Wales ;", "Deaths ;  New South Wales ;"]
+    assert series["SeriesId"].to_list() == ["A2133251W", "A2133252X"]
+    assert series.row(0, named=True) | {"Column": None} == {
+        "Column": None, "Description": "Births ;  New South Wales ;", "Unit": "Number", "SeriesType": "Original",
+        "DataType": "FLOW", "Frequency": "Quarter", "SeriesId": "A2133251W",
+    }
+
+
+def test_tidy_sheet_melts_and_casts(tmp_path):
+    path = tmp_path / "310102.xlsx"
+    write_workbook(path, {"Data1": data_sheet([25000, 25500.5, None], [14000, 13900, 14100])})
+    table = tidy_sheet(fastexcel.read_excel(path), "310102.xlsx", "Data1")
+    assert table.schema == pl.Schema(SCHEMA)
+    # One row per series per date; the missing birth count is dropped.
+    assert table.height == 5
+    births = table.filter(pl.col("SeriesId") == "A2133251W").sort("Date")
+    assert births["Date"].to_list() == DATES[:2]
+    assert births["Value"].to_list() == [25000.0, 25500.5]
+    assert set(table["Workbook"]) == {"310102.xlsx"} and set(table["Sheet"]) == {"Data1"}
+    assert set(table["Unit"]) == {"Number"} and set(table["Frequency"]) == {"Quarter"}
+
+
+def parquet_files(output_dir):
+    return sorted(p.name for p in output_dir.glob("*.parquet"))
+
+
+def test_convert_all_skips_unchanged_replaces_stale_and_prunes_deleted(tmp_path):
+    raw, output = tmp_path / "raw", tmp_path / "abs"
+    raw.mkdir()
+    write_workbook(raw / "310102.xlsx", {"Contents": [["Contents"]], "Data1": data_sheet([1, 2, 3], [4, 5, 6])})
+    write_workbook(raw / "33010DC03.xlsx", {"Table 1": [["Place of Usual Residence", None, "2011"],
+                                                        ["LGA Code 2024", "LGA Name 2024", "persons"],
+                                                        ["10050", "Albury", "49451"]]})
+
+    assert convert_all(raw, output, workers=1) == (["310102.xlsx", "33010DC03.xlsx"], [])
+    manifest = json.loads((output / "manifest.json").read_text())
+    [first] = parquet_files(output)
+    assert manifest["310102.xlsx"]["parquet"] == first and first.startswith("310102-")
+    assert manifest["310102.xlsx"]["sheets"] == ["Data1"] and manifest["310102.xlsx"]["rows"] == 6
+    assert manifest["33010DC03.xlsx"] == {"sha256": manifest["33010DC03.xlsx"]["sha256"], "parquet": None,
+                                          "skipped": "no time series sheets"}
+    written = (output / first).stat().st_mtime_ns
+
+    # Nothing changed: neither workbook is parsed again.
+    assert convert_all(raw, output, workers=1) == ([], ["310102.xlsx", "33010DC03.xlsx"])
+    assert (output / first).stat().st_mtime_ns == written
+
+    # New content: a new Parquet file replaces the old one.
+    write_workbook(raw / "310102.xlsx", {"Data1": data_sheet([1, 2, 30], [4, 5, 6])})
+    assert convert_all(raw, output, workers=1) == (["310102.xlsx"], ["33010DC03.xlsx"])
+    [second] = parquet_files(output)
+    assert second != first
+    assert scan_workbooks(output).filter(pl.col("Date") == DATES[2]).collect()["Value"].sort().to_list() == [6.0, 30.0]
+
+    # Deleted workbooks leave the manifest, with their Parquet files.
+    (raw / "310102.xlsx").unlink()
+    (raw / "33010DC03.xlsx").unlink()
+    assert convert_all(raw, output, workers=1) == ([], [])
+    assert json.loads((output / "manifest.json").read_text()) == {}
+    assert parquet_files(output) == []
+    assert scan_workbooks(output).collect().height == 0
@@ -0,0 +1,35 @@
+import json
+from dash_app.build_map_levels import MAP_LEVELS, build, map_level
+
+
+def square(x, y, size=1.0):
+    return {"type": "Polygon", "coordinates": [[[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]]}
+
+
+def test_build_from_geojson(tmp_path):
+    features = [
+        {"type": "Feature", "properties": {"CED_NAME25": name, "STE_NAME21": state, "AREA_SQKM": 1.0}, "geometry": geometry}
+        for name, state, geometry in [
+            ("Banks", "New South Wales", square(150.0, -34.0)),
+            ("Barton", "New South Wales", square(151.0, -34.0)),
+            ("Canberra", "Australian Capital Territory", square(149.0, -35.5, 0.5)),
+        ]
+    ]
+    source = tmp_path / "cec_districts_map.geojson"
+    source.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+
+    build(str(source), str(tmp_path / "levels"))
+
+    for level in MAP_LEVELS:
+        nsw = json.loads((tmp_path / "levels" / f"z{level}" / "NSW.json").read_text())
+        act = json.loads((tmp_path / "levels" / f"z{level}" / "ACT.json").read_text())
+        assert [f["properties"] for f in nsw["features"]] == [{"CED_NAME25": "Banks"}, {"CED_NAME25": "Barton"}]
+        assert [f["properties"]["CED_NAME25"] for f in act["features"]] == ["Canberra"]
+        assert nsw["features"][0]["geometry"]["type"] == "Polygon"
+
+
+def test_map_level_picks_the_most_detailed_level_for_the_zoom():
+    assert map_level(4) == 4
+    assert map_level(7) == 6
+    assert map_level(12) == 9
+    assert map_level(1) == min(MAP_LEVELS)
@@ -0,0 +1,106 @@
+import threading
+import time
+from dash_app.cache import RefreshingCache
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_dependency_checks_are_not_counted_as_hits():
+    loads = []
+    source = RefreshingCache("test_source", lambda: loads.append(1) or len(loads), ttl=None)
+    combined = RefreshingCache("test_combined", lambda: source() * 10, ttl=None, depends_on=[source])
+    assert [combined() for _ in range(3)] == [10, 10, 10]
+    assert (combined.hits, combined.misses) == (2, 1)
+    # Only combined's own load called source(), after the dependency check had loaded it.
+    assert (source.hits, source.misses) == (1, 0)
+    assert len(loads) == 1
+
+
+def test_new_dependency_value_rebuilds_the_dependant():
+    values = iter([1, 2])
+    source = RefreshingCache("test_source", lambda: next(values), ttl=None)
+    combined = RefreshingCache("test_combined", lambda: source() * 10, ttl=None, depends_on=[source])
+    assert combined() == 10
+    source.cache_clear()
+    assert source() == 2
+    # Served stale while the rebuild runs in the background.
+    assert combined() == 10
+    wait_for(lambda: combined.refreshes == 1)
+    assert combined() == 20
+
+
+def test_expired_value_is_served_while_the_refresh_runs():
+    release = threading.Event()
+    values = iter([1, 2])
+
+    def load():
+        value = next(values)
+        if value == 2:
+            release.wait(5)
+        return value
+
+    cache = RefreshingCache("test_swr", load, ttl=0.05)
+    assert cache() == 1
+    time.sleep(0.06)
+    started = time.monotonic()
+    assert cache() == 1
+    assert time.monotonic() - started < 0.5
+    # The refresh is held in load(); callers keep getting the old value.
+    assert cache() == 1 and cache.refreshes == 0
+    release.set()
+    wait_for(lambda: cache.refreshes == 1)
+    assert cache() == 2
+    assert cache.generation == 2
+
+
+def test_unchanged_version_only_restamps_the_entry():
+    loads, versions = [], ["v1"]
+    cache = RefreshingCache("test_version", lambda: loads.append(1) or len(loads), ttl=0.01,
+                            version=lambda: versions[-1])
+    assert cache() == 1
+    checked_at = cache._entry["checked_at"]
+    time.sleep(0.02)
+    cache()
+    wait_for(lambda: cache._entry["checked_at"] > checked_at)
+    assert cache._entry["checked_at"] > checked_at
+    assert (len(loads), cache.refreshes, cache.generation) == (1, 0, 1)
+
+    versions.append("v2")
+    time.sleep(0.02)
+    cache()
+    wait_for(lambda: cache.refreshes == 1)
+    assert cache() == 2
+    assert cache._entry["version"] == "v2"
+    assert len(loads) == 2
+
+
+def test_concurrent_cold_calls_load_once():
+    loads = []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.2)
+        return "value"
+
+    cache = RefreshingCache("test_single_flight", load, ttl=None)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(loads) == 1
+    assert results == ["value"] * 8
+
+
+def test_refresh_after_clear_leaves_the_cache_empty():
+    cache = RefreshingCache("test_cleared", lambda: 1, ttl=None)
+    cache()
+    cache.cache_clear()
+    cache._refresh()
+    assert cache._entry is None and cache.refreshes == 0
+    assert cache() == 1
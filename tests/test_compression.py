@@ -0,0 +1,36 @@
+import gzip
+import json
+import pytest
+from flask import Flask, jsonify
+from dash_app import compression
+
+BODY = {"values": list(range(1000))}
+
+
+@pytest.fixture
+def client():
+    server = Flask(__name__)
+
+    @server.route("/data", methods=["GET", "POST"])
+    def data():
+        return jsonify(BODY)
+
+    compression.install(server)
+    return server.test_client()
+
+
+def test_get_is_compressed_and_revalidated(client):
+    response = client.get("/data", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.get_data())) == BODY
+    revalidated = client.get("/data", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+def test_post_is_compressed_but_never_304(client):
+    etag = client.get("/data", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+    for _ in range(2):
+        response = client.post("/data", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert response.status_code == 200
+        assert "ETag" not in response.headers
+        assert json.loads(gzip.decompress(response.get_data())) == BODY
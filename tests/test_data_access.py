@@ -0,0 +1,104 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from dash_app.data_access import BigQueryBackend, DataBackend, LocalParquetBackend
+
+TABLE_ID = "australia.au_first_count_results_mart"
+
+
+@pytest.fixture
+def local_backend(tmp_path):
+    table = pa.table({
+        "StateAb": ["NSW", "VIC", "NSW", "QLD"],
+        "DivisionNm": ["Banks", "Bendigo", "Barton", "Blair"],
+        "Votes": [120, 95, 80, 101],
+        "Victorious": ["Y", "N", "Y", "Y"],
+    })
+    pq.write_table(table, tmp_path / f"{TABLE_ID}.parquet")
+    return LocalParquetBackend(str(tmp_path))
+
+
+def test_read_table_matches_query(local_backend):
+    columns = ["StateAb", "DivisionNm", "Votes"]
+    selected = local_backend.read_table(TABLE_ID, columns, "Victorious = 'Y'")
+    queried = local_backend.query(TABLE_ID, f"SELECT StateAb, DivisionNm, Votes FROM `{TABLE_ID}` WHERE Victorious = 'Y'")
+    assert selected.equals(queried)
+    assert selected.column("DivisionNm").to_pylist() == ["Banks", "Barton", "Blair"]
+
+
+def test_read_table_without_filter_keeps_every_row(local_backend):
+    assert local_backend.read_table(TABLE_ID, ["Votes"]).column("Votes").to_pylist() == [120, 95, 80, 101]
+
+
+def test_incomplete_backend_fails_when_instantiated():
+    class NoVersion(DataBackend):
+        def query(self, table_id, sql):
+            return None
+
+        def read_table(self, table_id, columns, row_filter=None):
+            return None
+
+    with pytest.raises(TypeError, match="table_version"):
+        NoVersion()
+
+
+class FakePage:
+    def __init__(self, batch):
+        self.batch = batch
+
+    def to_arrow(self):
+        return self.batch
+
+
+class FakeReadClient:
+    """Stand-in for BigQueryReadClient serving fixed record batches, one page per batch."""
+
+    def __init__(self, schema, streams):
+        self.schema = schema
+        self.streams = streams
+        self.sessions = []
+
+    def create_read_session(self, parent, read_session):
+        self.sessions.append((parent, read_session))
+        session = type("Session", (), {})()
+        session.arrow_schema = type("ArrowSchema", (), {"serialized_schema": self.schema.serialize().to_pybytes()})()
+        session.streams = [type("Stream", (), {"name": name})() for name in self.streams]
+        return session
+
+    def read_rows(self, name):
+        pages = [FakePage(batch) for batch in self.streams[name]]
+        reader = type("Reader", (), {})()
+        reader.rows = lambda session: type("Rows", (), {"pages": pages})()
+        return reader
+
+
+def test_stream_table_assembles_batches_and_schema():
+    schema = pa.schema([("Votes", pa.int64()), ("DivisionNm", pa.string())])
+    batch = lambda votes, names: pa.record_batch([pa.array(votes), pa.array(names)], schema=schema)
+    read_client = FakeReadClient(schema, {
+        "stream-0": [batch([1, 2], ["Banks", "Barton"]), batch([3], ["Blair"])],
+        "stream-1": [batch([4], ["Bendigo"])],
+    })
+    backend = BigQueryBackend.__new__(BigQueryBackend)
+    backend.client = type("Client", (), {"project": "demo"})()
+    backend._read_client = read_client
+
+    table = backend.stream_table(TABLE_ID, ["DivisionNm", "Votes"], "Votes > 0")
+
+    assert table.column_names == ["DivisionNm", "Votes"]
+    assert table.column("Votes").to_pylist() == [1, 2, 3, 4]
+    assert table.schema.field("Votes").type == pa.int64()
+    parent, read_session = read_client.sessions[0]
+    assert parent == "projects/demo"
+    assert read_session.table == "projects/demo/datasets/australia/tables/au_first_count_results_mart"
+    assert list(read_session.read_options.selected_fields) == ["DivisionNm", "Votes"]
+    assert read_session.read_options.row_restriction == "Votes > 0"
+
+
+def test_stream_table_with_no_streams_is_empty():
+    schema = pa.schema([("Votes", pa.int64())])
+    backend = BigQueryBackend.__new__(BigQueryBackend)
+    backend.client = type("Client", (), {"project": "demo"})()
+    backend._read_client = FakeReadClient(schema, {})
+    table = backend.stream_table(TABLE_ID, ["Votes"])
+    assert table.num_rows == 0 and table.schema == schema
@@ -0,0 +1,62 @@
+import polars as pl
+from pipelines.election_distribution import SCHEMA, csv_files, ingest, scan_dataset, scan_distribution
+
+COLUMNS = list(SCHEMA)
+
+
+def dop_row(state, division_id, division, candidate, calculation, value):
+    values = [state, division_id, division, 1, "Hall", 0, candidate, 100 + candidate, "SMITH", "Ann", "ALP",
+              "Australian Labor Party", "N", calculation, value]
+    return ",".join(f'"{v}"' for v in values)
+
+
+def write_dop(raw_dir, event_id, state, division_id, division, candidates=(1, 2)):
+    """One quoted DOP file with its banner line, named like the AEC downloads."""
+    path = raw_dir / state / f"HouseDopByPPDownload-{event_id}-{division_id}.csv"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = [dop_row(state, division_id, division, c, t, v) for c in candidates
+            for t, v in [("Preference Count", 10 * c), ("Preference Percent", 12.5)]]
+    path.write_text("\n".join([f"Distribution of Preferences by Polling Place [Event:{event_id}]",
+                               ",".join(f'"{c}"' for c in COLUMNS), *rows]) + "\n")
+
+
+def partitions(output_dir):
+    return sorted(str(p.parent.relative_to(output_dir)) for p in output_dir.rglob("*.parquet"))
+
+
+def test_scan_skips_the_banner_casts_and_tags_the_event(tmp_path):
+    write_dop(tmp_path, 31496, "VIC", 201, "Beta")
+    df = scan_distribution(csv_files(tmp_path)).collect()
+    assert df.height == 4
+    assert df.columns == [*SCHEMA, "EventId"]
+    assert all(df.schema[name] == dtype for name, dtype in SCHEMA.items())
+    assert df.schema["EventId"] == pl.Int32
+    assert df["EventId"].unique().to_list() == [31496]
+    assert df["CalculationValue"].to_list() == [10.0, 12.5, 20.0, 12.5]
+    assert df["CalculationType"].to_list()[:2] == ["Preference Count", "Preference Percent"]
+
+
+def test_reingesting_an_event_replaces_only_its_partitions(tmp_path):
+    raw, output = tmp_path / "raw", tmp_path / "dataset"
+    write_dop(raw, 100, "NSW", 101, "Alpha")
+    write_dop(raw, 200, "NSW", 101, "Alpha")
+    write_dop(raw, 200, "VIC", 201, "Beta")
+    assert ingest(raw, output) == 12
+    assert partitions(output) == [
+        "EventId=100/StateAb=NSW/DivisionId=101",
+        "EventId=200/StateAb=NSW/DivisionId=101",
+        "EventId=200/StateAb=VIC/DivisionId=201",
+    ]
+
+    # Event 200 again, now with only Beta and a third candidate.
+    again = tmp_path / "again"
+    write_dop(again, 200, "VIC", 201, "Beta", candidates=(1, 2, 3))
+    assert ingest(again, output) == 6
+    assert partitions(output) == [
+        "EventId=100/StateAb=NSW/DivisionId=101",
+        "EventId=200/StateAb=VIC/DivisionId=201",
+    ]
+    assert scan_dataset(output, 100).collect().height == 4
+    event_200 = scan_dataset(output, 200).collect()
+    assert event_200.height == 6 and "EventId" not in event_200.columns
+    assert sorted(event_200["CandidateId"].unique().to_list()) == [101, 102, 103]
@@ -0,0 +1,66 @@
+from dash_app.election_flows import entry_range, load_flows
+from pipelines.election_flows import build_flows, scan_flows, write_flows
+
+HEADER = ("StateAb,DivisionId,DivisionNm,PPId,PPNm,FromCandidateId,FromCandidatePartyAb,FromCandidatePartyNm,"
+          "FromCandidateSurname,FromCandidateGivenNm,FromCandidateBallotPosition,ToCandidateId,ToCandidatePartyAb,"
+          "ToCandidatePartyNm,ToCandidateSurname,ToCandidateGivenNm,ToCandidateBallotPosition,TransferCount,"
+          "TransferPercent")
+# FromCandidateId 0 is the finalist's own first preferences; candidate 4
+# has no party.
+DIVISIONS = {
+    "NSW-ALPH": [
+        '"NSW","101","Alpha","1","Hall","0","","","First Preferences","","0","1","ALP","Labor","A","A","1","100","55"',
+        '"NSW","101","Alpha","1","Hall","0","","","First Preferences","","0","2","LP","Liberal","B","B","2","80","45"',
+        '"NSW","101","Alpha","1","Hall","3","GRN","Greens","C","C","3","1","ALP","Labor","A","A","1","30","75"',
+        '"NSW","101","Alpha","1","Hall","3","GRN","Greens","C","C","3","2","LP","Liberal","B","B","2","10","25"',
+        '"NSW","101","Alpha","1","Hall","4","","","D","D","4","1","ALP","Labor","A","A","1","0","0"',
+        '"NSW","101","Alpha","1","Hall","4","","","D","D","4","2","LP","Liberal","B","B","2","5","100"',
+        '"NSW","101","Alpha","2","Annex","0","","","First Preferences","","0","1","ALP","Labor","A","A","1","20","100"',
+        '"NSW","101","Alpha","2","Annex","3","GRN","Greens","C","C","3","1","ALP","Labor","A","A","1","5","100"',
+    ],
+    "VIC-BETA": [
+        '"VIC","201","Beta","3","School","0","","","First Preferences","","0","5","LP","Liberal","E","E","1","50","45"',
+        '"VIC","201","Beta","3","School","0","","","First Preferences","","0","6","IND","Independent","F","F","2","60","55"',
+        '"VIC","201","Beta","3","School","7","ALP","Labor","G","G","3","5","LP","Liberal","E","E","1","5","17"',
+        '"VIC","201","Beta","3","School","7","ALP","Labor","G","G","3","6","IND","Independent","F","F","2","25","83"',
+    ],
+}
+
+
+def write_files(directory):
+    files = []
+    for division, rows in DIVISIONS.items():
+        path = directory / f"HouseTcpFlowByPPDownload-1-{division}.csv"
+        path.write_text("\n".join(["Two Candidate Preferred Flow of Preferences [banner]", HEADER, *rows]) + "\n")
+        files.append(path)
+    return files
+
+
+def entries(flows):
+    return list(zip(flows["from_party"].tolist(), flows["to_party"].tolist(),
+                    flows["transferred"].tolist(), flows["votes"].tolist()))
+
+
+def test_build_flows(tmp_path):
+    flows = build_flows(scan_flows(write_files(tmp_path)))
+    # Ordered by votes held after the count; parties holding none by abbreviation.
+    assert flows["parties"].tolist() == ["ALP", "LP", "IND", "GRN", "NAFD"]
+    assert flows["party_names"].tolist() == ["Labor", "Liberal", "Independent", "Greens", "NAFD"]
+    assert flows["states"].tolist() == ["NSW", "VIC"]
+    assert flows["divisions"].tolist() == ["Alpha", "Beta"]
+    assert flows["state_division_offsets"].tolist() == [0, 1, 2]
+    assert flows["division_entry_offsets"].tolist() == [0, 5, 9]
+    # Zero flows are dropped and polling places summed.
+    assert entries(flows) == [
+        (0, 0, False, 120), (1, 1, False, 80), (3, 0, True, 35), (3, 1, True, 10), (4, 1, True, 5),
+        (0, 1, True, 5), (0, 2, True, 25), (1, 1, False, 50), (2, 2, False, 60),
+    ]
+
+
+def test_entry_ranges_of_the_written_flows(tmp_path):
+    path = tmp_path / "flows.npz"
+    write_flows(build_flows(scan_flows(write_files(tmp_path))), path)
+    flows = load_flows(str(path))
+    assert entry_range(flows, division=1) == (5, 9)
+    assert entry_range(flows, state=0) == (0, 5)
+    assert entry_range(flows) == (0, 9)
@@ -0,0 +1,60 @@
+import numpy as np
+from dash_app.election_pyramid import drill_down, load_pyramid
+from pipelines.election_pyramid import build_pyramid, scan_first_preferences, write_pyramid
+
+HEADER = ("StateAb,DivisionID,DivisionNm,PollingPlaceID,PollingPlace,CandidateID,Surname,GivenNm,BallotPosition,"
+          "Elected,HistoricElected,PartyAb,PartyNm,OrdinaryVotes,Swing")
+# Rows without a PartyAb are the informal votes.
+ROWS = {
+    "NSW": [
+        "NSW,101,Alpha,1,Hall,11,SMITH,Ann,1,Y,N,ALP,Australian Labor Party,10,1.0",
+        "NSW,101,Alpha,1,Hall,12,JONES,Bob,2,N,N,LP,Liberal,20,-1.0",
+        "NSW,101,Alpha,1,Hall,999,Informal,,999,N,N,,,1,0.0",
+        "NSW,101,Alpha,2,Annex,11,SMITH,Ann,1,Y,N,ALP,Australian Labor Party,5,1.0",
+        "NSW,101,Alpha,2,Annex,13,BROWN,Cat,3,N,N,GRN,The Greens,7,0.5",
+        "NSW,102,Beta,3,Church,21,WHITE,Dan,1,Y,N,LP,Liberal,30,2.0",
+        "NSW,102,Beta,3,Church,22,GREEN,Eve,2,N,N,ALP,Australian Labor Party,1,-2.0",
+        "NSW,102,Beta,3,Church,999,Informal,,999,N,N,,,2,0.0",
+    ],
+    "VIC": [
+        "VIC,201,Gamma,4,School,31,BLACK,Fay,1,Y,N,ALP,Australian Labor Party,40,3.0",
+        "VIC,201,Gamma,4,School,32,GREY,Gus,2,N,N,GRN,The Greens,3,-3.0",
+    ],
+}
+
+
+def write_files(directory):
+    files = []
+    for state, rows in ROWS.items():
+        path = directory / f"HouseStateFirstPrefsByPollingPlaceDownload-1-{state}.csv"
+        path.write_text("\n".join([f"First Preferences By Polling Place for {state} [banner]", HEADER, *rows]) + "\n")
+        files.append(path)
+    return files
+
+
+def test_build_pyramid(tmp_path):
+    pyramid = build_pyramid(scan_first_preferences(write_files(tmp_path)))
+    assert pyramid["parties"].tolist() == ["ALP", "LP", "GRN"]
+    assert pyramid["states"].tolist() == ["NSW", "VIC"]
+    assert pyramid["divisions"].tolist() == ["Alpha", "Beta", "Gamma"]
+    assert pyramid["polling_places"].tolist() == ["Annex", "Hall", "Church", "School"]
+    assert pyramid["state_division_offsets"].tolist() == [0, 2, 3]
+    assert pyramid["division_place_offsets"].tolist() == [0, 2, 3, 4]
+    assert pyramid["place_votes"].tolist() == [[5, 0, 7], [10, 20, 0], [1, 30, 0], [40, 0, 3]]
+    assert pyramid["division_votes"].tolist() == [[15, 20, 7], [1, 30, 0], [40, 0, 3]]
+    assert pyramid["state_votes"].tolist() == [[16, 50, 7], [40, 0, 3]]
+    assert pyramid["national_votes"].tolist() == [56, 50, 10]
+    assert pyramid["place_informal"].tolist() == [0, 1, 2, 0]
+    assert pyramid["division_informal"].tolist() == [1, 2, 0]
+    assert pyramid["state_informal"].tolist() == [3, 0]
+    assert int(pyramid["national_informal"]) == 3
+
+
+def test_drill_down_reads_the_written_pyramid(tmp_path):
+    path = tmp_path / "pyramid.npz"
+    write_pyramid(build_pyramid(scan_first_preferences(write_files(tmp_path))), path)
+    pyramid = load_pyramid(str(path))
+    node = drill_down(pyramid, state=0)
+    assert node["name"] == "NSW" and node["child_level"] == "division"
+    assert node["children"].tolist() == ["Alpha", "Beta"]
+    assert np.array_equal(node["child_votes"], [[15, 20, 7], [1, 30, 0]])
@@ -0,0 +1,129 @@
+import re
+import sqlite3
+from pathlib import Path
+import polars as pl
+import pytest
+from pipelines.election_distribution import SCHEMA
+from pipelines.election_results import compare_marts, compute_marts, row_number, sql_rank
+
+MODELS_DIR = Path(__file__).parent.parent / "australia_analytics" / "models"
+
+# dbt models in dependency order; each becomes a SQLite table of the same name.
+MODELS = [
+    "staging/stg_election_distribution",
+    "marts/au_election_candidates",
+    "intermediate/au_first_count_results_int",
+    "marts/au_election_results_mart",
+    "marts/au_election_final_results_mart",
+    "marts/au_first_count_results_mart",
+    "marts/au_election_result_summary",
+    "marts/au_first_preference_results_mart",
+]
+
+DIVISIONS = {101: ("NSW", "Alpha"), 201: ("VIC", "Beta")}
+POLLING_PLACES = {1001: (101, "Hall"), 1002: (101, "School"), 2001: (201, "Church")}
+CANDIDATES = {
+    11: (101, 1, "Smith", "Ann", "ALP", "Australian Labor Party", "Y"),
+    12: (101, 2, "Jones", "Bob", "LP", "Liberal", "N"),
+    13: (101, 3, "Brown", "Cat", "GRN", "The Greens", "N"),
+    21: (201, 1, "White", "Dan", "ALP", "Australian Labor Party", "N"),
+    22: (201, 2, "Green", "Eve", "LP", "Liberal", "Y"),
+}
+# (polling place, count, candidate) -> (Preference Count, Transfer Count).
+# At the Hall's first count Jones and Brown tie, so RANK() gives 1, 3, 3
+# over the two count rows each candidate has there. Beta has one count,
+# so its first round is also its last.
+COUNTS = {
+    (1001, 0, 11): (50, 0), (1001, 0, 12): (30, 0), (1001, 0, 13): (30, 0),
+    (1001, 1, 11): (65, 15), (1001, 1, 12): (45, 15), (1001, 1, 13): (0, -30),
+    (1002, 0, 11): (20, 0), (1002, 0, 12): (35, 0), (1002, 0, 13): (10, 0),
+    (1002, 1, 11): (28, 8), (1002, 1, 12): (37, 2), (1002, 1, 13): (0, -10),
+    (2001, 0, 21): (40, 0), (2001, 0, 22): (55, 0),
+}
+
+
+def dop_rows():
+    rows = []
+    for (pp, count, candidate), (preference, transfer) in COUNTS.items():
+        division, pp_name = POLLING_PLACES[pp]
+        state, division_name = DIVISIONS[division]
+        _, ballot, surname, given, party_ab, party_nm, sitting = CANDIDATES[candidate]
+        # The Percent rows must be left out of every sum.
+        for calculation, value in [("Preference Count", preference), ("Preference Percent", 99.9),
+                                   ("Transfer Count", transfer), ("Transfer Percent", -99.9)]:
+            rows.append({
+                "StateAb": state, "DivisionId": division, "DivisionNm": division_name, "PPId": pp, "PPNm": pp_name,
+                "CountNum": count, "BallotPosition": ballot, "CandidateId": candidate, "Surname": surname,
+                "GivenNm": given, "PartyAb": party_ab, "PartyNm": party_nm, "SittingMemberFl": sitting,
+                "CalculationType": calculation, "CalculationValue": float(value),
+            })
+    return pl.DataFrame(rows)
+
+
+def model_sql(model):
+    sql = (MODELS_DIR / f"{model}.sql").read_text()
+    sql = re.sub(r"""\{\{\s*ref\(\s*['"](\w+)['"]\s*\)\s*\}\}""", r"\1", sql)
+    sql = re.sub(r"\{\{\s*source\([^)]*\)\s*\}\}", "election_distributions_by_poll_place", sql)
+    sql = re.sub(r"`australia\.(\w+)`", r"\1", sql)
+    # BigQuery resolves a final ORDER BY against the select list, SQLite
+    # calls it ambiguous; row order is not compared anyway.
+    return re.sub(r"^ORDER BY [^()]*\Z", "", sql, flags=re.MULTILINE)
+
+
+def sql_marts(dop):
+    """Every mart, computed by running the dbt models themselves in SQLite."""
+    connection = sqlite3.connect(":memory:")
+    connection.execute(f"CREATE TABLE election_distributions_by_poll_place ({', '.join(dop.columns)})")
+    connection.executemany(f"INSERT INTO election_distributions_by_poll_place VALUES ({', '.join('?' * dop.width)})",
+                           dop.rows())
+    for model in MODELS:
+        connection.execute(f"CREATE TABLE {Path(model).name} AS {model_sql(model)}")
+    marts = {}
+    for model in MODELS:
+        name = Path(model).name
+        if name.startswith("au_") and name.endswith(("_mart", "_summary")):
+            cursor = connection.execute(f"SELECT * FROM {name}")
+            columns = [c[0] for c in cursor.description]
+            marts[name] = pl.DataFrame(cursor.fetchall(), schema=columns, orient="row")
+    return marts
+
+
+@pytest.fixture(scope="module")
+def marts():
+    dop = dop_rows()
+    distribution = dop.lazy().with_columns(pl.col(name).cast(dtype) for name, dtype in SCHEMA.items())
+    return compute_marts(distribution), sql_marts(dop)
+
+
+def test_marts_match_the_sql_models(marts):
+    computed, expected = marts
+    assert set(computed) == set(expected)
+    assert compare_marts(computed, expected) == []
+
+
+def test_first_round_ranks_count_tied_rows_like_sql_rank(marts):
+    results = marts[0]["au_election_results_mart"].filter(pl.col("PPId") == 1001).sort("CandidateId")
+    assert results["FirstRoundRanking"].to_list() == [1, 3, 3]
+    assert results["LastRoundRanking"].to_list() == [1, 3, 5]
+
+
+def test_winners_and_summary(marts):
+    final = marts[0]["au_election_final_results_mart"]
+    assert final.filter(pl.col("Victorious") == "Y")["CandidateId"].to_list() == [11, 22]
+    assert final.filter(pl.col("CandidateId") == 11)["NumberOfVotes"].to_list() == [116]
+    summary = marts[0]["au_election_result_summary"]
+    assert summary.rows() == [("ALP", 1), ("LP", 1)]
+
+
+def test_sql_rank_ties_share_a_rank_and_skip_the_tied_rows():
+    df = pl.DataFrame({"Key": [1, 1, 1, 1, 2], "Value": [5.0, 9.0, 5.0, 1.0, 3.0], "RowCount": [2, 2, 1, 2, 2]})
+    ranked = sql_rank(df, ["Key"], "Value", "Rank")
+    assert ranked.select("Key", "Value", "Rank").rows() == [
+        (1, 9.0, 1), (1, 5.0, 3), (1, 5.0, 3), (1, 1.0, 6), (2, 3.0, 1),
+    ]
+
+
+def test_row_number_orders_by_value_then_candidate_id():
+    df = pl.DataFrame({"Key": [1, 1, 1, 2], "Votes": [10, 20, 10, 5], "CandidateId": [7, 3, 4, 9]})
+    numbered = row_number(df, ["Key"], "Votes", "Number")
+    assert numbered.select("CandidateId", "Number").rows() == [(3, 1), (4, 2), (7, 3), (9, 1)]
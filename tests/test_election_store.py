@@ -0,0 +1,28 @@
+import polars as pl
+from pipelines.election_store import update_index
+
+
+def test_update_index_keeps_keys_and_refreshes_attributes():
+    # Stored out of key order, so attributes must be matched by key, not position.
+    index = pl.DataFrame({
+        "PartyKey": [2, 0, 1], "PartyAb": ["GRN", "ALP", "LP"], "PartyNm": ["Greens", "Labor", "Liberal"],
+    }, schema={"PartyKey": pl.UInt16, "PartyAb": pl.String, "PartyNm": pl.String})
+    rows = pl.DataFrame({
+        "PartyAb": ["LP", "ONP", "ALP", "ALP", "IND"],
+        "PartyNm": ["Liberal Party", "One Nation", "Labour", "Australian Labor Party", "Independent"],
+    })
+    updated = update_index(index, "parties", rows)
+    assert updated.rows() == [
+        (0, "ALP", "Australian Labor Party"),
+        (1, "LP", "Liberal Party"),
+        (2, "GRN", "Greens"),
+        (3, "IND", "Independent"),
+        (4, "ONP", "One Nation"),
+    ]
+    assert updated.schema["PartyKey"] == pl.UInt16
+
+
+def test_update_index_starts_an_empty_index_at_zero():
+    index = pl.DataFrame(schema={"PartyKey": pl.UInt16, "PartyAb": pl.String, "PartyNm": pl.String})
+    rows = pl.DataFrame({"PartyAb": ["LP", "ALP"], "PartyNm": ["Liberal", "Labor"]})
+    assert update_index(index, "parties", rows).rows() == [(0, "ALP", "Labor"), (1, "LP", "Liberal")]
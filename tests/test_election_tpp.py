@@ -0,0 +1,52 @@
+import pytest
+from dash_app.election_swing import division_swings, load_tpp, seat_counts
+from pipelines.election_tpp import ALP, COALITION, VOTE_TYPES, build_tpp, write_tpp
+
+# Division, id, state: Labor and Coalition votes per vote type, published swing.
+DIVISIONS = {
+    ("Zeta", 3, "VIC"): ([10, 1, 0, 2, 3], [20, 2, 1, 1, 4], -1.5),
+    ("Alpha", 1, "NSW"): ([30, 2, 1, 3, 4], [10, 1, 0, 1, 2], 2.0),
+    ("Beta", 2, "NSW"): ([5, 1, 0, 1, 1], [6, 1, 1, 1, 2], 0.5),
+}
+
+
+def write_files(directory, total_offset=0):
+    division_rows = ["DivisionNm,DivisionID,StateAb,PartyAb,TotalVotes,Swing"]
+    type_columns = [f"{side} {t}{measure}" for t in VOTE_TYPES for side in (ALP, COALITION)
+                    for measure in ("Votes", "Percentage")]
+    type_rows = [",".join(["DivisionNm", "DivisionID", "StateAb", "PartyAb", *type_columns, "TotalVotes"])]
+    for (name, division_id, state), (alp, coalition, swing) in DIVISIONS.items():
+        total = sum(alp) + sum(coalition)
+        division_rows.append(f"{name},{division_id},{state},ALP,{total + total_offset},{swing}")
+        cells = [str(v) for a, c in zip(alp, coalition) for v in (a, 50.0, c, 50.0)]
+        type_rows.append(",".join([name, str(division_id), state, "ALP", *cells, str(total)]))
+    division_file, vote_type_file = directory / "HouseTppByDivisionDownload-1.csv", directory / "HouseTppByDivisionByVoteTypeDownload-1.csv"
+    division_file.write_text("\n".join(["Two Party Preferred By Division [banner]", *division_rows]) + "\n")
+    vote_type_file.write_text("\n".join(["Two Party Preferred By Division By Vote Type [banner]", *type_rows]) + "\n")
+    return division_file, vote_type_file
+
+
+def test_build_tpp(tmp_path):
+    tpp = build_tpp(*write_files(tmp_path))
+    assert tpp["states"].tolist() == ["NSW", "VIC"]
+    assert tpp["divisions"].tolist() == ["Alpha", "Beta", "Zeta"]
+    assert tpp["division_state"].tolist() == [0, 0, 1]
+    assert tpp["vote_types"].tolist() == VOTE_TYPES
+    assert tpp["alp_votes"].tolist() == [[30, 2, 1, 3, 4], [5, 1, 0, 1, 1], [10, 1, 0, 2, 3]]
+    assert tpp["coalition_votes"].tolist() == [[10, 1, 0, 1, 2], [6, 1, 1, 1, 2], [20, 2, 1, 1, 4]]
+    assert tpp["swing"].tolist() == [2.0, 0.5, -1.5]
+
+
+def test_build_tpp_rejects_totals_that_do_not_add_up(tmp_path):
+    with pytest.raises(ValueError, match="Alpha, Beta, Zeta"):
+        build_tpp(*write_files(tmp_path, total_offset=1))
+
+
+def test_seat_counts_from_the_written_arrays(tmp_path):
+    path = tmp_path / "tpp.npz"
+    write_tpp(build_tpp(*write_files(tmp_path)), path)
+    tpp = load_tpp(str(path))
+    alp, coalition = seat_counts(tpp, division_swings(tpp, [0.0, 10.0]))
+    # Beta (42% Labor) falls at +10 points; Zeta (36%) holds.
+    assert alp.tolist() == [1, 2]
+    assert coalition.tolist() == [2, 1]
@@ -0,0 +1,39 @@
+import gzip
+import json
+import plotly.graph_objects as go
+import pytest
+from dash_app import main
+from dash_app.cache import FIGURE_ROUTES, encode_figure
+
+
+@pytest.fixture
+def client():
+    figure = encode_figure(go.Figure(go.Bar(x=list(range(500)), y=list(range(500)))))
+    FIGURE_ROUTES["test-figure"] = lambda key: figure if key == "known" else None
+    yield main.server.test_client(), figure
+    del FIGURE_ROUTES["test-figure"]
+
+
+def test_serves_the_encoded_bytes(client):
+    client, figure = client
+    response = client.get("/_figures/test-figure/known", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.get_data() == figure["body"]
+    assert response.headers["ETag"] == f'"{figure["digest"]}"'
+    assert json.loads(response.get_data())["data"][0]["type"] == "bar"
+
+
+def test_compresses_and_revalidates(client):
+    client, figure = client
+    response = client.get("/_figures/test-figure/known", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.get_data()) == figure["body"]
+    revalidated = client.get("/_figures/test-figure/known",
+                             headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304 and revalidated.get_data() == b""
+
+
+def test_unknown_figures_are_not_found(client):
+    client, _ = client
+    assert client.get("/_figures/test-figure/other").status_code == 404
+    assert client.get("/_figures/no-such-figure/known").status_code == 404
@@ -0,0 +1,105 @@
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from dash_app.forecasting import bootstrap_forecast, panel_forecast
+
+YEARS = np.arange(2010, 2025)
+
+
+def noisy_line(intercept, slope, scale, seed):
+    return intercept + slope * (YEARS - 2010) + scale * np.random.default_rng(seed).standard_normal(YEARS.size)
+
+
+def test_interval_shape_ordering_and_seed():
+    values = np.stack([[noisy_line(100, 2, 3, 1), noisy_line(50, -1, 1, 2)],
+                       [noisy_line(10, 0, 5, 3), noisy_line(0, 4, 2, 4)]])
+    result = bootstrap_forecast(YEARS, values, horizon=5, replicates=200)
+    for field in ("forecast", "lower", "upper", "forecast_years"):
+        assert result[field].shape == (2, 2, 5)
+    assert result["intercept"].shape == result["n"].shape == (2, 2)
+    assert (result["forecast_years"] == np.arange(2025, 2030)).all()
+    assert (result["lower"] < result["forecast"]).all() and (result["forecast"] < result["upper"]).all()
+    # Trend uncertainty grows with distance, so the band widens.
+    far = bootstrap_forecast(YEARS, values, horizon=30, replicates=200)
+    width = far["upper"] - far["lower"]
+    assert (width[..., -1] > 1.5 * width[..., 0]).all()
+    assert result["slope"][0, 0] == pytest.approx(2, abs=0.5)
+
+    again = bootstrap_forecast(YEARS, values, horizon=5, replicates=200)
+    np.testing.assert_array_equal(again["lower"], result["lower"])
+    np.testing.assert_array_equal(again["upper"], result["upper"])
+    other = bootstrap_forecast(YEARS, values, horizon=5, replicates=200, seed=1)
+    assert not np.array_equal(other["upper"], result["upper"])
+    np.testing.assert_array_equal(other["forecast"], result["forecast"])
+
+
+def test_short_series_are_nan_and_masks_leave_years_out():
+    line = 3.0 * YEARS - 6000
+    one_value = np.full(YEARS.size, np.nan)
+    one_value[4] = 7.0
+    values = np.stack([line, one_value, line])
+    mask = np.ones(values.shape, dtype=bool)
+    mask[2, :5] = False
+    # Values outside the mask must not affect the fit.
+    values[2, :5] = 1e9
+    result = bootstrap_forecast(YEARS, values, mask=mask, horizon=3, replicates=50)
+
+    assert result["n"].tolist() == [15, 1, 10]
+    assert np.isnan(result["forecast"][1]).all()
+    assert np.isnan(result["lower"][1]).all() and np.isnan(result["upper"][1]).all()
+    for i in (0, 2):
+        assert result["slope"][i] == pytest.approx(3.0)
+        assert result["forecast"][i] == pytest.approx(3.0 * np.arange(2025, 2028) - 6000)
+        # An exact line has no residuals to resample.
+        assert result["upper"][i] - result["lower"][i] == pytest.approx(np.zeros(3), abs=1e-6)
+    assert result["valid"][2].tolist() == [False] * 5 + [True] * 10
+
+
+def test_last_observed_year_starts_each_forecast():
+    values = np.stack([3.0 * YEARS, 3.0 * YEARS])
+    values[1, -3:] = np.nan
+    result = bootstrap_forecast(YEARS, values, horizon=2, replicates=10)
+    assert result["forecast_years"].tolist() == [[2025, 2026], [2022, 2023]]
+
+
+def test_panel_forecast_by_state():
+    rows = []
+    for state, slope in [("NSW", 2.0), ("VIC", -1.0)]:
+        for year in YEARS:
+            if state == "VIC" and year == 2012:
+                continue
+            rows.append({"state": state, "year": year, "population": 100 + slope * (year - 2010),
+                         "net_migration": 10.0 if year % 2 else 12.0})
+    # A state seen in one year only.
+    rows.append({"state": "ACT", "year": 2024, "population": 5.0, "net_migration": 1.0})
+    df = pd.DataFrame(rows).sample(frac=1, random_state=0)
+    forecasts = panel_forecast(df, "state", ["population", "net_migration"], horizon=4, replicates=100)
+
+    assert set(forecasts) == {(c, s) for c in ("population", "net_migration") for s in ("ACT", "NSW", "VIC")}
+    nsw, vic = forecasts["population", "NSW"], forecasts["population", "VIC"]
+    assert nsw["slope"] == pytest.approx(2.0) and vic["slope"] == pytest.approx(-1.0)
+    assert nsw["forecast"].shape == (4,)
+    assert vic["years"].tolist() == [y for y in YEARS.tolist() if y != 2012]
+    assert nsw["forecast"] == pytest.approx(100 + 2.0 * (np.arange(2025, 2029) - 2010))
+    assert np.isnan(forecasts["population", "ACT"]["forecast"]).all()
+    migration = forecasts["net_migration", "VIC"]
+    assert (migration["lower"] <= migration["forecast"]).all() and (migration["forecast"] <= migration["upper"]).all()
+
+
+def test_immigration_page_draws_a_state_forecast(monkeypatch):
+    from dash_app import main  # noqa: F401 - registers the pages
+    immigration = sys.modules["pages.immigration"]
+    rows = [{"state": state, "year": year, "population": base + 100 * (year - 2010),
+             "natural_increase": 50.0 + year % 3, "net_overseas_migration": 80.0 - year % 2,
+             "net_interstate_migration": -5.0 + year % 2}
+            for state, base in [("AUS", 27_000_000), ("TAS", 500_000)] for year in YEARS]
+    df = pd.DataFrame(rows)
+    monkeypatch.setattr(immigration, "get_state_population_data", lambda: df)
+    assert [option["value"] for option in immigration.state_options()] == ["AUS", "TAS"]
+    immigration.state_figures.clear()
+    figure = immigration.update_state_forecast("TAS")
+    assert immigration.update_state_forecast("TAS") is figure
+    assert figure["layout"]["title"]["text"].startswith("TAS: Components of Population Growth (population 0.5M by 2048")
+    assert len(figure["data"]) == 9
+    immigration.state_figures.clear()
@@ -0,0 +1,153 @@
+import json
+import os
+import sys
+import threading
+import time
+import pytest
+from dash_app.geojson_cache import GeoJsonBlob, pack_features, unpack_features
+
+
+class FakeBlob:
+    def __init__(self, store, name):
+        self.store, self.name = store, name
+        self.generation = self.etag = None
+
+    def reload(self):
+        self.store.metadata_calls += 1
+        self.generation = self.store.generations[self.name]
+
+    def download_to_filename(self, path):
+        self.store.downloads += 1
+        with open(path, "w") as f:
+            json.dump(self.store.objects[self.name], f)
+
+
+class FakeStore:
+    """A bucket() / blob() stand-in for google.cloud.storage.Client holding objects in memory."""
+
+    def __init__(self):
+        self.objects, self.generations = {}, {}
+        self.metadata_calls = self.downloads = 0
+
+    def upload(self, name, collection):
+        self.objects[name] = collection
+        self.generations[name] = self.generations.get(name, 0) + 1
+
+    def bucket(self, name):
+        return self
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+
+def square(x, y, size=1.0):
+    return [[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]
+
+
+def feature(state, name, geometry):
+    return {"type": "Feature", "properties": {"STE_NAME21": state, "CED_NAME25": name, "AREA": 1.5},
+            "geometry": geometry}
+
+
+def collection(offset=0.0):
+    return {"type": "FeatureCollection", "features": [
+        feature("Victoria", "Alpha", {"type": "Polygon", "coordinates": [square(144 + offset, -37, 2), square(144.5, -36.5, 0.5)]}),
+        feature("Victoria", "Beta", {"type": "MultiPolygon", "coordinates": [[square(146, -38)], [square(147, -39)]]}),
+        feature("Tasmania", "Gamma", {"type": "Polygon", "coordinates": [square(146, -42)]}),
+    ]}
+
+
+@pytest.fixture
+def store():
+    store = FakeStore()
+    store.upload("maps/divisions.geojson", collection())
+    return store
+
+
+def blob(store, cache_dir, refresh_seconds=3600):
+    return GeoJsonBlob("bucket", "maps/divisions.geojson", lambda: store, str(cache_dir), refresh_seconds)
+
+
+def wait_for_refresh(geojson):
+    deadline = time.monotonic() + 5
+    while geojson._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_pack_round_trips_polygons_holes_multipolygons_and_empty_geometry():
+    features = [
+        {"type": "Feature", "properties": {"CED_NAME25": "Alpha"},
+         "geometry": {"type": "Polygon", "coordinates": [square(0, 0, 2), square(0.5, 0.5, 0.5)]}},
+        {"type": "Feature", "properties": {"CED_NAME25": "Beta"},
+         "geometry": {"type": "MultiPolygon", "coordinates": [[square(3, 3)], [square(5, 5), square(5.2, 5.2, 0.1)]]}},
+        {"type": "Feature", "properties": {"CED_NAME25": "No usual address"}, "geometry": None},
+    ]
+    arrays = pack_features(features)
+    assert arrays["coordinates"].shape == (25, 2)
+    assert unpack_features(arrays) == features
+    assert unpack_features(pack_features([])) == []
+
+
+def test_first_use_downloads_once_and_other_workers_reuse_the_disk_copy(store, tmp_path):
+    first = blob(store, tmp_path)
+    names = [f["properties"] for f in first.features("VIC")]
+    assert names == [{"CED_NAME25": "Alpha"}, {"CED_NAME25": "Beta"}]
+    assert first.features("TAS")[0]["geometry"] == {"type": "Polygon", "coordinates": [square(146, -42)]}
+    assert first.features("NSW") == []
+    assert store.downloads == 1
+
+    second = blob(store, tmp_path)
+    assert second.features("VIC") == first.features("VIC")
+    wait_for_refresh(second)
+    # The second worker only checked the generation in the background.
+    assert store.downloads == 1 and store.metadata_calls == 2
+
+
+def test_new_upload_is_fetched_in_the_background_and_swapped_in(store, tmp_path):
+    geojson = blob(store, tmp_path, refresh_seconds=0)
+    swaps = []
+    geojson.on_swap.append(lambda: swaps.append(True))
+    assert geojson.features("VIC")[0]["geometry"]["coordinates"][0][0] == [144, -37]
+    swaps.clear()
+
+    store.upload("maps/divisions.geojson", collection(offset=1.0))
+    geojson.ensure_current()
+    wait_for_refresh(geojson)
+    assert swaps == [True] and store.downloads == 2
+    assert geojson.features("VIC")[0]["geometry"]["coordinates"][0][0] == [145, -37]
+    # Only the newest two generations stay on disk.
+    store.upload("maps/divisions.geojson", collection(offset=2.0))
+    geojson.refresh()
+    assert len(geojson.cached_directories()) == 2
+
+
+def test_forked_worker_gets_a_fresh_lock(store, tmp_path):
+    geojson = blob(store, tmp_path)
+    geojson.features("VIC")
+    # As if forked while another thread held the lock.
+    geojson._lock.acquire()
+    geojson._pid = -1
+    result = []
+    worker = threading.Thread(target=lambda: result.append(geojson.features("TAS")), daemon=True)
+    worker.start()
+    worker.join(5)
+    assert result and result[0][0]["properties"] == {"CED_NAME25": "Gamma"}
+    assert geojson._pid == os.getpid()
+
+
+def test_election_page_checks_the_generation_on_the_request_path(store, tmp_path, monkeypatch):
+    from dash_app import main  # noqa: F401 - registers the pages
+    election = sys.modules["pages.election"]
+    geojson = blob(store, tmp_path, refresh_seconds=0)
+    monkeypatch.setattr(election, "district_geojson", geojson)
+    election.check_district_geojson()
+    # Nothing is fetched until the map has drawn from the GCS copy.
+    assert store.metadata_calls == 0 and not geojson.loaded
+
+    geojson.features("VIC")
+    wait_for_refresh(geojson)
+    store.upload("maps/divisions.geojson", collection(offset=1.0))
+    election.check_district_geojson()
+    wait_for_refresh(geojson)
+    assert store.downloads == 2
+    assert geojson.features("VIC")[0]["geometry"]["coordinates"][0][0] == [145, -37]
@@ -0,0 +1,40 @@
+import math
+import numpy as np
+import pytest
+from dash_app.projection import SEX_RATIO_AT_BIRTH, project
+
+
+def test_two_years_by_hand():
+    # One state, three ages, 2 being the open-ended one. Women aged 1 have
+    # half a birth each; everyone survives a year with probability 1/2.
+    base = np.array([[[10.0, 20.0, 30.0], [12.0, 14.0, 16.0]]])
+    asfr = np.array([[[0.0, 0.5, 0.0]]])
+    hazard = np.full((1, 1, 2, 3), math.log(2))
+    migrants = np.zeros((1, 1, 2, 3))
+    migrants[0, 0, 1, 1] = 1.0
+    population = project(base, asfr, hazard, migrants, horizon=2)
+
+    # Newborns get half a year of infant mortality: sqrt(1/2).
+    girls = math.sqrt(0.5) / (1 + SEX_RATIO_AT_BIRTH)
+    boys = math.sqrt(0.5) * SEX_RATIO_AT_BIRTH / (1 + SEX_RATIO_AT_BIRTH)
+    # Year 1: births 20 * 0.5 = 10; survivors shift up an age, 15 + 15 stay
+    # in the open age; one male migrant aged 1 arrives.
+    year_1 = [[10 * girls, 5.0, 25.0], [10 * boys, 6.0 + 1.0, 15.0]]
+    # Year 2: births 5 * 0.5 = 2.5 from the year-1 women aged 1.
+    year_2 = [[2.5 * girls, 5 * girls, 2.5 + 12.5], [2.5 * boys, 5 * boys + 1.0, 3.5 + 7.5]]
+    assert population.shape == (1, 3, 1, 2, 3)
+    assert population[0, 0, 0].tolist() == base[0].tolist()
+    assert population[0, 1, 0] == pytest.approx(np.array(year_1))
+    assert population[0, 2, 0] == pytest.approx(np.array(year_2))
+
+
+def test_scenarios_broadcast_and_improvement_lowers_mortality():
+    base = np.array([[[10.0, 20.0, 30.0], [12.0, 14.0, 16.0]]])
+    asfr = np.zeros((2, 1, 3))
+    hazard = np.full((1, 1, 2, 3), math.log(2))
+    population = project(base, asfr, hazard, np.zeros((1, 1, 2, 3)), improvement=[0.0, 0.5], horizon=2)
+    assert population.shape == (2, 3, 1, 2, 3)
+    # Year 1 uses the base hazard in both; year 2's hazard is halved in the second.
+    assert population[0, 1].sum() == pytest.approx(population[1, 1].sum())
+    assert population[0, 2, 0, 0, 2] == pytest.approx((5 + 25) / 2)
+    assert population[1, 2, 0, 0, 2] == pytest.approx((5 + 25) * math.sqrt(0.5))
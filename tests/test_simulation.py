@@ -0,0 +1,111 @@
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from dash_app import simulation
+
+
+@pytest.fixture
+def population():
+    # Births falling by 1,500 a year and deaths rising by 3,000 from 2012,
+    # with a little alternating scatter so the residuals are not zero.
+    years = np.arange(2000, 2025)
+    wiggle = np.where(years % 2, 500.0, -500.0)
+    births = 300_000 - 1_500 * (years - 2012) + wiggle
+    deaths = 180_000 + 3_000 * (years - 2012) - wiggle
+    migration = 200_000 + 4 * wiggle
+    return pd.DataFrame({
+        "year": years[::-1],
+        "births": births[::-1],
+        "deaths": deaths[::-1],
+        "net_migration": migration[::-1],
+        "total": (20e6 + np.cumsum(births - deaths + migration))[::-1],
+    })
+
+
+@pytest.fixture
+def pool_path(monkeypatch):
+    monkeypatch.setattr(simulation, "PARALLEL_MIN_PATHS", 10)
+    yield
+    if simulation._pool is not None:
+        simulation._pool.shutdown()
+    monkeypatch.setattr(simulation, "_pool", None)
+    monkeypatch.setattr(simulation, "_pool_workers", None)
+
+
+def test_calibrate_recovers_the_trends(population):
+    params = simulation.calibrate(population)
+    assert params["last_year"] == 2024
+    assert params["last_total"] == population.loc[population["year"] == 2024, "total"].item()
+    assert params["mean_year"] == pytest.approx(2018.0)
+    assert params["births"]["slope"] == pytest.approx(-1_500, abs=100)
+    assert params["deaths"]["slope"] == pytest.approx(3_000, abs=100)
+    assert params["births"]["level"] == pytest.approx(300_000 - 1_500 * 6, abs=200)
+    assert 0 < params["births"]["slope_se"] < params["births"]["residual_std"]
+    assert params["migration_std"] == pytest.approx(population["net_migration"].std())
+
+
+def test_simulate_paths_shapes_and_seed(population):
+    params = simulation.calibrate(population)
+    crossover, total = simulation.simulate_paths(params, 200_000, paths=50, horizon=30, seed=1)
+    assert crossover.shape == (50,) and total.shape == (50, 30)
+    crossed = crossover[~np.isnan(crossover)]
+    assert crossed.size and ((crossed > 2024) & (crossed <= 2054)).all()
+    again = simulation.simulate_paths(params, 200_000, paths=50, horizon=30, seed=1)
+    np.testing.assert_array_equal(again[0], crossover)
+    np.testing.assert_array_equal(again[1], total)
+    assert not np.array_equal(simulation.simulate_paths(params, 200_000, 50, 30, seed=2)[1], total)
+
+
+def check_summary(summary, paths, horizon):
+    quantiles = np.array([summary["total_quantiles"][q] for q in simulation.QUANTILES])
+    assert quantiles.shape == (len(simulation.QUANTILES), horizon)
+    assert (np.diff(quantiles, axis=0) >= 0).all()
+    counts = summary["crossover_counts"]
+    assert counts.shape == (horizon,)
+    assert counts.sum() + summary["never_crossed"] * paths == pytest.approx(paths)
+
+
+def test_simulate_summary_in_process(population):
+    params = simulation.calibrate(population)
+    summary = simulation.simulate(params, paths=200, horizon=30, workers=1)
+    check_summary(summary, 200, 30)
+    assert summary["years"].tolist() == list(range(2025, 2055))
+    again = simulation.simulate(params, paths=200, horizon=30, workers=1)
+    np.testing.assert_array_equal(again["crossover_counts"], summary["crossover_counts"])
+    np.testing.assert_array_equal(again["total_quantiles"][0.5], summary["total_quantiles"][0.5])
+
+
+def test_simulate_in_pool_chunks(population, pool_path):
+    params = simulation.calibrate(population)
+    summary = simulation.simulate(params, paths=201, horizon=30, seed=3, workers=2)
+    check_summary(summary, 201, 30)
+    assert simulation._pool_workers == 2
+    first_pool = simulation.pool(2)
+    again = simulation.simulate(params, paths=201, horizon=30, seed=3, workers=2)
+    assert simulation.pool(2) is first_pool
+    np.testing.assert_array_equal(again["crossover_counts"], summary["crossover_counts"])
+    np.testing.assert_array_equal(again["total_quantiles"][0.05], summary["total_quantiles"][0.05])
+    # Each chunk draws from its own SeedSequence child, not the same stream twice.
+    first, second = np.random.SeedSequence(3).spawn(2)
+    _, total_1 = simulation.simulate_paths(params, simulation.DEFAULT_TARGET, 100, 30, first)
+    _, total_2 = simulation.simulate_paths(params, simulation.DEFAULT_TARGET, 101, 30, second)
+    np.testing.assert_array_equal(np.quantile(np.concatenate([total_1, total_2]), 0.5, axis=0),
+                                  summary["total_quantiles"][0.5])
+    assert not np.array_equal(total_1, total_2[:100])
+
+
+def test_scenarios_are_cached_per_target(population, monkeypatch):
+    from dash_app import main  # noqa: F401 - registers the pages
+    immigration = sys.modules["pages.immigration"]
+    runs = []
+    simulate = simulation.simulate
+    monkeypatch.setattr(immigration, "get_population_data", lambda: population)
+    monkeypatch.setattr(simulation, "simulate", lambda params, target: runs.append(target) or
+                        simulate(params, target, paths=100, workers=1))
+    immigration.simulations.clear()
+    first = immigration.update_simulation(200_000)
+    assert immigration.update_simulation(200_000) is first
+    immigration.update_simulation(400_000)
+    assert runs == [200_000, 400_000]
+    immigration.simulations.clear()
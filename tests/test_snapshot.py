@@ -0,0 +1,80 @@
+import glob
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import pyarrow as pa
+import pytest
+from dash_app import snapshot
+
+TABLE_ID = "australia.au_population_mart"
+SQL = "SELECT year, total FROM `australia.au_population_mart`"
+
+
+class FakeClient:
+    """Stands in for bigquery.Client: get_table() metadata and query() results that the test controls."""
+
+    def __init__(self, table):
+        self.table = table
+        self.modified = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.queries = 0
+        self.delay = 0
+
+    def get_table(self, table_id):
+        return SimpleNamespace(modified=self.modified, etag='"etag"')
+
+    def query(self, sql):
+        self.queries += 1
+        time.sleep(self.delay)
+        return SimpleNamespace(result=lambda: SimpleNamespace(to_arrow=lambda: self.table))
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path))
+    return FakeClient(pa.table({"year": [2023, 2024], "total": [26.6, 27.2]}))
+
+
+def snapshot_files(tmp_path):
+    return sorted(glob.glob(str(tmp_path / "*.arrow")))
+
+
+def test_returns_the_fetched_table(client):
+    assert snapshot.read_snapshot(client, TABLE_ID, SQL).equals(client.table)
+    assert client.queries == 1
+
+
+def test_second_call_reads_the_mapped_file_without_fetching(client, tmp_path):
+    snapshot.read_snapshot(client, TABLE_ID, SQL)
+    allocated = pa.total_allocated_bytes()
+    table = snapshot.read_snapshot(client, TABLE_ID, SQL)
+    assert client.queries == 1
+    assert table.equals(client.table)
+    # Read zero-copy from the memory map rather than into Arrow's own memory.
+    assert pa.total_allocated_bytes() == allocated
+    assert len(snapshot_files(tmp_path)) == 1
+
+
+def test_new_modified_time_writes_a_new_file_and_removes_the_old(client, tmp_path):
+    snapshot.read_snapshot(client, TABLE_ID, SQL)
+    [old] = snapshot_files(tmp_path)
+    client.modified = datetime(2026, 2, 1, tzinfo=timezone.utc)
+    client.table = pa.table({"year": [2025], "total": [27.6]})
+    assert snapshot.read_snapshot(client, TABLE_ID, SQL).equals(client.table)
+    assert client.queries == 2
+    [new] = snapshot_files(tmp_path)
+    assert new != old
+    assert new.endswith(f"-{int(client.modified.timestamp() * 1000)}.arrow")
+
+
+def test_callers_racing_on_the_lock_fetch_once(client):
+    client.delay = 0.2
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(snapshot.read_snapshot(client, TABLE_ID, SQL)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert client.queries == 1
+    assert len(results) == 4 and all(table.equals(client.table) for table in results)